@@ -14,6 +14,12 @@ class Settings(BaseSettings):
     
     # Database Configuration
     DATABASE_URL: PostgresDsn
+    ASYNC_DATABASE_URL: Optional[str] = None  # derived from DATABASE_URL (asyncpg) if unset
+    DB_POOL_SIZE: int = 10  # connections kept open per engine and process
+    DB_MAX_OVERFLOW: int = 20  # extra connections under burst load
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True  # check connections before use
     
     # Model Configuration
     ASR_MODEL: str = "whisper-large-v2"
@@ -21,9 +27,72 @@ class Settings(BaseSettings):
     LLM_MODEL: str = "mistral-7b"
     EMBEDDING_MODEL: str = "BAAI/bge-small-en-v1.5"
     
+    # Language Model Backend
+    LLM_BACKEND: str = "stub"  # stub, openai (any OpenAI-compatible server) or llama_cpp
+    LLM_BASE_URL: str = "http://localhost:8080/v1"
+    LLM_API_KEY: Optional[str] = None  # falls back to OPENAI_API_KEY
+    LLM_MODEL_PATH: str = "./models/mistral-7b-instruct.Q4_K_M.gguf"  # for llama_cpp
+    LLM_CONTEXT_SIZE: int = 4096
+    LLM_THREADS: int = 0  # 0 lets llama.cpp decide
+    LLM_MAX_TOKENS: int = 512
+    LLM_TEMPERATURE: float = 0.3
+    LLM_TIMEOUT: float = 60.0
+    
+    # Speech Recognition Workers
+    ASR_EXECUTOR: str = "thread"  # thread or process
+    ASR_WORKERS: int = 1  # one model instance per worker
+    ASR_TORCH_THREADS: int = 0  # 0 keeps torch's default
+    ASR_MAX_QUEUE: int = 16  # pending requests before returning 429
+    ASR_BATCHING_ENABLED: bool = True  # batch concurrent clips of up to 30 s
+    ASR_BATCH_MAX_SIZE: int = 8
+    ASR_BATCH_MAX_WAIT_MS: int = 20
+    ASR_STREAM_PARTIAL_INTERVAL: float = 1.0  # seconds of new speech between partials
+    ASR_STREAM_MIN_SILENCE: float = 0.5  # pause (seconds) that ends an utterance
+    ASR_STREAM_MAX_SEGMENT: float = 15.0  # force a final after this many seconds
+    ASR_VAD: str = "energy"  # energy, none or module:Class of a model-based VAD
+    ASR_VAD_THRESHOLD_DB: float = -40.0
+    ASR_VAD_PADDING: float = 0.2  # seconds kept around each speech region
+    ASR_VAD_MAX_PAUSE: float = 0.5  # longer internal pauses are cut out
+    
     # Vector Database
     VECTOR_DB_TYPE: str = "faiss"
     VECTOR_DB_PATH: str = "./data/vector_store"
+    VECTOR_INDEX_TYPE: str = "flat"  # flat, ivf_flat, ivf_pq or hnsw
+    VECTOR_IVF_NLIST: int = 1024
+    VECTOR_IVF_NPROBE: int = 16
+    VECTOR_PQ_M: int = 48  # must divide the embedding dimension
+    VECTOR_PQ_NBITS: int = 8
+    VECTOR_HNSW_M: int = 32
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 200
+    VECTOR_HNSW_EF_SEARCH: int = 64
+    INGEST_BATCH_SIZE: int = 64  # documents per bulk ingest batch
+    EMBEDDING_BATCH_SIZE: int = 64  # texts per encoder forward pass
+    INDEX_SAVE_DELAY: float = 5.0  # seconds index changes are batched before saving
+    CHUNK_SIZE: int = 256  # tokens, below the embedding model's max sequence length
+    CHUNK_OVERLAP: int = 32
+    
+    # Hybrid Retrieval
+    HYBRID_SEARCH_ENABLED: bool = True  # fuse BM25 with vector results
+    HYBRID_CANDIDATES: int = 20  # results taken from each retriever before fusion
+    HYBRID_RRF_K: int = 60  # reciprocal rank fusion constant
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    
+    # Text-to-Speech Client
+    TTS_BASE_URL: str = "https://api.resemble.ai/v1"
+    TTS_TIMEOUT: float = 30.0  # seconds
+    TTS_CONNECT_TIMEOUT: float = 5.0
+    TTS_MAX_CONNECTIONS: int = 20
+    TTS_MAX_CONCURRENCY: int = 8
+    TTS_MAX_RETRIES: int = 3
+    TTS_RETRY_BACKOFF: float = 0.5  # base delay in seconds, doubled per attempt
+    TTS_RETRY_MAX_DELAY: float = 5.0  # cap on any retry wait, including Retry-After
+    TTS_STREAM_PARALLELISM: int = 3  # sentences synthesised ahead of the one being sent
+    TTS_STREAM_MIN_CHARS: int = 20  # shorter sentences are merged into the next
+    TTS_CACHE_ENABLED: bool = True  # synthesised audio cached under UPLOAD_DIR/tts_cache
+    TTS_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    AUDIO_STORE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024  # answer audio under UPLOAD_DIR/audio
+    AUDIO_STORE_TTL: int = 7 * 24 * 3600  # seconds an audio_url stays valid
     
     # API Keys
     OPENAI_API_KEY: Optional[str] = None
@@ -43,10 +112,35 @@ class Settings(BaseSettings):
     # Cache Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
     CACHE_TTL: int = 3600
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_REDIS: bool = False  # share query embeddings via REDIS_URL
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_THRESHOLD: float = 0.95  # cosine similarity for a semantic hit
+    RESPONSE_CACHE_SIZE: int = 1000
+    
+    # Conversation History
+    HISTORY_MAX_TURNS: int = 10  # recent turns kept per session for prompts
+    HISTORY_MAX_SESSIONS: int = 10000  # sessions held in the in-process buffer
+    HISTORY_REDIS: bool = False  # share the recent-turn buffer via REDIS_URL
+    HISTORY_FLUSH_INTERVAL: float = 1.0  # seconds between write-behind flushes
+    HISTORY_FLUSH_BATCH_SIZE: int = 100
+    HISTORY_JOURNAL_PATH: str = "./data/history_journal.jsonl"  # each worker journals to <name>.<id>.jsonl
+    
+    # Prompt Assembly
+    PROMPT_MAX_TOKENS: int = 3072  # context + history + query, excluding the answer
+    PROMPT_HISTORY_SHARE: float = 0.3  # of the budget left after the query
+    PROMPT_SUMMARY_MAX_TOKENS: int = 200
+    PROMPT_MIN_CHUNK_TOKENS: int = 32  # smaller leftovers drop a chunk instead of truncating
+    
+    # Document Listing
+    DOCUMENTS_PAGE_SIZE: int = 100
+    DOCUMENTS_MAX_PAGE_SIZE: int = 1000
+    DOCUMENTS_EXPORT_BATCH_SIZE: int = 1000  # rows per keyset query when exporting
     
     # Storage
     UPLOAD_DIR: str = "./data/uploads"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB in bytes
+    MAX_DOCUMENT_UPLOAD_SIZE: int = 200 * 1024 * 1024  # JSONL bulk ingest, 200MB in bytes
     
     @validator("DATABASE_URL", pre=True)
     def validate_database_url(cls, v: Optional[str]) -> Optional[str]:
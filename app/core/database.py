@@ -1,22 +1,77 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from contextlib import contextmanager
-from typing import Generator
+from typing import AsyncGenerator, Dict, Generator, Optional
 
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# Async drivers used for each sync URL scheme
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str, override: Optional[str] = None) -> str:
+    """
+    Async driver URL for a sync DATABASE_URL (asyncpg, or aiosqlite for SQLite).
+
+    An explicit override, i.e. ASYNC_DATABASE_URL, is used as given.
+    """
+    if override:
+        return override
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def engine_options(url: str) -> Dict:
+    """Pool settings from DB_POOL_*; SQLite keeps SQLAlchemy's own pool choice."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+DATABASE_URL = str(settings.DATABASE_URL)
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL, settings.ASYNC_DATABASE_URL)
+
+# Sync engine for startup, scripts and work already running in threads
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for request handlers
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+# Objects stay usable after commit; lazy loads would need an explicit await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-@contextmanager
 def get_db() -> Generator:
+    """Yield a request-scoped database session."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Yield a request-scoped async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    # Tables are declared on the models' own declarative base
+    from app.models.database import Base as ModelBase
+    ModelBase.metadata.create_all(bind=engine)
+    # create_all skips existing tables; add indexes declared since
+    for table in ModelBase.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
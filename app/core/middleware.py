@@ -0,0 +1,64 @@
+from typing import Dict
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject request bodies larger than the limit for their route.
+
+    limits maps request paths to a maximum body size in bytes; other paths
+    are not limited. Every content type counts, not just multipart, so a
+    form-encoded or raw body cannot slip past the limit. Requests that
+    declare a larger Content-Length are refused before any of the body is
+    read; otherwise bytes are counted as they arrive and the request is
+    aborted with 413 as soon as the limit is crossed, so an oversized
+    upload is never buffered in full.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        max_size = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_size is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                declared = -1
+            if declared < 0:
+                response = JSONResponse(
+                    status_code=400, content={"detail": "Invalid Content-Length header"}
+                )
+                await response(scope, receive, send)
+                return
+            if declared > max_size:
+                response = JSONResponse(
+                    status_code=413, content={"detail": f"Upload exceeds {max_size} bytes"}
+                )
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Upload exceeds {max_size} bytes"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,26 +1,105 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, UploadFile, File, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import numpy as np
-import soundfile as sf
-import io
+import base64
 import uuid
 import os
+import asyncio
+import json
+import logging
 
 from app.core.config import settings
-from app.core.database import get_db
-from app.models.database import Language, Document
-from app.services.speech_recognition import SpeechRecognitionService
-from app.services.rag import RAGService
-from app.services.tts import TextToSpeechService
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine, get_async_db
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.models.database import Language, DocumentType
+from app.models.schemas import BulkIngestRequest, DocumentCreate
+from app.services.audio_cache import AudioCache
+from app.services.audio_io import decode_audio, join_audio
+from app.services.audio_store import AudioStore
+from app.services.cache import create_redis_client
+from app.services.conversation import ConversationHistory
+from app.services.documents import (
+    DOCUMENT_FIELDS, document_page, export_document_lines, parse_fields
+)
+from app.services.speech_recognition import ASRQueueFullError, SpeechRecognitionService
+from app.services.streaming import pcm16_to_float32
+from app.services.prompt import create_prompt_builder
+from app.services.rag import RAGService, RetrievalEngine
+from app.services.resampling import StreamResampler
+from app.services.response_cache import SemanticResponseCache, document_key
+from app.services.llm import create_llm_backend
+from app.services.tts import TextToSpeechService, stream_sentences
+
+logger = logging.getLogger(__name__)
+
+# Initialize services
+speech_recognition = SpeechRecognitionService()
+tts_service = TextToSpeechService(
+    audio_cache=AudioCache(
+        os.path.join(settings.UPLOAD_DIR, "tts_cache"), settings.TTS_CACHE_MAX_BYTES
+    ) if settings.TTS_CACHE_ENABLED else None
+)
+retrieval_engine = RetrievalEngine()
+llm_backend = create_llm_backend()
+audio_store = AudioStore(
+    os.path.join(settings.UPLOAD_DIR, "audio"),
+    max_bytes=settings.AUDIO_STORE_MAX_BYTES,
+    ttl=settings.AUDIO_STORE_TTL
+)
+prompt_builder = create_prompt_builder(retrieval_engine.count_tokens)
+# Answers are only reused while their audio_url still resolves
+response_cache = SemanticResponseCache(
+    threshold=settings.RESPONSE_CACHE_THRESHOLD,
+    max_size=settings.RESPONSE_CACHE_SIZE,
+    ttl=min(settings.CACHE_TTL, settings.AUDIO_STORE_TTL),
+    is_valid=lambda entry: (
+        entry.audio_url is None or audio_store.find_url(entry.audio_url) is not None
+    )
+)
+conversation_history = ConversationHistory(
+    SessionLocal,
+    settings.HISTORY_JOURNAL_PATH,
+    max_turns=settings.HISTORY_MAX_TURNS,
+    max_sessions=settings.HISTORY_MAX_SESSIONS,
+    flush_interval=settings.HISTORY_FLUSH_INTERVAL,
+    batch_size=settings.HISTORY_FLUSH_BATCH_SIZE,
+    redis_client=create_redis_client() if settings.HISTORY_REDIS else None,
+    redis_ttl=settings.CACHE_TTL,
+    summary_max_tokens=settings.PROMPT_SUMMARY_MAX_TOKENS
+)
+
+async def _start_retrieval_engine():
+    """Load and warm up the retrieval engine without blocking startup."""
+    try:
+        await run_in_threadpool(retrieval_engine.start, SessionLocal)
+    except Exception as e:
+        logger.error(f"Error starting retrieval engine: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load in the background so /health can report readiness
+    startup_task = asyncio.create_task(_start_retrieval_engine())
+    await conversation_history.start()
+    yield
+    startup_task.cancel()
+    await run_in_threadpool(retrieval_engine.flush)
+    await conversation_history.stop()
+    await tts_service.aclose()
+    await llm_backend.aclose()
+    await async_engine.dispose()
+    speech_recognition.shutdown()
 
 app = FastAPI(
     title="Bilingual Speech Recognition & Response Generation System",
     description="API for real-time Hindi/English speech recognition, response generation, and text-to-speech",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -32,12 +111,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads while they stream in
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/v1/speech-to-text": settings.MAX_UPLOAD_SIZE,
+        "/api/v1/ingest-documents/upload": settings.MAX_DOCUMENT_UPLOAD_SIZE
+    }
+)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-# Initialize services
-speech_recognition = SpeechRecognitionService()
-tts_service = TextToSpeechService()
+def get_rag_service(db: AsyncSession = Depends(get_async_db)) -> RAGService:
+    """Build a RAG service around the shared engine and a request-scoped session."""
+    if not retrieval_engine.ready:
+        raise HTTPException(status_code=503, detail="Retrieval engine is still loading")
+    return RAGService(db, retrieval_engine, response_cache, prompt_builder, llm_backend)
 
 @app.get("/")
 async def read_root():
@@ -46,14 +136,28 @@ async def read_root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint; reports ready only once models are resident."""
+    if not retrieval_engine.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
     return {"status": "healthy"}
 
+@app.get("/api/v1/stats")
+async def stats():
+    """Runtime counters for sizing caches and pools."""
+    return {
+        "embedding_cache": retrieval_engine.query_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "conversation_history": conversation_history.stats(),
+        "prompt": prompt_builder.metrics.stats(),
+        "asr_pool": speech_recognition.pool_stats(),
+        "tts_cache": tts_service.audio_cache.stats() if tts_service.audio_cache else None,
+        "audio_store": audio_store.stats()
+    }
+
 @app.post("/api/v1/speech-to-text")
 async def speech_to_text(
     audio: UploadFile = File(...),
-    language: Optional[Language] = None,
-    db: Session = Depends(get_db)
+    language: Optional[Language] = None
 ):
     """
     Convert speech to text with language detection.
@@ -61,34 +165,91 @@ async def speech_to_text(
     Args:
         audio: Audio file (WAV format)
         language: Optional language hint
-        db: Database session
         
     Returns:
-        Transcribed text and detected language
+        Transcribed text, detected language, timestamped segments and
+        seconds of silence skipped
     """
     try:
-        # Read audio file
-        audio_data, sample_rate = sf.read(io.BytesIO(await audio.read()))
-        
-        # Convert to mono if stereo
-        if len(audio_data.shape) > 1:
-            audio_data = audio_data.mean(axis=1)
+        # Decode the spooled upload block-wise to float32 mono
+        audio_data, sample_rate = await run_in_threadpool(decode_audio, audio.file)
         
         # Transcribe
-        text, detected_language = await speech_recognition.transcribe_audio(
+        result = await speech_recognition.transcribe(
             audio_data,
             sample_rate=sample_rate,
             language=language
         )
         
         return {
-            "text": text,
-            "language": detected_language
+            "text": result["text"],
+            "language": result["language"],
+            "segments": result["segments"],
+            "vad": result["vad"]
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ASRQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.websocket("/api/v1/speech-to-text/stream")
+async def speech_to_text_stream(
+    websocket: WebSocket,
+    sample_rate: int = 16000,
+    language: Optional[Language] = None
+):
+    """
+    Stream speech recognition over a WebSocket.
+    
+    The client sends binary messages of mono 16-bit little-endian PCM and a
+    text message "end" when done. The server replies with JSON events of
+    type "partial" (the current hypothesis) and "final" (a finished
+    utterance), each with start/end times in seconds.
+    
+    Args:
+        websocket: WebSocket connection
+        sample_rate: sample rate of the PCM frames
+        language: Optional language hint
+    """
+    await websocket.accept()
+    stream = speech_recognition.create_stream(language)
+    # One resampler per connection so frame boundaries don't ring
+    resampler = StreamResampler(sample_rate)
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            
+            if message.get("bytes"):
+                audio_data = resampler.process(pcm16_to_float32(message["bytes"]))
+                events = await stream.feed(audio_data)
+            elif message.get("text") == "end":
+                events = await stream.feed(resampler.flush())
+                for event in events + await stream.finish():
+                    await websocket.send_json(event)
+                await websocket.close()
+                return
+            else:
+                continue
+            
+            for event in events:
+                await websocket.send_json(event)
+                
+    except WebSocketDisconnect:
+        return
+    except ASRQueueFullError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1013)  # try again later
+    except Exception as e:
+        logger.error(f"Error in streaming speech recognition: {str(e)}")
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
+
 @app.post("/api/v1/text-to-speech")
 async def text_to_speech(
     text: str,
@@ -111,7 +272,7 @@ async def text_to_speech(
         Audio data
     """
     try:
-        audio_data = await tts_service.generate_speech(
+        audio = await tts_service.speech_file(
             text=text,
             language=language,
             voice_id=voice_id,
@@ -119,7 +280,10 @@ async def text_to_speech(
             pitch=pitch
         )
         
-        return audio_data
+        # Cache hits are sent from disk without loading them into memory
+        if isinstance(audio, bytes):
+            return Response(content=audio, media_type="audio/wav")
+        return FileResponse(audio, media_type="audio/wav")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -129,7 +293,8 @@ async def chat(
     text: str,
     session_id: Optional[str] = None,
     language: Optional[Language] = None,
-    db: Session = Depends(get_db)
+    doc_type: Optional[DocumentType] = None,
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Chat with the AI agent using RAG.
@@ -137,44 +302,267 @@ async def chat(
     Args:
         text: User's message
         session_id: Optional session ID for conversation history
-        language: Optional language hint
-        db: Database session
+        language: Optional language hint, also restricts retrieved documents
+        doc_type: Optional document type to restrict retrieval to
+        rag_service: RAG service bound to the request's database session
         
     Returns:
-        AI response and audio
+        AI response and the URL of its audio
     """
     try:
-        # Initialize RAG service
-        rag_service = RAGService(db)
+        # Get conversation history from the recent-turn buffer
+        history = await conversation_history.recent(session_id) if session_id else []
+        session_id = session_id or str(uuid.uuid4())
+        
+        # Retrieve first: the cache key includes the contributing documents
+        chunks = await rag_service.retrieve_relevant_chunks(
+            text, language, doc_type=doc_type
+        )
         
-        # Get conversation history
-        conversation_history = []
-        if session_id:
-            # TODO: Implement conversation history retrieval
-            pass
+        # Answers that depend on earlier turns are not reusable
+        use_cache = settings.RESPONSE_CACHE_ENABLED and not history
+        if use_cache:
+            query_embedding = await run_in_threadpool(retrieval_engine.encode_query, text)
+            documents = document_key(chunks)
+            cached = response_cache.lookup(query_embedding, language, documents)
+            if cached is not None:
+                await conversation_history.record_turn(
+                    session_id, language, text, cached.text, cached.audio_url
+                )
+                return {
+                    "text": cached.text,
+                    "audio_url": cached.audio_url,
+                    "session_id": session_id,
+                    "cached": True
+                }
         
         # Generate response
         response_text = await rag_service.generate_response(
             query=text,
-            conversation_history=conversation_history,
-            language=language
+            conversation_history=history,
+            language=language,
+            doc_type=doc_type,
+            chunks=chunks,
+            summary=await conversation_history.summary(session_id)
         )
         
-        # Generate speech
+        # Generate speech and store it once; clients fetch it by URL
         audio_data = await tts_service.generate_speech(
             text=response_text,
             language=language
         )
+        audio_id = await run_in_threadpool(audio_store.put, audio_data)
+        audio_url = audio_store.url(audio_id)
+        
+        if use_cache:
+            response_cache.store(
+                query_embedding, language, documents, response_text, audio_url
+            )
+        await conversation_history.record_turn(session_id, language, text, response_text, audio_url)
         
         return {
             "text": response_text,
-            "audio": audio_data,
-            "session_id": session_id or str(uuid.uuid4())
+            "audio_url": audio_url,
+            "session_id": session_id,
+            "cached": False
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/chat/stream")
+async def chat_stream(
+    text: str,
+    session_id: Optional[str] = None,
+    language: Optional[Language] = None,
+    doc_type: Optional[DocumentType] = None,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Chat with the AI agent, streaming the answer as it is generated and speaking it sentence by sentence.
+    
+    Args:
+        text: User's message
+        session_id: Optional session ID for conversation history
+        language: Optional language hint, also restricts retrieved documents
+        doc_type: Optional document type to restrict retrieval to
+        rag_service: RAG service bound to the request's database session
+        
+    Returns:
+        Newline-delimited JSON: "start", then "token" events as the answer
+        is generated interleaved with one "audio" event (base64) per
+        sentence in order as soon as it is synthesised, then "text" with
+        the full answer and the audio_url of the whole answer's audio, and
+        "done". A cached answer is sent as "start", "text", one "audio"
+        event with its audio_url, then "done".
+    """
+    try:
+        history = await conversation_history.recent(session_id) if session_id else []
+        session_id = session_id or str(uuid.uuid4())
+        chunks = await rag_service.retrieve_relevant_chunks(
+            text, language, doc_type=doc_type
+        )
+        
+        # Same cache rules as /api/v1/chat
+        use_cache = settings.RESPONSE_CACHE_ENABLED and not history
+        cached = None
+        if use_cache:
+            query_embedding = await run_in_threadpool(retrieval_engine.encode_query, text)
+            documents = document_key(chunks)
+            cached = response_cache.lookup(query_embedding, language, documents)
+        summary = await conversation_history.summary(session_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    def event(payload: dict) -> str:
+        return json.dumps(payload, ensure_ascii=False) + "\n"
+    
+    async def cached_events():
+        yield event({"type": "start", "session_id": session_id, "cached": True})
+        yield event({"type": "text", "text": cached.text})
+        if cached.audio_url:
+            yield event({
+                "type": "audio",
+                "index": 0,
+                "text": cached.text,
+                "audio_url": cached.audio_url
+            })
+        await conversation_history.record_turn(
+            session_id, language, text, cached.text, cached.audio_url
+        )
+        yield event({"type": "done"})
+    
+    async def events():
+        yield event({"type": "start", "session_id": session_id, "cached": False})
+        
+        # Tokens go to the client and, via token_queue, to sentence-level
+        # TTS, so the first sentence is spoken while the rest is generated
+        outgoing: asyncio.Queue = asyncio.Queue()
+        token_queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        answer: List[str] = []
+        audio_parts: List[bytes] = []
+        
+        async def generate():
+            try:
+                async for token in rag_service.stream_response(
+                    query=text,
+                    conversation_history=history,
+                    language=language,
+                    doc_type=doc_type,
+                    chunks=chunks,
+                    summary=summary
+                ):
+                    answer.append(token)
+                    outgoing.put_nowait({"type": "token", "text": token})
+                    token_queue.put_nowait(token)
+            finally:
+                token_queue.put_nowait(None)
+        
+        async def queued_tokens():
+            while True:
+                token = await token_queue.get()
+                if token is None:
+                    return
+                yield token
+        
+        async def speak():
+            index = 0
+            async for sentence, audio in tts_service.stream_speech(
+                stream_sentences(queued_tokens(), settings.TTS_STREAM_MIN_CHARS),
+                language=language
+            ):
+                audio_parts.append(audio)
+                outgoing.put_nowait({
+                    "type": "audio",
+                    "index": index,
+                    "text": sentence,
+                    "audio": base64.b64encode(audio).decode("ascii")
+                })
+                index += 1
+        
+        async def run():
+            tasks = [asyncio.create_task(generate()), asyncio.create_task(speak())]
+            try:
+                await asyncio.gather(*tasks)
+                outgoing.put_nowait(finished)
+            except Exception as e:
+                logger.error(f"Error streaming chat response: {str(e)}")
+                outgoing.put_nowait({"type": "error", "detail": str(e)})
+            finally:
+                # If one side failed, the other has nothing to feed or drain
+                for task in tasks:
+                    task.cancel()
+        
+        runner = asyncio.create_task(run())
+        try:
+            while True:
+                item = await outgoing.get()
+                if item is finished:
+                    break
+                yield event(item)
+                if item["type"] == "error":
+                    return
+        finally:
+            # Client went away or generation failed: stop LLM and TTS work
+            runner.cancel()
+        
+        response_text = "".join(answer).strip()
+        
+        # Store the whole answer's audio once, as /api/v1/chat does
+        audio_url = None
+        if audio_parts:
+            try:
+                audio_data = await run_in_threadpool(join_audio, audio_parts)
+                audio_id = await run_in_threadpool(audio_store.put, audio_data)
+                audio_url = audio_store.url(audio_id)
+            except (ValueError, OSError) as e:
+                logger.warning(f"Could not store streamed answer audio: {str(e)}")
+        
+        if use_cache and audio_url is not None:
+            response_cache.store(
+                query_embedding, language, documents, response_text, audio_url
+            )
+        await conversation_history.record_turn(
+            session_id, language, text, response_text, audio_url
+        )
+        yield event({"type": "text", "text": response_text, "audio_url": audio_url})
+        yield event({"type": "done"})
+    
+    return StreamingResponse(
+        cached_events() if cached is not None else events(),
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/api/v1/audio/{audio_id}")
+async def get_audio(audio_id: str, request: Request):
+    """
+    Serve stored response audio.
+    
+    Objects are immutable and named by content hash, so the ID is a strong
+    ETag; byte ranges are supported for progressive playback.
+    
+    Args:
+        audio_id: Audio object ID from a chat response's audio_url
+        request: Incoming request, for conditional headers
+        
+    Returns:
+        Audio file, a 206 partial response, or 304 if the client's copy is current
+    """
+    path = audio_store.find(audio_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    headers = {
+        "ETag": f'"{audio_id}"',
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in if_none_match or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    return FileResponse(path, media_type="audio/wav", headers=headers)
+
 @app.post("/api/v1/ingest-document")
 async def ingest_document(
     title: str,
@@ -182,7 +570,7 @@ async def ingest_document(
     doc_type: str,
     language: Language,
     metadata: Optional[dict] = None,
-    db: Session = Depends(get_db)
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Ingest a document into the RAG system.
@@ -193,13 +581,12 @@ async def ingest_document(
         doc_type: Type of document (FAQ, policy, etc.)
         language: Language of the document
         metadata: Optional metadata
-        db: Database session
+        rag_service: RAG service bound to the request's database session
         
     Returns:
         Ingested document
     """
     try:
-        rag_service = RAGService(db)
         document = await rag_service.ingest_document(
             title=title,
             content=content,
@@ -213,33 +600,203 @@ async def ingest_document(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/ingest-documents")
+async def ingest_documents(
+    request: BulkIngestRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Ingest a list of documents in batches.
+    
+    Args:
+        request: Documents to ingest and optional batch size
+        rag_service: RAG service bound to the request's database session
+        
+    Returns:
+        Ingestion stats including throughput in docs/sec; on a failed batch
+        a 500 whose detail holds the same stats with ingested/failed counts
+    """
+    try:
+        stats = await rag_service.ingest_documents(
+            [doc.dict() for doc in request.documents],
+            batch_size=request.batch_size
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if stats["error"] is not None:
+        raise HTTPException(status_code=500, detail=stats)
+    return stats
+
+@app.post("/api/v1/ingest-documents/upload")
+async def ingest_documents_upload(
+    file: UploadFile = File(...),
+    batch_size: Optional[int] = None,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Ingest documents from a JSONL upload, one document object per line.
+    
+    Args:
+        file: JSONL file of documents
+        batch_size: Optional number of documents per batch
+        rag_service: RAG service bound to the request's database session
+        
+    Returns:
+        Ingestion stats including throughput in docs/sec; on a failed batch
+        a 500 whose detail holds the same stats with ingested/failed counts
+    """
+    try:
+        documents = [
+            DocumentCreate(**json.loads(line)).dict()
+            for line in (await file.read()).decode("utf-8").splitlines()
+            if line.strip()
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSONL: {str(e)}")
+
+    try:
+        stats = await rag_service.ingest_documents(documents, batch_size=batch_size)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if stats["error"] is not None:
+        raise HTTPException(status_code=500, detail=stats)
+    return stats
+
 @app.get("/api/v1/documents")
 async def list_documents(
-    doc_type: Optional[str] = None,
+    doc_type: Optional[DocumentType] = None,
     language: Optional[Language] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    limit: int = Query(settings.DOCUMENTS_PAGE_SIZE, ge=1, le=settings.DOCUMENTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List documents in the RAG system.
+    List documents in the RAG system, newest first, one page at a time.
     
     Args:
         doc_type: Filter by document type
         language: Filter by language
+        fields: Comma-separated fields to return (default: everything but content)
+        limit: Page size
+        cursor: next_cursor from the previous page
         db: Database session
         
     Returns:
-        List of documents
+        The page of documents and the cursor of the next page (null on the last page)
     """
     try:
-        query = db.query(Document)
+        fields = parse_fields(fields)
+        documents, next_cursor = await document_page(
+            db, fields, doc_type, language, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {"documents": documents, "next_cursor": next_cursor}
+
+@app.get("/api/v1/documents/export")
+async def export_documents(
+    doc_type: Optional[DocumentType] = None,
+    language: Optional[Language] = None,
+    fields: Optional[str] = None
+):
+    """
+    Stream every matching document as JSON lines.
+    
+    Args:
+        doc_type: Filter by document type
+        language: Filter by language
+        fields: Comma-separated fields to return (default: all)
         
-        if doc_type:
-            query = query.filter(Document.doc_type == doc_type)
-        if language:
-            query = query.filter(Document.language == language)
-            
-        documents = query.all()
-        return documents
+    Returns:
+        Newline-delimited JSON, one document per line, readable by
+        /api/v1/ingest-documents/upload
+    """
+    try:
+        fields = parse_fields(fields, default=DOCUMENT_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        export_document_lines(
+            AsyncSessionLocal,
+            fields,
+            doc_type,
+            language,
+            batch_size=settings.DOCUMENTS_EXPORT_BATCH_SIZE
+        ),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="documents.jsonl"'}
+    )
+
+@app.put("/api/v1/documents/{document_id}")
+async def update_document(
+    document_id: int,
+    title: Optional[str] = None,
+    content: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    language: Optional[Language] = None,
+    metadata: Optional[dict] = None,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Update a document, re-embedding it in place if its content changed.
+    
+    Args:
+        document_id: ID of the document to update
+        title: New title
+        content: New content
+        doc_type: New document type
+        language: New language
+        metadata: New metadata
+        rag_service: RAG service bound to the request's database session
         
+    Returns:
+        Updated document
+    """
+    try:
+        document = await rag_service.update_document(
+            document_id,
+            title=title,
+            content=content,
+            doc_type=doc_type,
+            language=language,
+            metadata=metadata
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+@app.delete("/api/v1/documents/{document_id}")
+async def delete_document(
+    document_id: int,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Delete a document and remove its vector from the index.
+    
+    Args:
+        document_id: ID of the document to delete
+        rag_service: RAG service bound to the request's database session
+        
+    Returns:
+        Deletion status
+    """
+    try:
+        deleted = await rag_service.delete_document(document_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"deleted": document_id}
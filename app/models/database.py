@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Text, Enum, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import enum
 
@@ -51,10 +51,36 @@ class Document(Base):
     content = Column(Text)
     doc_type = Column(Enum(DocumentType))
     language = Column(Enum(Language))
-    embedding = Column(JSON)  # Store vector embeddings
     metadata = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Back filtered listings, which page newest first by (created_at, id)
+    __table_args__ = (
+        Index("ix_documents_doc_type_created_at", "doc_type", "created_at", "id"),
+        Index("ix_documents_language_created_at", "language", "created_at", "id"),
+    )
+    
+    chunks = relationship(
+        "DocumentChunk",
+        back_populates="document",
+        cascade="all, delete-orphan",
+        order_by="DocumentChunk.chunk_index"
+    )
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+    
+    id = Column(Integer, primary_key=True)  # Also the FAISS vector ID
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True)
+    chunk_index = Column(Integer)
+    content = Column(Text)
+    token_count = Column(Integer)
+    # Raw float32 vector; deferred so chunk and document queries never load it
+    embedding = deferred(Column(LargeBinary))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    document = relationship("Document", back_populates="chunks")
 
 class APILog(Base):
     __tablename__ = "api_logs"
@@ -0,0 +1,15 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+from app.models.database import DocumentType, Language
+
+class DocumentCreate(BaseModel):
+    title: str
+    content: str
+    doc_type: DocumentType
+    language: Language
+    metadata: Optional[Dict] = None
+
+class BulkIngestRequest(BaseModel):
+    documents: List[DocumentCreate]
+    batch_size: Optional[int] = None
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class AudioCache:
+    """
+    Content-addressed store of synthesised audio on disk.
+
+    Files are named by a hash of everything that determines the audio, so
+    identical requests share one file across restarts and across workers
+    pointing at the same directory. Total size is bounded by evicting the
+    least recently used files; recency is kept in file mtimes so it also
+    survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(
+        ssml: str,
+        voice_id: str,
+        speed: float,
+        pitch: float,
+        language: Optional[str]
+    ) -> str:
+        """Hash of the synthesis parameters."""
+        payload = json.dumps(
+            [ssml, voice_id, float(speed), float(pitch), language or ""],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.audio"
+
+    def _load(self) -> None:
+        """Index existing files, oldest use first."""
+        files = []
+        for path in self.directory.glob("*/*.audio"):
+            stat = path.stat()
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._size += size
+        if files:
+            logger.info(f"TTS cache holds {len(files)} files ({self._size} bytes)")
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Path of a cached file, marked as just used, or None on a miss."""
+        path = self.path(key)
+        try:
+            size = path.stat().st_size
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._size -= size
+                self.misses += 1
+            return None
+
+        with self._lock:
+            if key not in self._entries:
+                # Written by another worker sharing the directory
+                self._entries[key] = size
+                self._size += size
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return path
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached audio as bytes, or None on a miss."""
+        path = self.lookup(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            # Evicted by another worker since the lookup
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store audio atomically and evict old files past max_bytes."""
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self.path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self._size > self.max_bytes:
+                old_key, size = self._entries.popitem(last=False)
+                self._size -= size
+                self.evictions += 1
+                try:
+                    self.path(old_key).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "files": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
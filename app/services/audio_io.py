@@ -0,0 +1,88 @@
+import io
+import logging
+from typing import BinaryIO, Sequence, Tuple
+
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+def decode_audio(file: BinaryIO, block_frames: int = 65536) -> Tuple[np.ndarray, int]:
+    """
+    Decode an audio file to float32 mono, one block at a time.
+
+    The output array is allocated once from the frame count in the header
+    and each block is downmixed straight into it, so peak memory is the mono
+    result plus a single block rather than the raw bytes, a float64 copy
+    and a downmixed copy.
+
+    Args:
+        file: seekable binary file object (e.g. an UploadFile's spooled file)
+        block_frames: frames decoded per block
+
+    Returns:
+        Tuple of (float32 mono samples, sample_rate)
+    """
+    try:
+        sound = sf.SoundFile(file)
+    except Exception as e:
+        raise ValueError(f"Unsupported or corrupt audio: {str(e)}")
+
+    with sound:
+        if not sound.seekable() or sound.frames <= 0:
+            # Length unknown up front; fall back to collecting blocks
+            blocks = [
+                block.mean(axis=1, dtype=np.float32)
+                for block in sound.blocks(block_frames, dtype="float32", always_2d=True)
+            ]
+            audio = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+            return audio, sound.samplerate
+
+        audio = np.empty(sound.frames, dtype=np.float32)
+        block = np.empty((min(block_frames, sound.frames), sound.channels), dtype=np.float32)
+        position = 0
+        while position < sound.frames:
+            read = sound.read(out=block, dtype="float32", always_2d=True)
+            if not len(read):
+                break
+            if sound.channels == 1:
+                audio[position:position + len(read)] = read[:, 0]
+            else:
+                np.mean(read, axis=1, out=audio[position:position + len(read)])
+            position += len(read)
+
+        if position < sound.frames:
+            logger.warning(f"Audio ended after {position} of {sound.frames} frames")
+            audio = audio[:position]
+        return audio, sound.samplerate
+
+def join_audio(parts: Sequence[bytes]) -> bytes:
+    """
+    Concatenate audio files into one WAV file.
+
+    Used to store the sentence-by-sentence audio of a streamed answer as a
+    single object. All parts must have the same sample rate and channels;
+    the first part's sample format is kept.
+
+    Raises:
+        ValueError: if a part cannot be decoded or the parts do not match
+    """
+    if len(parts) == 1:
+        return parts[0]
+
+    clips = []
+    for part in parts:
+        try:
+            with sf.SoundFile(io.BytesIO(part)) as sound:
+                clips.append(sound.read(dtype="float32", always_2d=True))
+                layout = (sound.samplerate, sound.channels, sound.subtype)
+        except Exception as e:
+            raise ValueError(f"Unsupported or corrupt audio: {str(e)}")
+        if len(clips) == 1:
+            sample_rate, channels, subtype = layout
+        elif layout[:2] != (sample_rate, channels):
+            raise ValueError(f"Cannot join {layout[:2]} audio to {(sample_rate, channels)}")
+
+    output = io.BytesIO()
+    sf.write(output, np.concatenate(clips), sample_rate, format="WAV", subtype=subtype)
+    return output.getvalue()
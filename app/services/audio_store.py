@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUDIO_ID = re.compile(r"^[0-9a-f]{64}$")
+
+class AudioStore:
+    """
+    Object-style local storage for generated audio.
+
+    Objects are immutable and named by the sha256 of their bytes, so the
+    same answer audio is written once, the ID doubles as a strong ETag and
+    clients may cache a URL forever.
+
+    Retention is bounded like AudioCache: objects older than ttl seconds
+    are no longer served and are deleted, and the oldest objects are
+    deleted once the store grows past max_bytes. Storing audio that is
+    already present renews it, and ages are kept in file mtimes so they
+    survive restarts.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        url_prefix: str = "/api/v1/audio",
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.url_prefix = url_prefix
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def path(self, audio_id: str) -> Path:
+        return self.directory / audio_id[:2] / f"{audio_id}.wav"
+
+    def url(self, audio_id: str) -> str:
+        return f"{self.url_prefix}/{audio_id}"
+
+    def _load(self) -> None:
+        """Index existing objects, oldest first."""
+        files = []
+        for path in self.directory.glob("*/*.wav"):
+            stat = path.stat()
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for mtime, audio_id, size in sorted(files):
+            self._entries[audio_id] = (size, mtime)
+            self._size += size
+        if files:
+            logger.info(f"Audio store holds {len(files)} objects ({self._size} bytes)")
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.ttl is not None and now - mtime > self.ttl
+
+    def put(self, data: bytes) -> str:
+        """Persist audio (if not already stored) and return its ID."""
+        audio_id = hashlib.sha256(data).hexdigest()
+        path = self.path(audio_id)
+        if path.exists():
+            os.utime(path)
+        else:
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            size, _ = self._entries.pop(audio_id, (0, now))
+            self._size += len(data) - size
+            self._entries[audio_id] = (len(data), now)
+            self._evict(now)
+        return audio_id
+
+    def _evict(self, now: float) -> None:
+        """Delete expired objects, then the oldest while over max_bytes."""
+        while len(self._entries) > 1:
+            old_id, (size, mtime) = next(iter(self._entries.items()))
+            over_size = self.max_bytes is not None and self._size > self.max_bytes
+            if not over_size and not self._expired(mtime, now):
+                break
+            del self._entries[old_id]
+            self._size -= size
+            self.evictions += 1
+            try:
+                self.path(old_id).unlink()
+            except FileNotFoundError:
+                pass
+
+    def find(self, audio_id: str) -> Optional[Path]:
+        """Path of a stored object, or None for unknown, expired or malformed IDs."""
+        if not AUDIO_ID.match(audio_id):
+            return None
+        path = self.path(audio_id)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        return None if self._expired(mtime, time.time()) else path
+
+    def find_url(self, url: str) -> Optional[Path]:
+        """find() for a URL made by url(); None for any other URL."""
+        prefix = f"{self.url_prefix}/"
+        if not url.startswith(prefix):
+            return None
+        return self.find(url[len(prefix):])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "objects": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into batches.
+
+    Items submitted under the same key are collected until either
+    max_batch_size items are waiting or max_wait seconds have passed since
+    the first one arrived, then handed to process_batch together. Each
+    caller gets back the result at its own position in the batch.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        max_wait: float
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queues: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any, key: Optional[Hashable] = None) -> Any:
+        """Queue an item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._queues.setdefault(key, [])
+        queue.append((item, future))
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(key)
+        elif len(queue) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._queues.pop(key, None)
+        if not pending:
+            return
+
+        task = asyncio.ensure_future(self._run(key, pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, pending: List[Tuple[Any, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(pending)
+        try:
+            results = await self.process_batch(key, [item for item, _ in pending])
+            if len(results) != len(pending):
+                raise RuntimeError(
+                    f"Batch returned {len(results)} results for {len(pending)} items"
+                )
+        except Exception as e:
+            logger.error(f"Error processing batch of {len(pending)}: {str(e)}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
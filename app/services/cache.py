@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries also expire after ttl seconds.
+
+    Keeps hit/miss/eviction counters so the cache can be sized from live traffic.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = (value, self.clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+def create_redis_client(url: Optional[str] = None):
+    """Connect to Redis at REDIS_URL; redis is an optional dependency."""
+    import redis
+
+    return redis.Redis.from_url(url or settings.REDIS_URL)
+
+def normalize_query(text: str) -> str:
+    """Normalise a query so trivially different spellings share a cache entry."""
+    text = unicodedata.normalize("NFC", text).casefold()
+    return re.sub(r"\s+", " ", text).strip(" ?!.।")
+
+class EmbeddingCache:
+    """
+    Cache of query embeddings keyed by normalised text.
+
+    Lookups go to an in-process TTLCache first and, when a Redis client is
+    given, to Redis second so warm entries are shared across workers.
+    Redis calls block, so async callers run get_or_compute in the
+    threadpool.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: int,
+        redis_client=None,
+        namespace: str = "emb"
+    ):
+        self.local = TTLCache(max_size, ttl)
+        self.redis = redis_client
+        self.ttl = ttl
+        self.namespace = namespace
+        self.redis_hits = 0
+
+    def _redis_key(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    def get_or_compute(
+        self,
+        text: str,
+        compute: Callable[[str], np.ndarray]
+    ) -> np.ndarray:
+        """Return the cached embedding for text, computing it on a miss."""
+        key = normalize_query(text)
+        embedding = self.local.get(key)
+        if embedding is not None:
+            return embedding
+
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"Redis embedding cache unavailable: {str(e)}")
+                raw = None
+            if raw is not None:
+                self.redis_hits += 1
+                embedding = np.frombuffer(raw, dtype=np.float32)
+                self.local.set(key, embedding)
+                return embedding
+
+        embedding = np.asarray(compute(key), dtype=np.float32)
+        # Shared between callers, so make accidental in-place edits fail loudly
+        embedding.setflags(write=False)
+        self.local.set(key, embedding)
+        if self.redis is not None:
+            try:
+                self.redis.set(self._redis_key(key), embedding.tobytes(), ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"Redis embedding cache unavailable: {str(e)}")
+        return embedding
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.local.stats()
+        stats["redis_hits"] = self.redis_hits
+        return stats
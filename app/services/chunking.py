@@ -0,0 +1,90 @@
+import re
+from typing import Callable, List, Optional
+
+# Sentence ends: Latin terminators followed by whitespace, the Devanagari
+# danda/double danda (often written without a trailing space) and newlines.
+SENTENCE_BOUNDARY = re.compile(r"(?<=[।॥])\s*|(?<=[.!?])\s+|\s*\n+\s*")
+
+def split_sentences(text: str) -> List[str]:
+    """Split Hindi/English text into sentences."""
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+def whitespace_token_count(text: str) -> int:
+    """Fallback token counter used when no model tokenizer is available."""
+    return len(text.split())
+
+class TextSplitter:
+    """
+    Token-aware splitter that packs whole sentences into overlapping chunks.
+
+    Sentences longer than chunk_size are broken on word boundaries; each
+    chunk after the first repeats up to chunk_overlap tokens of trailing
+    sentences from the previous chunk.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int = 0,
+        length_function: Optional[Callable[[str], int]] = None
+    ):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be in [0, chunk_size)")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_function = length_function or whitespace_token_count
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks of at most chunk_size tokens."""
+        units = []
+        for sentence in split_sentences(text):
+            length = self.length_function(sentence)
+            if length > self.chunk_size:
+                units.extend(self._split_long_sentence(sentence))
+            else:
+                units.append((sentence, length))
+
+        chunks = []
+        current: List[tuple] = []
+        current_length = 0
+        for unit, length in units:
+            if current and current_length + length > self.chunk_size:
+                chunks.append(" ".join(u for u, _ in current))
+                current, current_length = self._overlap_tail(current, length)
+            current.append((unit, length))
+            current_length += length
+
+        if current:
+            chunks.append(" ".join(u for u, _ in current))
+        return chunks
+
+    def _overlap_tail(self, units: List[tuple], next_length: int):
+        """Trailing units to repeat at the start of the next chunk."""
+        budget = min(self.chunk_overlap, self.chunk_size - next_length)
+        tail = []
+        length = 0
+        for unit, unit_length in reversed(units):
+            if length + unit_length > budget:
+                break
+            tail.insert(0, (unit, unit_length))
+            length += unit_length
+        return tail, length
+
+    def _split_long_sentence(self, sentence: str) -> List[tuple]:
+        """Break an oversized sentence into word runs of at most chunk_size tokens."""
+        pieces = []
+        words: List[str] = []
+        length = 0
+        for word in sentence.split():
+            word_length = max(self.length_function(word), 1)
+            if words and length + word_length > self.chunk_size:
+                pieces.append((" ".join(words), length))
+                words, length = [], 0
+            words.append(word)
+            length += word_length
+        if words:
+            pieces.append((" ".join(words), length))
+        return pieces
@@ -0,0 +1,446 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.models.database import Conversation, Language, Message
+from app.services.prompt import update_summary
+
+logger = logging.getLogger(__name__)
+
+class ConversationHistory:
+    """
+    Recent turns per session, persisted to Message with write-behind.
+
+    The last max_turns turns of each session live in a ring buffer (in
+    process, or in Redis when a client is given so workers share it), so
+    building a prompt never waits on the database. Turns pushed out of the
+    buffer are folded into a rolling per-session summary. New messages are
+    appended to a journal file and queued; a background task writes them to
+    the database in batches and then trims the journal. Each instance has a
+    journal of its own next to journal_path, so workers never trim each
+    other's messages; journals left by a crash or restart are replayed by
+    the next start(). Delivery is at-least-once: a crash between commit and
+    journal trim replays that batch.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        journal_path: str,
+        max_turns: int = 10,
+        max_sessions: int = 10000,
+        flush_interval: float = 1.0,
+        batch_size: int = 100,
+        redis_client=None,
+        redis_ttl: int = 3600,
+        summary_max_tokens: int = 200
+    ):
+        self.session_factory = session_factory
+        self.journal_path = journal_path
+        base, ext = os.path.splitext(journal_path)
+        self.worker_journal_path = f"{base}.{uuid.uuid4().hex}{ext}"
+        self.max_messages = 2 * max_turns
+        self.max_sessions = max_sessions
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.redis = redis_client
+        self.redis_ttl = redis_ttl
+        self.summary_max_tokens = summary_max_tokens
+        self.flushed = 0
+        self.flushes = 0
+        self._recent: "OrderedDict[str, Deque[Dict]]" = OrderedDict()
+        self._summaries: Dict[str, str] = {}
+        self._pending: List[Dict] = []
+        self._lock = asyncio.Lock()
+        # Guards the journal, _pending and the buffer across threadpool calls
+        self._state_lock = threading.Lock()
+        self._journal_lock_file = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # Ring buffer
+
+    def _redis_key(self, session_id: str) -> str:
+        return f"history:{session_id}"
+
+    def _cached(self, session_id: str) -> Optional[List[Dict]]:
+        if self.redis is not None:
+            try:
+                key = self._redis_key(session_id)
+                if self.redis.exists(key):
+                    return [json.loads(item) for item in self.redis.lrange(key, 0, -1)]
+                return None
+            except Exception as e:
+                logger.warning(f"Redis history unavailable: {str(e)}")
+
+        with self._state_lock:
+            recent = self._recent.get(session_id)
+            if recent is None:
+                return None
+            self._recent.move_to_end(session_id)
+            return list(recent)
+
+    def _push(self, session_id: str, messages: List[Dict], replace: bool = False) -> None:
+        if self.redis is not None:
+            try:
+                key = self._redis_key(session_id)
+                existing = 0 if replace else self.redis.llen(key)
+                overflow = existing + len(messages) - self.max_messages
+                if overflow > 0:
+                    evicted = [
+                        json.loads(item)
+                        for item in self.redis.lrange(key, 0, min(overflow, existing) - 1)
+                    ] if existing else []
+                    evicted += messages[:max(overflow - existing, 0)]
+                    self._summarise(session_id, evicted)
+                
+                pipe = self.redis.pipeline()
+                if replace:
+                    pipe.delete(key)
+                if messages:
+                    pipe.rpush(key, *[json.dumps(m, ensure_ascii=False) for m in messages])
+                    pipe.ltrim(key, -self.max_messages, -1)
+                pipe.expire(key, self.redis_ttl)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Redis history unavailable: {str(e)}")
+
+        recent = self._recent.get(session_id)
+        if recent is None or replace:
+            recent = deque(maxlen=self.max_messages)
+            self._recent[session_id] = recent
+        overflow = len(recent) + len(messages) - self.max_messages
+        if overflow > 0:
+            self._summarise(session_id, (list(recent) + messages)[:overflow])
+        recent.extend(messages)
+        self._recent.move_to_end(session_id)
+        while len(self._recent) > self.max_sessions:
+            evicted_session, _ = self._recent.popitem(last=False)
+            self._summaries.pop(evicted_session, None)
+
+    def _summarise(self, session_id: str, messages: List[Dict]) -> None:
+        """Fold turns leaving the buffer into the session's rolling summary."""
+        summary = update_summary(self._summary(session_id), messages, self.summary_max_tokens)
+        if self.redis is not None:
+            try:
+                self.redis.set(
+                    f"history-summary:{session_id}", summary.encode("utf-8"), ex=self.redis_ttl
+                )
+                return
+            except Exception as e:
+                logger.warning(f"Redis history unavailable: {str(e)}")
+        self._summaries[session_id] = summary
+
+    async def summary(self, session_id: str) -> str:
+        """Rolling summary of turns older than the recent-turn window."""
+        if self.redis is not None:
+            return await run_in_threadpool(self._summary, session_id)
+        return self._summary(session_id)
+
+    def _summary(self, session_id: str) -> str:
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(f"history-summary:{session_id}")
+                return raw.decode("utf-8") if raw else ""
+            except Exception as e:
+                logger.warning(f"Redis history unavailable: {str(e)}")
+        return self._summaries.get(session_id, "")
+
+    async def recent(self, session_id: str) -> List[Dict]:
+        """
+        Last turns of a session, oldest first.
+
+        Only a session not seen since this process started (or evicted from
+        the buffer) is loaded from the database. Redis round trips run in
+        the threadpool like the database ones.
+        """
+        if self.redis is not None:
+            cached = await run_in_threadpool(self._cached, session_id)
+        else:
+            cached = self._cached(session_id)
+        if cached is not None:
+            return cached
+
+        # Hold the flush lock so no message is between the journal and the DB
+        async with self._lock:
+            return await run_in_threadpool(self._reload, session_id)
+
+    def _reload(self, session_id: str) -> List[Dict]:
+        messages = self._load_recent(session_id)
+        with self._state_lock:
+            messages += [m for m in self._pending if m["session_id"] == session_id]
+            # Turns just beyond the window seed the rolling summary
+            older, messages = messages[:-self.max_messages], messages[-self.max_messages:]
+            if older:
+                self._summarise(session_id, older)
+            self._push(session_id, messages, replace=True)
+        return messages
+
+    def _load_recent(self, session_id: str) -> List[Dict]:
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(Message)
+                .join(Conversation)
+                .filter(Conversation.session_id == session_id)
+                .order_by(Message.created_at.desc(), Message.id.desc())
+                .limit(2 * self.max_messages)
+                .all()
+            )
+            return [
+                {
+                    "session_id": session_id,
+                    "role": row.role,
+                    "content": row.content,
+                    "audio_url": row.audio_url,
+                    "created_at": row.created_at.isoformat() if row.created_at else None
+                }
+                for row in reversed(rows)
+            ]
+        finally:
+            db.close()
+
+    # Write-behind
+
+    async def record_turn(
+        self,
+        session_id: str,
+        language: Optional[Language],
+        user_text: str,
+        assistant_text: str,
+        audio_url: Optional[str] = None
+    ) -> None:
+        """Add a user message and the assistant's reply to the session."""
+        now = datetime.utcnow().isoformat()
+        language_value = language.value if language else None
+        messages = [
+            {
+                "session_id": session_id,
+                "language": language_value,
+                "role": "user",
+                "content": user_text,
+                "audio_url": None,
+                "created_at": now
+            },
+            {
+                "session_id": session_id,
+                "language": language_value,
+                "role": "assistant",
+                "content": assistant_text,
+                "audio_url": audio_url,
+                "created_at": now
+            }
+        ]
+        # Journal and Redis writes stay off the event loop
+        await run_in_threadpool(self._record, session_id, messages)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _record(self, session_id: str, messages: List[Dict]) -> None:
+        with self._state_lock:
+            self._append_journal(messages)
+            self._pending.extend(messages)
+            self._push(session_id, messages)
+
+    def _append_journal(self, messages: List[Dict]) -> None:
+        with open(self.worker_journal_path, "a", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps(message, ensure_ascii=False) + "\n")
+
+    def _rewrite_journal(self) -> None:
+        if not self._pending:
+            open(self.worker_journal_path, "w").close()
+            return
+        tmp_path = f"{self.worker_journal_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for message in self._pending:
+                f.write(json.dumps(message, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.worker_journal_path)
+
+    def _trim_journal(self, count: int) -> None:
+        """Drop the first count pending messages once they are in the database."""
+        with self._state_lock:
+            del self._pending[:count]
+            self._rewrite_journal()
+
+    def _read_journal(self, path: str) -> List[Dict]:
+        messages = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        messages.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write
+                        logger.warning("Skipping corrupt conversation journal line")
+        except FileNotFoundError:
+            pass
+        return messages
+
+    def _claim_journals(self) -> None:
+        """
+        Lock this instance's journal and adopt those of stopped workers.
+
+        A running instance holds an exclusive lock on <journal>.lock, so a
+        journal whose lock can be taken was left by a worker that exited
+        (or by an older version, for journal_path itself). Its messages are
+        moved into this instance's journal and the file is removed.
+        """
+        self._journal_lock_file = open(f"{self.worker_journal_path}.lock", "a")
+        fcntl.flock(self._journal_lock_file, fcntl.LOCK_EX)
+
+        base, ext = os.path.splitext(self.journal_path)
+        paths = [self.journal_path] + sorted(glob.glob(f"{glob.escape(base)}.*{ext}"))
+        adopted = []
+        for path in paths:
+            if path == self.worker_journal_path:
+                continue
+            lock_file = open(f"{path}.lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()  # owner is still running
+                continue
+            if os.fstat(lock_file.fileno()).st_nlink == 0:
+                lock_file.close()  # just adopted by another worker
+                continue
+            adopted.append((path, lock_file))
+
+        with self._state_lock:
+            for path, _ in adopted:
+                self._pending.extend(self._read_journal(path))
+            if adopted:
+                self._rewrite_journal()
+        # Remove the journal before its lock so nobody replays it twice
+        for path, lock_file in adopted:
+            for stale in (path, lock_file.name):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            lock_file.close()
+
+    def _release_journal(self) -> None:
+        """Remove this instance's journal if empty, else leave it for adoption."""
+        if self._journal_lock_file is None:
+            return
+        with self._state_lock:
+            if not self._pending:
+                for path in (self.worker_journal_path, self._journal_lock_file.name):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        self._journal_lock_file.close()
+        self._journal_lock_file = None
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        """Insert a batch of messages, creating conversations as needed."""
+        db = self.session_factory()
+        try:
+            session_ids = {m["session_id"] for m in batch}
+            conversations = {
+                conversation.session_id: conversation
+                for conversation in db.query(Conversation)
+                .filter(Conversation.session_id.in_(session_ids))
+            }
+            for message in batch:
+                if message["session_id"] not in conversations:
+                    language = message.get("language")
+                    conversation = Conversation(
+                        session_id=message["session_id"],
+                        language=Language(language) if language else Language.MIXED
+                    )
+                    db.add(conversation)
+                    conversations[message["session_id"]] = conversation
+            db.flush()
+
+            db.add_all([
+                Message(
+                    conversation_id=conversations[m["session_id"]].id,
+                    role=m["role"],
+                    content=m["content"],
+                    audio_url=m["audio_url"],
+                    created_at=datetime.fromisoformat(m["created_at"])
+                )
+                for m in batch
+            ])
+            for message in batch:
+                conversations[message["session_id"]].updated_at = datetime.fromisoformat(
+                    message["created_at"]
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def flush(self) -> int:
+        """Write pending messages to the database; returns how many were written."""
+        async with self._lock:
+            written = 0
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                await run_in_threadpool(self._write_batch, batch)
+                await run_in_threadpool(self._trim_journal, len(batch))
+                written += len(batch)
+                self.flushes += 1
+            self.flushed += written
+            return written
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Messages stay pending and journaled; retried next round
+                logger.error(f"Error flushing conversation history: {str(e)}")
+
+    async def start(self) -> None:
+        """Replay messages journaled before a restart and start flushing."""
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        await run_in_threadpool(self._claim_journals)
+        if self._pending:
+            logger.info(f"Replaying {len(self._pending)} journaled messages")
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the background task and flush what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing conversation history: {str(e)}")
+        self._release_journal()
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._recent),
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "flushes": self.flushes
+        }
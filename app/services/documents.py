@@ -0,0 +1,121 @@
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import Document, DocumentType, Language
+
+DOCUMENT_FIELDS = (
+    "id", "title", "content", "doc_type", "language", "metadata", "created_at", "updated_at"
+)
+# Listings are metadata-only unless content is asked for
+DEFAULT_FIELDS = tuple(field for field in DOCUMENT_FIELDS if field != "content")
+
+def parse_fields(fields: Optional[str], default: Sequence[str] = DEFAULT_FIELDS) -> List[str]:
+    """Parse a comma-separated field list, rejecting unknown fields."""
+    if not fields:
+        return list(default)
+    requested = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = set(requested) - set(DOCUMENT_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}; "
+            f"expected any of {', '.join(DOCUMENT_FIELDS)}"
+        )
+    return requested
+
+def encode_cursor(created_at: datetime, document_id: int) -> str:
+    """Opaque cursor for the position after the given row."""
+    raw = json.dumps([created_at.isoformat(), document_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        created_at, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(document_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+async def document_page(
+    db: AsyncSession,
+    fields: Sequence[str] = DEFAULT_FIELDS,
+    doc_type: Optional[DocumentType] = None,
+    language: Optional[Language] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of documents, newest first.
+
+    Only the requested columns are selected, and pages are fetched by
+    keyset on (created_at, id) rather than OFFSET, so every page costs the
+    same index range scan however deep it is.
+
+    Args:
+        db: database session
+        fields: columns to return
+        doc_type: optional document type filter
+        language: optional language filter
+        limit: page size
+        cursor: next_cursor of the previous page
+
+    Returns:
+        (rows as dicts, cursor of the next page or None on the last page)
+    """
+    table = Document.__table__
+    statement = select(
+        *[table.c[field] for field in fields],
+        table.c.created_at.label("_created_at"),
+        table.c.id.label("_id")
+    )
+    if doc_type is not None:
+        statement = statement.where(table.c.doc_type == doc_type)
+    if language is not None:
+        statement = statement.where(table.c.language == language)
+    if cursor:
+        created_at, document_id = decode_cursor(cursor)
+        statement = statement.where(or_(
+            table.c.created_at < created_at,
+            and_(table.c.created_at == created_at, table.c.id < document_id)
+        ))
+    statement = statement.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(statement)).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["_created_at"], rows[-1]["_id"])
+    return [{field: row[field] for field in fields} for row in rows], next_cursor
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+async def export_document_lines(
+    session_factory: Callable[[], AsyncSession],
+    fields: Sequence[str] = DOCUMENT_FIELDS,
+    doc_type: Optional[DocumentType] = None,
+    language: Optional[Language] = None,
+    batch_size: int = 1000
+) -> AsyncIterator[str]:
+    """
+    Yield matching documents as JSON lines, newest first.
+
+    Each batch is one short keyset query on its own session, so no
+    connection or transaction is held while the client reads.
+    """
+    cursor = None
+    while True:
+        async with session_factory() as db:
+            rows, cursor = await document_page(
+                db, fields, doc_type, language, batch_size, cursor
+            )
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False, default=_json_default) + "\n"
+        if cursor is None:
+            return
@@ -0,0 +1,338 @@
+import array
+import math
+import os
+import re
+import tempfile
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Devanagari words (without the danda punctuation) or Latin/digit runs
+WORD = re.compile(r"[\u0900-\u0963\u0966-\u097f]+|[a-z0-9]+")
+JOINERS = re.compile(r"[\u200c\u200d]")
+
+CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "ळ": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+VOWEL_SIGNS = {
+    "ा": "aa", "ि": "i", "ी": "ii", "ु": "u", "ू": "uu", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॅ": "e", "ॉ": "o",
+}
+OTHERS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ii", "उ": "u", "ऊ": "uu", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऍ": "e", "ऑ": "o",
+    "ं": "n", "ँ": "n", "ः": "h",
+    **{chr(0x0966 + digit): str(digit) for digit in range(10)},
+}
+VIRAMA = "्"
+NUKTA = "़"
+
+# Spelling variants of romanised Hindi folded onto one form
+FOLDS = (("ee", "i"), ("oo", "u"), ("w", "v"), ("z", "j"), ("f", "ph"), ("q", "k"))
+DOUBLED_ASPIRATES = re.compile(r"(ch|kh|gh|th|dh|ph|bh|jh|sh)\1")
+REPEATS = re.compile(r"(.)\1+")
+
+def transliterate(word: str) -> str:
+    """Romanise a Devanagari word, keeping each consonant's inherent 'a'."""
+    out = []
+    inherent = False
+    for char in word:
+        if char in CONSONANTS:
+            if inherent:
+                out.append("a")
+            out.append(CONSONANTS[char])
+            inherent = True
+        elif char in VOWEL_SIGNS:
+            out.append(VOWEL_SIGNS[char])
+            inherent = False
+        elif char == VIRAMA:
+            inherent = False
+        elif char == NUKTA:
+            continue
+        else:
+            if inherent:
+                out.append("a")
+                inherent = False
+            out.append(OTHERS.get(char, ""))
+    if inherent:
+        out.append("a")
+    return "".join(out)
+
+@lru_cache(maxsize=100000)
+def normalize_term(word: str) -> str:
+    """
+    Map a Devanagari or romanised word to its index term.
+
+    Both scripts end up as the same lowercase Latin skeleton: Devanagari is
+    romanised, spelling variants (ee/i, oo/u, w/v, z/j, f/ph, doubled
+    letters) are folded and every 'a' after the first letter is dropped, so
+    "कमरा" and "kamra" or "अच्छा" and "accha" meet despite schwa deletion
+    and loose spelling. English words are folded the same way,
+    which only ever merges words differing in their 'a's.
+    """
+    if word[0] >= "\u0900":
+        word = transliterate(word)
+    if word.isdigit():
+        return word
+    for variant, folded in FOLDS:
+        word = word.replace(variant, folded)
+    word = DOUBLED_ASPIRATES.sub(r"\1", word)
+    word = REPEATS.sub(r"\1", word)
+    return word[:1] + word[1:].replace("a", "")
+
+def tokenize(text: str) -> List[str]:
+    """Split Hindi, English or code-mixed text into index terms."""
+    text = JOINERS.sub("", unicodedata.normalize("NFC", text.lower()))
+    return [term for term in map(normalize_term, WORD.findall(text)) if term]
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[int]], k: int = 60) -> List[int]:
+    """
+    Merge ranked ID lists by reciprocal rank fusion.
+
+    Each ID scores sum(1 / (k + rank)) over the lists it appears in, so IDs
+    ranked well by several retrievers rise without comparing their raw
+    scores. Ties keep the order of first appearance.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda item: -scores[item])
+
+class LexicalIndex:
+    """
+    BM25 inverted index over chunk texts keyed by chunk ID.
+
+    Each term's postings are two typed arrays, IDs (int64) and term
+    frequencies (uint16): 10 bytes per posting, appended to in place on
+    ingest and scored as zero-copy numpy views. Document lengths and
+    liveness are arrays indexed by ID. Removed IDs are masked out at query
+    time and purged from the postings by compact(), which runs once they
+    make up a quarter of the indexed documents.
+
+    Not thread-safe; the retrieval engine serialises access.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array.array, array.array]] = {}
+        self._lengths = np.zeros(0, dtype=np.uint32)
+        self._live = np.zeros(0, dtype=bool)
+        # Removed since the last compaction; their postings are still stored
+        self._removed = np.zeros(0, dtype=bool)
+        self.removed = 0
+        self.documents = 0
+        self.total_length = 0
+
+    @property
+    def terms(self) -> int:
+        return len(self._postings)
+
+    @property
+    def postings(self) -> int:
+        return sum(len(ids) for ids, _ in self._postings.values())
+
+    def ids(self) -> np.ndarray:
+        """Return the live IDs held by the index."""
+        return np.flatnonzero(self._live).astype(np.int64)
+
+    def _grow(self, size: int) -> None:
+        if size <= len(self._live):
+            return
+        size = max(size, 2 * len(self._live))
+        for name in ("_lengths", "_live", "_removed"):
+            current = getattr(self, name)
+            grown = np.zeros(size, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def add(self, ids: Sequence[int], texts: Sequence[str]) -> None:
+        """Index texts under the given IDs."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        self._grow(int(ids.max()) + 1)
+        # Re-used IDs must not inherit postings left behind by remove()
+        self.remove(ids[self._live[ids]])
+        if self._removed[ids].any():
+            self.compact()
+
+        for chunk_id, text in zip(ids.tolist(), texts):
+            counts = Counter(tokenize(text))
+            for term, frequency in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array.array("q"), array.array("H"))
+                postings[0].append(chunk_id)
+                postings[1].append(min(frequency, 65535))
+            length = sum(counts.values())
+            self._lengths[chunk_id] = length
+            self._live[chunk_id] = True
+            self.documents += 1
+            self.total_length += length
+
+    def remove(self, ids: Sequence[int]) -> int:
+        """Remove IDs; returns how many were indexed."""
+        ids = np.asarray(ids, dtype=np.int64)
+        ids = np.unique(ids[ids < len(self._live)])
+        ids = ids[self._live[ids]]
+        if not len(ids):
+            return 0
+        self._live[ids] = False
+        self._removed[ids] = True
+        self.removed += len(ids)
+        self.documents -= len(ids)
+        self.total_length -= int(self._lengths[ids].sum())
+        self._lengths[ids] = 0
+        if self.removed > self.documents // 4:
+            self.compact()
+        return len(ids)
+
+    def compact(self) -> None:
+        """Drop postings of removed IDs and terms left without postings."""
+        for term in list(self._postings):
+            ids, frequencies = self._postings[term]
+            id_view = np.frombuffer(ids, dtype=np.int64)
+            keep = self._live[id_view]
+            if keep.all():
+                continue
+            if not keep.any():
+                del self._postings[term]
+                continue
+            kept_ids = array.array("q", id_view[keep].tobytes())
+            kept_frequencies = array.array(
+                "H", np.frombuffer(frequencies, dtype=np.uint16)[keep].tobytes()
+            )
+            self._postings[term] = (kept_ids, kept_frequencies)
+        self._removed[:] = False
+        self.removed = 0
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        allowed: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (scores, ids) of the top_k BM25 matches, best first.
+
+        Args:
+            query: query text, tokenised like the documents
+            top_k: number of results
+            allowed: optional boolean mask by ID; other IDs are skipped
+        """
+        empty = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        terms = set(tokenize(query))
+        if not terms or not self.documents or top_k <= 0:
+            return empty
+        if allowed is not None and not len(allowed):
+            return empty
+
+        average_length = self.total_length / self.documents or 1.0
+        found_ids = []
+        found_scores = []
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            ids = np.frombuffer(postings[0], dtype=np.int64)
+            frequencies = np.frombuffer(postings[1], dtype=np.uint16)
+            live = self._live[ids]
+            ids, frequencies = ids[live], frequencies[live].astype(np.float32)
+            df = len(ids)
+            if not df:
+                continue
+            if allowed is not None:
+                keep = (ids < len(allowed)) & allowed[np.minimum(ids, len(allowed) - 1)]
+                ids, frequencies = ids[keep], frequencies[keep]
+
+            idf = math.log(1.0 + (self.documents - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self._lengths[ids] / average_length)
+            found_ids.append(ids)
+            found_scores.append(idf * frequencies * (self.k1 + 1.0) / (frequencies + norm))
+
+        if not found_ids:
+            return empty
+        ids, inverse = np.unique(np.concatenate(found_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(found_scores)).astype(np.float32)
+        if len(ids) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            ids, scores = ids[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        return scores[order], ids[order]
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """
+        Copy the index into the flat arrays save() writes.
+
+        Removed IDs are kept as a mask rather than compacted away, so taking
+        a snapshot is a single pass over the postings.
+        """
+        terms = list(self._postings)
+        counts = np.array([len(self._postings[term][0]) for term in terms], dtype=np.int64)
+        ids = np.concatenate(
+            [np.frombuffer(self._postings[term][0], dtype=np.int64) for term in terms]
+        ) if terms else np.empty(0, dtype=np.int64)
+        frequencies = np.concatenate(
+            [np.frombuffer(self._postings[term][1], dtype=np.uint16) for term in terms]
+        ) if terms else np.empty(0, dtype=np.uint16)
+        return {
+            "terms": np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+            "counts": counts,
+            "ids": ids,
+            "frequencies": frequencies,
+            "lengths": self._lengths.copy(),
+            "live": self._live.copy(),
+            "removed": self._removed.copy(),
+            "params": np.array([self.k1, self.b])
+        }
+
+    @staticmethod
+    def write(path: str, arrays: Dict[str, np.ndarray]) -> None:
+        """Atomically write a snapshot as one .npz file."""
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def save(self, path: str) -> None:
+        """Persist the index atomically as one .npz file."""
+        self.write(path, self.snapshot())
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """Load an index written by save()."""
+        with np.load(path) as data:
+            k1, b = data["params"].tolist()
+            index = cls(k1, b)
+            raw_terms = data["terms"].tobytes().decode("utf-8")
+            terms = raw_terms.split("\n") if raw_terms else []
+            offsets = np.concatenate([[0], np.cumsum(data["counts"])])
+            ids, frequencies = data["ids"], data["frequencies"]
+            for term, start, end in zip(terms, offsets[:-1], offsets[1:]):
+                index._postings[term] = (
+                    array.array("q", ids[start:end].tobytes()),
+                    array.array("H", frequencies[start:end].tobytes())
+                )
+            index._lengths = data["lengths"].copy()
+            index._live = data["live"].copy()
+            # Files written before removals were persisted hold compacted postings
+            index._removed = (
+                data["removed"].copy() if "removed" in data.files
+                else np.zeros(len(index._live), dtype=bool)
+            )
+        index.removed = int(index._removed.sum())
+        index.documents = int(index._live.sum())
+        index.total_length = int(index._lengths.sum())
+        return index
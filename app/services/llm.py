@@ -0,0 +1,237 @@
+import asyncio
+import json
+import logging
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.chunking import split_sentences
+
+logger = logging.getLogger(__name__)
+
+class LLMBackend(ABC):
+    """
+    Text generation backend.
+
+    Subclasses implement stream(); complete() collects the stream.
+    """
+
+    @abstractmethod
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Yield the completion as it is generated, one text fragment at a time."""
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> str:
+        """Return the whole completion."""
+        return "".join([token async for token in self.stream(prompt, max_tokens, temperature)])
+
+    async def aclose(self) -> None:
+        """Release connections or models."""
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic CPU-only backend for development and tests.
+
+    Answers with the opening sentences of the prompt's context section (or
+    a fixed message when there is none), streamed word by word.
+    """
+
+    def __init__(self, sentences: int = 2, delay: float = 0.0):
+        self.sentences = sentences
+        self.delay = delay
+
+    def _answer(self, prompt: str) -> str:
+        match = re.search(r"Context:\n(.*?)(?:\n\n|$)", prompt, re.S)
+        if not match:
+            return "I could not find anything relevant to your question."
+        return " ".join(split_sentences(match.group(1))[:self.sentences])
+
+    async def stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        words = self._answer(prompt).split(" ")
+        if max_tokens:
+            words = words[:max_tokens]
+        for i, word in enumerate(words):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield word if i == 0 else f" {word}"
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Streaming client for an OpenAI-compatible /chat/completions endpoint.
+
+    Works with OpenAI itself and with local servers exposing the same API,
+    such as vLLM, llama.cpp's llama-server or Ollama.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.base_url = base_url
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use inside the event loop."""
+        if self._client is None or self._client.is_closed:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                transport=self._transport
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens or settings.LLM_MAX_TOKENS,
+            "temperature": settings.LLM_TEMPERATURE if temperature is None else temperature,
+            "stream": True
+        }
+        async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(f"LLM API error: {response.text}")
+
+            # Server-sent events: "data: {json}" lines, ending with "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                token = (choices[0].get("delta") or {}).get("content")
+                if token:
+                    yield token
+
+class LlamaCppBackend(LLMBackend):
+    """
+    In-process quantised model (GGUF) on CPU via llama-cpp-python.
+
+    llama-cpp-python is an optional dependency, imported when the model is
+    first used. Generation runs on a worker thread and tokens are handed
+    back to the event loop as they are produced.
+    """
+
+    def __init__(self, model_path: str, n_ctx: int = 4096, n_threads: int = 0):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads
+        self._model = None
+        # llama.cpp contexts are not thread-safe; one generation at a time
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            from llama_cpp import Llama
+
+            self._model = Llama(
+                model_path=self.model_path,
+                n_ctx=self.n_ctx,
+                n_threads=self.n_threads or None,
+                verbose=False
+            )
+        return self._model
+
+    async def stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        done = object()
+
+        def generate() -> None:
+            try:
+                with self._model_lock:
+                    for chunk in self.model.create_completion(
+                        prompt,
+                        max_tokens=max_tokens or settings.LLM_MAX_TOKENS,
+                        temperature=settings.LLM_TEMPERATURE if temperature is None else temperature,
+                        stream=True
+                    ):
+                        if cancelled.is_set():
+                            break
+                        loop.call_soon_threadsafe(queue.put_nowait, chunk["choices"][0]["text"])
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+
+        worker = loop.run_in_executor(None, generate)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if item:
+                    yield item
+        finally:
+            cancelled.set()
+            await worker
+
+def create_llm_backend() -> LLMBackend:
+    """Build the backend selected by LLM_BACKEND."""
+    if settings.LLM_BACKEND == "openai":
+        return OpenAICompatibleBackend(
+            settings.LLM_BASE_URL,
+            settings.LLM_MODEL,
+            api_key=settings.LLM_API_KEY or settings.OPENAI_API_KEY,
+            timeout=settings.LLM_TIMEOUT
+        )
+    if settings.LLM_BACKEND == "llama_cpp":
+        return LlamaCppBackend(
+            settings.LLM_MODEL_PATH,
+            n_ctx=settings.LLM_CONTEXT_SIZE,
+            n_threads=settings.LLM_THREADS
+        )
+    if settings.LLM_BACKEND == "stub":
+        return StubBackend()
+    raise ValueError(f"Unknown LLM_BACKEND {settings.LLM_BACKEND!r}")
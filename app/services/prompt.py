@@ -0,0 +1,291 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.models.database import Language
+from app.services.chunking import split_sentences, whitespace_token_count
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+# Longest excerpt of a single message kept in the rolling summary
+SUMMARY_LINE_TOKENS = 40
+
+def truncate_to_tokens(text: str, max_tokens: int, count_tokens: TokenCounter) -> str:
+    """Longest whole-word prefix of text within max_tokens."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+def update_summary(
+    summary: str,
+    messages: Sequence[Dict],
+    max_tokens: int,
+    count_tokens: TokenCounter = whitespace_token_count
+) -> str:
+    """
+    Fold messages into a rolling summary of earlier turns.
+
+    Each message contributes its opening sentence; once the summary is over
+    max_tokens the oldest lines are dropped. Extractive, so it is cheap
+    enough to run whenever turns leave the recent-history window.
+    """
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        sentences = split_sentences(message["content"])
+        if not sentences:
+            continue
+        excerpt = truncate_to_tokens(sentences[0], SUMMARY_LINE_TOKENS, count_tokens)
+        lines.append(f"{message['role']}: {excerpt}")
+
+    while lines and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+@dataclass
+class Prompt:
+    text: str
+    tokens: Dict[str, int]
+    truncated_chunks: int = 0
+    dropped_chunks: int = 0
+    summarised_messages: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens.values())
+
+@dataclass
+class PromptMetrics:
+    """Running token counts of built prompts."""
+
+    prompts: int = 0
+    max_tokens: int = 0
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    truncated_chunks: int = 0
+    dropped_chunks: int = 0
+    summarised_messages: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, prompt: Prompt) -> None:
+        with self._lock:
+            self.prompts += 1
+            self.max_tokens = max(self.max_tokens, prompt.total_tokens)
+            for section, tokens in prompt.tokens.items():
+                self.section_tokens[section] = self.section_tokens.get(section, 0) + tokens
+            self.truncated_chunks += prompt.truncated_chunks
+            self.dropped_chunks += prompt.dropped_chunks
+            self.summarised_messages += prompt.summarised_messages
+
+    def stats(self) -> Dict[str, Any]:
+        prompts = self.prompts or 1
+        total = sum(self.section_tokens.values())
+        return {
+            "prompts": self.prompts,
+            "avg_tokens": round(total / prompts, 1),
+            "max_tokens": self.max_tokens,
+            "avg_section_tokens": {
+                section: round(tokens / prompts, 1)
+                for section, tokens in self.section_tokens.items()
+            },
+            "truncated_chunks": self.truncated_chunks,
+            "dropped_chunks": self.dropped_chunks,
+            "summarised_messages": self.summarised_messages
+        }
+
+class PromptBuilder:
+    """
+    Assembles the LLM prompt within a fixed token budget.
+
+    The instructions and query are always included. Of what is left,
+    history_share goes to the conversation: the newest turns verbatim,
+    then a rolling summary of older turns in up to summary_max_tokens.
+    Whatever history does not use goes to the retrieved chunks, taken in
+    rank order; the first chunk that does not fit is truncated if at least
+    min_chunk_tokens remain and the rest are dropped. A section's header is
+    charged to its budget when the section is used, and the rendered text
+    is counted again and trimmed if it is still over max_tokens.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        count_tokens: Optional[TokenCounter] = None,
+        history_share: float = 0.3,
+        summary_max_tokens: int = 200,
+        min_chunk_tokens: int = 32
+    ):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or whitespace_token_count
+        self.history_share = history_share
+        self.summary_max_tokens = summary_max_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+        self.metrics = PromptMetrics()
+
+    @staticmethod
+    def _render(
+        context: Optional[str],
+        summary: Optional[str],
+        history: Optional[str],
+        query: str,
+        language: Optional[Language]
+    ) -> str:
+        """Prompt text; sections passed as None are left out."""
+        sections = []
+        if context is not None:
+            sections.append(f"Context:\n{context}")
+        if summary is not None:
+            sections.append(f"Summary of earlier conversation:\n{summary}")
+        if history is not None:
+            sections.append(f"Conversation History:\n{history}")
+        sections.append(f"Query: {query}")
+        sections.append(f"Language: {language.value if language else 'mixed'}")
+        sections.append("Generate a response:")
+        return "\n\n".join(sections)
+
+    def build(
+        self,
+        query: str,
+        chunks: Sequence[str],
+        history: Sequence[Dict],
+        summary: str = "",
+        language: Optional[Language] = None
+    ) -> Prompt:
+        """
+        Build a prompt from ranked chunk texts and history, oldest message first.
+        """
+        count = self.count_tokens
+        overhead = count(self._render(None, None, None, "", language))
+        # What an optional section's header and separator add when it is present
+        headers = {
+            "context": count(self._render("", None, None, "", language)) - overhead,
+            "summary": count(self._render(None, "", None, "", language)) - overhead,
+            "history": count(self._render(None, None, "", "", language)) - overhead
+        }
+        query = truncate_to_tokens(query, (self.max_tokens - overhead) // 2, count)
+        query_tokens = count(query)
+        remaining = max(self.max_tokens - overhead - query_tokens, 0)
+
+        # Newest turns verbatim, within the history share
+        history_budget = int(remaining * self.history_share)
+        lines: List[str] = []
+        history_tokens = 0
+        for message in reversed(history):
+            line = f"{message['role']}: {message['content']}"
+            tokens = count(line) + (0 if lines else headers["history"])
+            if history_tokens + tokens > history_budget:
+                break
+            lines.insert(0, line)
+            history_tokens += tokens
+
+        # Older turns only as summary
+        older = list(history[:len(history) - len(lines)])
+        if older:
+            summary = update_summary(summary, older, self.summary_max_tokens, count)
+        summary_budget = min(
+            self.summary_max_tokens, history_budget - history_tokens - headers["summary"]
+        )
+        summary_lines = summary.splitlines() if summary else []
+        while summary_lines and count("\n".join(summary_lines)) > summary_budget:
+            summary_lines.pop(0)
+        summary = "\n".join(summary_lines)
+        summary_tokens = count(summary) + headers["summary"] if summary else 0
+
+        # Ranked chunks in what is left
+        context_budget = remaining - history_tokens - summary_tokens
+        context_parts: List[str] = []
+        context_tokens = 0
+        truncated = dropped = 0
+        last_truncated = False
+        seen = set()
+        for chunk in chunks:
+            if chunk in seen:
+                continue
+            seen.add(chunk)
+            left = context_budget - context_tokens - (0 if context_parts else headers["context"])
+            tokens = count(chunk)
+            if tokens <= left:
+                context_parts.append(chunk)
+                context_tokens += tokens + (0 if len(context_parts) > 1 else headers["context"])
+                last_truncated = False
+            elif left >= self.min_chunk_tokens:
+                chunk = truncate_to_tokens(chunk, left, count)
+                context_parts.append(chunk)
+                context_tokens += count(chunk) + (0 if len(context_parts) > 1 else headers["context"])
+                truncated += 1
+                last_truncated = True
+            else:
+                dropped += 1
+
+        # Token counts need not add up across joins, so check the final text
+        # and trim context, then history, summary and query until it fits
+        while True:
+            text = self._render(
+                "\n".join(context_parts) if context_parts else None,
+                summary or None,
+                "\n".join(lines) if lines else None,
+                query,
+                language
+            )
+            excess = count(text) - self.max_tokens
+            if excess <= 0:
+                break
+            if context_parts:
+                chunk = context_parts.pop()
+                keep = count(chunk) - excess
+                if keep >= self.min_chunk_tokens:
+                    context_parts.append(truncate_to_tokens(chunk, keep, count))
+                    truncated += 0 if last_truncated else 1
+                    last_truncated = True
+                else:
+                    dropped += 1
+                    truncated -= 1 if last_truncated else 0
+                    last_truncated = False
+            elif lines:
+                lines.pop(0)
+            elif summary:
+                summary = ""
+            elif query:
+                query = truncate_to_tokens(query, count(query) - excess, count)
+            else:
+                break
+
+        sections = {
+            "query": count(query),
+            "history": count("\n".join(lines)) if lines else 0,
+            "summary": count(summary) if summary else 0,
+            "context": count("\n".join(context_parts)) if context_parts else 0
+        }
+        prompt = Prompt(
+            text=text,
+            # Headers and separators are counted as instructions
+            tokens={"instructions": count(text) - sum(sections.values()), **sections},
+            truncated_chunks=truncated,
+            dropped_chunks=dropped,
+            summarised_messages=len(older)
+        )
+        self.metrics.record(prompt)
+        return prompt
+
+def create_prompt_builder(count_tokens: Optional[TokenCounter] = None) -> PromptBuilder:
+    """PromptBuilder configured from settings."""
+    return PromptBuilder(
+        settings.PROMPT_MAX_TOKENS,
+        count_tokens=count_tokens,
+        history_share=settings.PROMPT_HISTORY_SHARE,
+        summary_max_tokens=settings.PROMPT_SUMMARY_MAX_TOKENS,
+        min_chunk_tokens=settings.PROMPT_MIN_CHUNK_TOKENS
+    )
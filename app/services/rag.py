@@ -1,30 +1,543 @@
-import faiss
+import fcntl
 import numpy as np
-from typing import List, Dict, Optional
+import os
+import threading
+import time
+from typing import AsyncIterator, Callable, List, Dict, Optional, Sequence, Tuple
 import logging
+from fastapi.concurrency import run_in_threadpool
 from sentence_transformers import SentenceTransformer
 from app.core.config import settings
-from app.models.database import Document, Language
-from sqlalchemy.orm import Session
+from app.models.database import Document, DocumentChunk, DocumentType, Language
+from app.services.cache import EmbeddingCache, create_redis_client
+from app.services.chunking import TextSplitter
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from app.services.llm import LLMBackend, create_llm_backend
+from app.services.prompt import PromptBuilder, create_prompt_builder
+from app.services.response_cache import SemanticResponseCache
+from app.services.vector_index import (
+    FLAT, IdFilter, VectorIndex, decode_embeddings, encode_embedding,
+    load_corpus_embeddings, min_training_size
+)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 logger = logging.getLogger(__name__)
 
-class RAGService:
-    def __init__(self, db: Session):
-        self.db = db
+# Chunk IDs per query when loading chunks missing from an index
+RECONCILE_BATCH_SIZE = 1000
+
+class RetrievalEngine:
+    """
+    Process-wide embedding model, chunk splitter, FAISS index and BM25 index.
+
+    Loaded once at application startup and shared by every request; the
+    request-scoped database session lives on RAGService instead. Both
+    indexes are keyed by DocumentChunk.id.
+
+    Changes are written to VECTOR_DB_PATH INDEX_SAVE_DELAY seconds after
+    the first unsaved one, so a burst of ingests or deletes costs one save.
+    The save copies the indexes under the lock and writes them outside it.
+
+    Every uvicorn worker loads its own copy, and only the worker holding
+    the index.lock file in VECTOR_DB_PATH writes the files back.
+    """
+
+    def __init__(self):
+        self.embedding_model: Optional[SentenceTransformer] = None
+        self.index: Optional[VectorIndex] = None
+        self.lexical: Optional[LexicalIndex] = None
+        self.splitter: Optional[TextSplitter] = None
+        self.filters = IdFilter()
+        self.query_cache = EmbeddingCache(
+            max_size=settings.EMBEDDING_CACHE_SIZE,
+            ttl=settings.CACHE_TTL,
+            redis_client=create_redis_client() if settings.EMBEDDING_CACHE_REDIS else None,
+            namespace=f"emb:{settings.EMBEDDING_MODEL}"
+        )
+        self.index_path = os.path.join(settings.VECTOR_DB_PATH, "index.faiss")
+        self.lexical_path = os.path.join(settings.VECTOR_DB_PATH, "lexical.npz")
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        # Serialises writers so an older snapshot never replaces a newer one
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        # Engines that never start(), like the build_index script, always write
+        self._writer = True
+        self._writer_lock_file = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the model and index are resident and warmed up."""
+        return self._ready.is_set()
+
+    def start(self, session_factory: Optional[Callable[[], Session]] = None) -> None:
+        """
+        Load the embedding model and index, then warm them up.
+
+        Args:
+            session_factory: optional factory for a database session used to
+                reconcile the index against the documents table
+        """
+        logger.info(f"Loading embedding model {settings.EMBEDDING_MODEL}")
         self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        self.splitter = TextSplitter(
+            chunk_size=settings.CHUNK_SIZE,
+            chunk_overlap=settings.CHUNK_OVERLAP,
+            length_function=self.count_tokens
+        )
         self.index = self._load_or_create_index()
-        
-    def _load_or_create_index(self) -> faiss.Index:
-        """Load existing FAISS index or create new one."""
+        self.lexical = self._load_or_create_lexical_index()
+        self._writer = self._claim_writer()
+        if session_factory is not None:
+            db = session_factory()
+            try:
+                self.reconcile(db)
+            finally:
+                db.close()
+        self.warm_up()
+        self._ready.set()
+        logger.info(
+            f"Retrieval engine ready ({self.index.ntotal} vectors, "
+            f"{self.lexical.terms} terms)"
+        )
+
+    def warm_up(self) -> None:
+        """Run a dummy encode and search so the first request is not slow."""
+        embedding = self.encode("warm up")
+        if self.index.ntotal > 0:
+            self.index.search(np.array([embedding]), 1)
+
+    def encode(self, text: str) -> np.ndarray:
+        """Embed a single text as a float32 vector."""
+        return self.embedding_model.encode(text).astype(np.float32)
+
+    def encode_query(self, text: str) -> np.ndarray:
+        """Embed a query, reusing cached embeddings for repeated queries."""
+        return self.query_cache.get_or_compute(text, self.encode)
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the embedding model's own tokenizer."""
+        return len(self.embedding_model.tokenizer.tokenize(text))
+
+    def encode_batch(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Embed many texts at once, EMBEDDING_BATCH_SIZE per forward pass by default."""
+        return self.embedding_model.encode(
+            texts,
+            batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True
+        ).astype(np.float32)
+
+    def add(
+        self,
+        ids: np.ndarray,
+        embeddings: np.ndarray,
+        attributes: Optional[Dict[str, Sequence]] = None,
+        texts: Optional[Sequence[str]] = None
+    ) -> None:
+        """
+        Add vectors keyed by chunk ID and schedule a save.
+
+        Args:
+            ids: chunk IDs
+            embeddings: one vector per ID
+            attributes: filterable values per ID, e.g. {"language": [...]}
+            texts: chunk texts for the BM25 index, one per ID
+        """
+        with self._lock:
+            self.index.add(ids, embeddings)
+            if texts is not None:
+                self.lexical.add(ids, texts)
+            if attributes:
+                self.filters.add(ids, **attributes)
+            self._changed()
+
+    def remove(self, ids: np.ndarray) -> int:
+        """Remove vectors by chunk ID and schedule a save."""
+        with self._lock:
+            removed = self.index.remove(ids)
+            self.lexical.remove(ids)
+            self.filters.remove(ids)
+            self._changed()
+            return removed
+
+    def replace(
+        self,
+        old_ids: np.ndarray,
+        new_ids: np.ndarray,
+        embeddings: np.ndarray,
+        attributes: Optional[Dict[str, Sequence]] = None,
+        texts: Optional[Sequence[str]] = None
+    ) -> None:
+        """Swap one document's old chunk vectors for new ones."""
+        with self._lock:
+            self.index.remove(old_ids)
+            self.lexical.remove(old_ids)
+            self.filters.remove(old_ids)
+            self.add(new_ids, embeddings, attributes, texts)
+
+    def set_attributes(self, ids: np.ndarray, **attributes: Sequence) -> None:
+        """Update the filterable values of already indexed chunks."""
+        with self._lock:
+            self.filters.update(ids, **attributes)
+
+    def indexed_ids(self) -> np.ndarray:
+        """Return the chunk IDs currently held by the index."""
+        with self._lock:
+            return self.index.ids()
+
+    def reconcile(self, db: Session) -> None:
+        """
+        Bring the indexes in line with the document_chunks table.
+
+        Only chunks missing from an index are embedded or tokenised and
+        only stale IDs are removed, so the cost scales with the number of
+        changes. Documents without chunk rows, such as ones ingested before
+        chunking, are chunked and embedded first. Untrained IVF indexes are
+        then trained from the stored embeddings.
+        """
+        self._chunk_unchunked_documents(db)
+        if not self.index.is_trained:
+            self._train_from_corpus(db)
+
+        db_ids = np.array(
+            [row[0] for row in db.query(DocumentChunk.id).all()], dtype=np.int64
+        )
+        index_ids = self.indexed_ids()
+        with self._lock:
+            lexical_ids = self.lexical.ids()
+
+        stale = np.setdiff1d(np.union1d(index_ids, lexical_ids), db_ids)
+        missing = np.setdiff1d(db_ids, index_ids)
+        lexical_missing = np.setdiff1d(db_ids, lexical_ids)
+
+        if len(stale):
+            self.remove(stale)
+
+        added_ids = []
+        added_embeddings = []
+        for start in range(0, len(missing), RECONCILE_BATCH_SIZE):
+            batch = missing[start:start + RECONCILE_BATCH_SIZE]
+            rows = db.query(
+                DocumentChunk.id, DocumentChunk.content, DocumentChunk.embedding
+            ).filter(DocumentChunk.id.in_(batch.tolist())).all()
+            stored = [row for row in rows if row[2] is not None]
+            unstored = [row for row in rows if row[2] is None]
+            if stored:
+                added_ids.extend(row[0] for row in stored)
+                added_embeddings.append(decode_embeddings([row[2] for row in stored]))
+            if unstored:
+                added_ids.extend(row[0] for row in unstored)
+                added_embeddings.append(self.encode_batch([row[1] for row in unstored]))
+        if added_ids:
+            self.add(np.array(added_ids), np.concatenate(added_embeddings))
+
+        for start in range(0, len(lexical_missing), RECONCILE_BATCH_SIZE):
+            batch = lexical_missing[start:start + RECONCILE_BATCH_SIZE]
+            rows = db.query(DocumentChunk.id, DocumentChunk.content).filter(
+                DocumentChunk.id.in_(batch.tolist())
+            ).all()
+            with self._lock:
+                self.lexical.add([row[0] for row in rows], [row[1] for row in rows])
+                self._changed()
+        self.flush()
+
+        self._load_filters(db)
+        logger.info(
+            f"Index reconciled: {len(missing)} vectors and {len(lexical_missing)} "
+            f"texts added, {len(stale)} removed"
+        )
+
+    def _chunk_unchunked_documents(self, db: Session) -> int:
+        """Create and store chunk rows for documents that have none."""
+        chunked = 0
+        last_id = 0
+        while True:
+            rows = db.query(Document.id, Document.content).filter(
+                Document.id > last_id, ~Document.chunks.any()
+            ).order_by(Document.id).limit(RECONCILE_BATCH_SIZE).all()
+            if not rows:
+                break
+
+            texts = [
+                self.splitter.split_text(content or "") or [content or ""]
+                for _, content in rows
+            ]
+            embeddings = self.encode_batch(
+                [text for chunk_texts in texts for text in chunk_texts]
+            )
+            chunks = []
+            for (document_id, _), chunk_texts in zip(rows, texts):
+                for i, text in enumerate(chunk_texts):
+                    chunks.append(DocumentChunk(
+                        document_id=document_id,
+                        chunk_index=i,
+                        content=text,
+                        token_count=self.count_tokens(text),
+                        embedding=encode_embedding(embeddings[len(chunks)])
+                    ))
+            db.add_all(chunks)
+            db.commit()
+            chunked += len(rows)
+            last_id = rows[-1][0]
+
+        if chunked:
+            logger.info(f"Chunked {chunked} documents that had no chunks")
+        return chunked
+
+    def _load_filters(self, db: Session) -> None:
+        """Rebuild the language/doc_type filters from the database."""
+        rows = db.query(
+            DocumentChunk.id, Document.language, Document.doc_type
+        ).join(Document, DocumentChunk.document_id == Document.id).all()
+
+        filters = IdFilter()
+        if rows:
+            ids, languages, doc_types = zip(*rows)
+            filters.add(np.array(ids), language=languages, doc_type=doc_types)
+        with self._lock:
+            self.filters = filters
+
+    def _train_from_corpus(self, db: Session) -> None:
+        """Train an empty IVF index, falling back to flat for small corpora."""
+        _, embeddings = load_corpus_embeddings(db)
+        required = min_training_size(self.index.index_type)
+        if len(embeddings) < required:
+            logger.warning(
+                f"{self.index.index_type} index needs {required} training vectors, "
+                f"corpus has {len(embeddings)}; using a flat index until rebuilt"
+            )
+            self.index = VectorIndex.create(
+                self.embedding_model.get_sentence_embedding_dimension(), FLAT
+            )
+            return
+        self.index.train(embeddings)
+
+    def rebuild(
+        self,
+        db: Session,
+        index_type: Optional[str] = None,
+        batch_size: int = 10000
+    ) -> None:
+        """
+        Rebuild the index from stored chunk embeddings.
+
+        Trains a fresh index of the requested (or configured) type on the
+        whole corpus, adds every vector and swaps it in. Also compacts
+        HNSW tombstones. Embeddings are read straight from the binary
+        column, batch_size rows per decode, without re-encoding any text.
+        """
+        ids, embeddings = load_corpus_embeddings(db, batch_size)
+        if not len(ids):
+            raise ValueError("No stored embeddings to build the index from")
+
+        index = VectorIndex.create(embeddings.shape[1], index_type)
+        if not index.is_trained:
+            index.train(embeddings)
+        index.add(ids, embeddings)
+
+        with self._lock:
+            self.index = index
+        self.save_index()
+        self._load_filters(db)
+        logger.info(f"Rebuilt {index.index_type} index with {len(ids)} vectors")
+
+    def search(
+        self,
+        embedding: np.ndarray,
+        top_k: int,
+        language: Optional[Language] = None,
+        doc_type: Optional[DocumentType] = None
+    ):
+        """
+        Search the index for the nearest neighbours of one embedding.
+
+        Filters are applied inside faiss, so all returned IDs match them.
+        """
+        with self._lock:
+            selector = self.filters.selector(language=language, doc_type=doc_type)
+            return self.index.search(np.array([embedding]), top_k, selector)
+
+    def search_lexical(
+        self,
+        query: str,
+        top_k: int,
+        language: Optional[Language] = None,
+        doc_type: Optional[DocumentType] = None
+    ):
+        """BM25 search over chunk texts, returning (scores, ids) best first."""
+        with self._lock:
+            allowed = self.filters.mask(language=language, doc_type=doc_type)
+            return self.lexical.search(query, top_k, allowed)
+
+    def _claim_writer(self) -> bool:
+        """
+        Try to become the one worker that saves the index files.
+
+        A worker holds an exclusive lock on index.lock for its lifetime.
+        The others keep their changes in memory only; the database has
+        them, so the writer's next startup reconcile adds them to the files.
+        """
+        path = os.path.join(os.path.dirname(self.index_path), "index.lock")
+        self._writer_lock_file = open(path, "a")
+        try:
+            fcntl.flock(self._writer_lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._writer_lock_file.close()
+            self._writer_lock_file = None
+            logger.warning("Another worker saves the index files; this one only reads them")
+            return False
+        return True
+
+    def _changed(self) -> None:
+        """Mark the indexes unsaved and start the save timer if it is idle."""
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(settings.INDEX_SAVE_DELAY, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self) -> None:
+        """Write unsaved index changes now; called by the timer and on shutdown."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
         try:
-            return faiss.read_index(settings.VECTOR_DB_PATH)
-        except:
-            # Create new index
-            dimension = self.embedding_model.get_sentence_embedding_dimension()
-            index = faiss.IndexFlatL2(dimension)
-            faiss.write_index(index, settings.VECTOR_DB_PATH)
-            return index
+            self.save_index()
+        except Exception:
+            with self._lock:
+                self._dirty = True
+            raise
+
+    def save_index(self) -> None:
+        """
+        Persist the vector and BM25 indexes to VECTOR_DB_PATH.
+
+        Must not be called with the lock held: searches and ingests only
+        wait for the in-memory copy, not for the disk writes. Does nothing
+        in workers that do not own the files.
+        """
+        if not self._writer:
+            return
+        with self._save_lock:
+            with self._lock:
+                vectors = self.index.snapshot()
+                lexical = self.lexical.snapshot() if self.lexical is not None else None
+            VectorIndex.write(self.index_path, vectors)
+            if lexical is not None:
+                LexicalIndex.write(self.lexical_path, lexical)
+
+    def _load_or_create_index(self) -> VectorIndex:
+        """Load existing FAISS index or create new one."""
+        os.makedirs(settings.VECTOR_DB_PATH, exist_ok=True)
+        if os.path.exists(self.index_path):
+            try:
+                index = VectorIndex.load(self.index_path)
+                if index.index_type != settings.VECTOR_INDEX_TYPE:
+                    logger.warning(
+                        f"Loaded {index.index_type} index but VECTOR_INDEX_TYPE is "
+                        f"{settings.VECTOR_INDEX_TYPE}; run scripts/build_index.py to rebuild"
+                    )
+                return index
+            except ValueError:
+                # Positional indexes cannot be trusted; reconcile rebuilds them
+                logger.warning("Index has no chunk ID mapping, rebuilding")
+
+        # Create new index keyed by chunk ID
+        dimension = self.embedding_model.get_sentence_embedding_dimension()
+        return VectorIndex.create(dimension)
+
+    def _load_or_create_lexical_index(self) -> LexicalIndex:
+        """Load the BM25 index or start an empty one for reconcile to fill."""
+        if os.path.exists(self.lexical_path):
+            try:
+                return LexicalIndex.load(self.lexical_path)
+            except Exception as e:
+                logger.warning(f"Could not load BM25 index, rebuilding: {str(e)}")
+        return LexicalIndex(settings.BM25_K1, settings.BM25_B)
+
+class RAGService:
+    """
+    Request-scoped RAG operations on an async database session.
+    
+    Relationships are never lazy-loaded: queries eager-load what they use,
+    and the session keeps objects loaded after commit.
+    """
+    
+    def __init__(
+        self,
+        db: AsyncSession,
+        engine: RetrievalEngine,
+        response_cache: Optional[SemanticResponseCache] = None,
+        prompt_builder: Optional[PromptBuilder] = None,
+        llm: Optional[LLMBackend] = None
+    ):
+        self.db = db
+        self.engine = engine
+        self.response_cache = response_cache
+        self.prompt_builder = prompt_builder or create_prompt_builder(engine.count_tokens)
+        self.llm = llm or create_llm_backend()
+    
+    def _split(self, content: str) -> List[str]:
+        """Split document content into chunk texts."""
+        return self.engine.splitter.split_text(content) or [content]
+    
+    @staticmethod
+    def _attributes(documents: List[Document]) -> Dict[str, List]:
+        """Filterable values for every chunk of the given documents."""
+        chunks = [(doc, chunk) for doc in documents for chunk in doc.chunks]
+        return {
+            "language": [doc.language for doc, _ in chunks],
+            "doc_type": [doc.doc_type for doc, _ in chunks]
+        }
+    
+    def _build_chunks(
+        self,
+        texts: List[str],
+        embeddings: np.ndarray
+    ) -> List[DocumentChunk]:
+        """Create chunk rows for one document's texts and embeddings."""
+        return [
+            DocumentChunk(
+                chunk_index=i,
+                content=text,
+                token_count=self.engine.count_tokens(text),
+                embedding=encode_embedding(embedding)
+            )
+            for i, (text, embedding) in enumerate(zip(texts, embeddings))
+        ]
+    
+    def _prepare(
+        self,
+        contents: List[str]
+    ) -> Tuple[List[List[str]], np.ndarray, List[List[DocumentChunk]]]:
+        """
+        Split, embed and build chunk rows for each document's content.
+        
+        Tokenizing and encoding are CPU-bound, so callers run this in the
+        threadpool rather than on the event loop.
+        
+        Returns:
+            Chunk texts per document, all their embeddings in one array and
+            chunk rows per document
+        """
+        chunk_texts = [self._split(content) for content in contents]
+        embeddings = self.engine.encode_batch(
+            [text for texts in chunk_texts for text in texts]
+        )
+        chunks = []
+        offset = 0
+        for texts in chunk_texts:
+            chunks.append(self._build_chunks(texts, embeddings[offset:offset + len(texts)]))
+            offset += len(texts)
+        return chunk_texts, embeddings, chunks
     
     async def ingest_document(
         self,
@@ -36,8 +549,10 @@ class RAGService:
     ) -> Document:
         """Ingest a new document into the RAG system."""
         try:
-            # Generate embedding
-            embedding = self.embedding_model.encode(content)
+            # Split into chunks and embed them together, off the event loop
+            (texts,), embeddings, (chunks,) = await run_in_threadpool(
+                self._prepare, [content]
+            )
             
             # Store in database
             document = Document(
@@ -45,113 +560,335 @@ class RAGService:
                 content=content,
                 doc_type=doc_type,
                 language=language,
-                embedding=embedding.tolist(),
-                metadata=metadata or {}
+                metadata=metadata or {},
+                chunks=chunks
             )
             
             self.db.add(document)
-            self.db.commit()
-            self.db.refresh(document)
+            await self.db.commit()
             
             # Update FAISS index
-            self.index.add(np.array([embedding]))
-            faiss.write_index(self.index, settings.VECTOR_DB_PATH)
+            await run_in_threadpool(
+                self.engine.add,
+                np.array([chunk.id for chunk in document.chunks]),
+                embeddings,
+                self._attributes([document]),
+                texts
+            )
             
             return document
             
         except Exception as e:
             logger.error(f"Error ingesting document: {str(e)}")
-            self.db.rollback()
+            await self.db.rollback()
             raise
     
-    async def retrieve_relevant_documents(
+    async def ingest_documents(
+        self,
+        documents: List[Dict],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Ingest many documents in batches.
+
+        Each batch is chunked, embedded in one encode call, inserted in one
+        flush, added to the index in one call and persisted once. A failing
+        batch is rolled back and ends the run; batches committed before it
+        stay ingested.
+
+        Args:
+            documents: dicts with title, content, doc_type, language and
+                optional metadata
+            batch_size: documents per batch (defaults to INGEST_BATCH_SIZE)
+            progress_callback: called with (ingested, total) after each batch
+
+        Returns:
+            Ingestion stats: documents committed ("ingested") and not
+            ("failed"), chunks, batches, elapsed seconds, docs/sec and the
+            error that stopped the run, if any
+        """
+        batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        total = len(documents)
+        ingested = 0
+        chunk_count = 0
+        batches = 0
+        error = None
+        started = time.perf_counter()
+
+        for start in range(0, total, batch_size):
+            batch = documents[start:start + batch_size]
+            try:
+                chunk_texts, embeddings, chunks = await run_in_threadpool(
+                    self._prepare, [doc["content"] for doc in batch]
+                )
+                rows = [
+                    Document(
+                        title=doc["title"],
+                        content=doc["content"],
+                        doc_type=doc["doc_type"],
+                        language=doc["language"],
+                        metadata=doc.get("metadata") or {},
+                        chunks=doc_chunks
+                    )
+                    for doc, doc_chunks in zip(batch, chunks)
+                ]
+
+                # A single flush emits multi-row INSERT ... RETURNING statements
+                self.db.add_all(rows)
+                await self.db.flush()
+                ids = np.array([chunk.id for row in rows for chunk in row.chunks])
+                attributes = self._attributes(rows)
+                await self.db.commit()
+
+            except Exception as e:
+                logger.error(f"Error ingesting batch at offset {start}: {str(e)}")
+                await self.db.rollback()
+                error = str(e)
+                break
+
+            ingested += len(batch)
+            chunk_count += len(ids)
+            batches += 1
+            try:
+                await run_in_threadpool(
+                    self.engine.add, ids, embeddings, attributes,
+                    [text for texts in chunk_texts for text in texts]
+                )
+            except Exception as e:
+                # The rows are committed; the next reconcile indexes them
+                logger.error(f"Error indexing batch at offset {start}: {str(e)}")
+                error = str(e)
+                break
+
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Ingested {ingested}/{total} documents "
+                f"({ingested / elapsed:.1f} docs/sec)"
+            )
+            if progress_callback:
+                progress_callback(ingested, total)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "ingested": ingested,
+            "failed": total - ingested,
+            "error": error,
+            "chunks": chunk_count,
+            "batches": batches,
+            "elapsed_seconds": round(elapsed, 3),
+            "docs_per_sec": round(ingested / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+    async def update_document(
+        self,
+        document_id: int,
+        title: Optional[str] = None,
+        content: Optional[str] = None,
+        doc_type: Optional[str] = None,
+        language: Optional[Language] = None,
+        metadata: Optional[Dict] = None
+    ) -> Optional[Document]:
+        """Update a document, re-chunking it only if its content changed."""
+        try:
+            document = await self.db.get(
+                Document, document_id, options=[selectinload(Document.chunks)]
+            )
+            if document is None:
+                return None
+
+            if title is not None:
+                document.title = title
+            if doc_type is not None:
+                document.doc_type = doc_type
+            if language is not None:
+                document.language = language
+            if metadata is not None:
+                document.metadata = metadata
+
+            old_ids = None
+            if content is not None and content != document.content:
+                (texts,), embeddings, (chunks,) = await run_in_threadpool(
+                    self._prepare, [content]
+                )
+                old_ids = np.array([chunk.id for chunk in document.chunks])
+                document.content = content
+                document.chunks = chunks
+
+            await self.db.commit()
+
+            if self.response_cache is not None:
+                self.response_cache.invalidate_documents([document.id])
+
+            chunk_ids = np.array([chunk.id for chunk in document.chunks])
+            if old_ids is not None:
+                await run_in_threadpool(
+                    self.engine.replace,
+                    old_ids, chunk_ids, embeddings, self._attributes([document]), texts
+                )
+            elif language is not None or doc_type is not None:
+                await run_in_threadpool(
+                    self.engine.set_attributes, chunk_ids, **self._attributes([document])
+                )
+
+            return document
+
+        except Exception as e:
+            logger.error(f"Error updating document: {str(e)}")
+            await self.db.rollback()
+            raise
+
+    async def delete_document(self, document_id: int) -> bool:
+        """Delete a document and its chunk vectors from the index."""
+        try:
+            document = await self.db.get(
+                Document, document_id, options=[selectinload(Document.chunks)]
+            )
+            if document is None:
+                return False
+
+            chunk_ids = np.array([chunk.id for chunk in document.chunks])
+            await self.db.delete(document)
+            await self.db.commit()
+            if len(chunk_ids):
+                await run_in_threadpool(self.engine.remove, chunk_ids)
+            if self.response_cache is not None:
+                self.response_cache.invalidate_documents([document_id])
+            return True
+
+        except Exception as e:
+            logger.error(f"Error deleting document: {str(e)}")
+            await self.db.rollback()
+            raise
+
+    async def retrieve_relevant_chunks(
         self,
         query: str,
         language: Optional[Language] = None,
-        top_k: int = 3
-    ) -> List[Document]:
-        """Retrieve relevant documents for a query."""
+        top_k: int = 3,
+        doc_type: Optional[DocumentType] = None
+    ) -> List[DocumentChunk]:
+        """
+        Retrieve the best-matching chunks, filtered by language/doc_type.
+        
+        With HYBRID_SEARCH_ENABLED the vector and BM25 rankings of
+        HYBRID_CANDIDATES chunks each are merged by reciprocal rank fusion,
+        so exact Devanagari or romanised terms count even where the
+        embedding model is weak.
+        """
         try:
+            hybrid = settings.HYBRID_SEARCH_ENABLED
+            candidates = max(top_k, settings.HYBRID_CANDIDATES) if hybrid else top_k
+            
             # Generate query embedding
-            query_embedding = self.embedding_model.encode(query)
+            # Redis lookups and the encoder forward pass both block
+            query_embedding = await run_in_threadpool(self.engine.encode_query, query)
             
-            # Search in FAISS index
-            distances, indices = self.index.search(
-                np.array([query_embedding]), top_k
+            # Search in FAISS index, filtering inside the search
+            distances, indices = self.engine.search(
+                query_embedding, candidates, language=language, doc_type=doc_type
             )
+            chunk_ids = [int(i) for i in indices[0] if i != -1]
             
-            # Get documents from database
-            documents = self.db.query(Document).filter(
-                Document.id.in_(indices[0])
-            ).all()
-            
-            # Filter by language if specified
-            if language:
-                documents = [doc for doc in documents if doc.language == language]
+            if hybrid:
+                _, lexical_ids = self.engine.search_lexical(
+                    query, candidates, language=language, doc_type=doc_type
+                )
+                chunk_ids = reciprocal_rank_fusion(
+                    [chunk_ids, lexical_ids.tolist()], k=settings.HYBRID_RRF_K
+                )[:top_k]
             
-            return documents
+            # Get chunks from database, keeping the ranking order
+            result = await self.db.execute(
+                select(DocumentChunk)
+                .options(joinedload(DocumentChunk.document))
+                .where(DocumentChunk.id.in_(chunk_ids))
+            )
+            by_id = {chunk.id: chunk for chunk in result.scalars()}
+            return [by_id[i] for i in chunk_ids if i in by_id]
             
         except Exception as e:
-            logger.error(f"Error retrieving documents: {str(e)}")
+            logger.error(f"Error retrieving chunks: {str(e)}")
             raise
+
+    async def retrieve_relevant_documents(
+        self,
+        query: str,
+        language: Optional[Language] = None,
+        top_k: int = 3,
+        doc_type: Optional[DocumentType] = None
+    ) -> List[Document]:
+        """Retrieve the documents owning the best-matching chunks."""
+        chunks = await self.retrieve_relevant_chunks(query, language, top_k, doc_type)
+        documents = []
+        for chunk in chunks:
+            if chunk.document not in documents:
+                documents.append(chunk.document)
+        return documents
+    
+    async def _build_prompt(
+        self,
+        query: str,
+        conversation_history: List[Dict],
+        language: Optional[Language],
+        doc_type: Optional[DocumentType],
+        chunks: Optional[List[DocumentChunk]],
+        summary: str
+    ) -> str:
+        if chunks is None:
+            chunks = await self.retrieve_relevant_chunks(
+                query, language, doc_type=doc_type
+            )
+        return self.prompt_builder.build(
+            query,
+            [chunk.content for chunk in chunks],
+            conversation_history,
+            summary=summary,
+            language=language
+        ).text
     
     async def generate_response(
         self,
         query: str,
         conversation_history: List[Dict],
-        language: Optional[Language] = None
+        language: Optional[Language] = None,
+        doc_type: Optional[DocumentType] = None,
+        chunks: Optional[List[DocumentChunk]] = None,
+        summary: str = ""
     ) -> str:
-        """Generate response using RAG and LLM."""
+        """
+        Generate response using RAG and LLM; pass chunks if already retrieved.
+        
+        The prompt is assembled within PROMPT_MAX_TOKENS: ranked chunks,
+        the newest history verbatim and older turns only via summary.
+        """
         try:
-            # Retrieve relevant documents
-            documents = await self.retrieve_relevant_documents(query, language)
-            
-            # Prepare context from documents
-            context = "\n".join([doc.content for doc in documents])
-            
-            # Prepare conversation history
-            history = "\n".join([
-                f"{msg['role']}: {msg['content']}"
-                for msg in conversation_history[-5:]  # Last 5 messages
-            ])
-            
-            # Generate response using LLM
-            # Note: This is a placeholder. You'll need to implement the actual LLM call
-            response = await self._call_llm(
-                query=query,
-                context=context,
-                history=history,
-                language=language
+            prompt = await self._build_prompt(
+                query, conversation_history, language, doc_type, chunks, summary
             )
-            
-            return response
+            return (await self.llm.complete(prompt)).strip()
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             raise
     
-    async def _call_llm(
+    async def stream_response(
         self,
         query: str,
-        context: str,
-        history: str,
-        language: Optional[Language] = None
-    ) -> str:
-        """Call LLM to generate response."""
-        # TODO: Implement actual LLM call
-        # This is a placeholder that should be replaced with actual LLM integration
-        prompt = f"""
-        Context: {context}
-        
-        Conversation History:
-        {history}
-        
-        Query: {query}
-        
-        Language: {language.value if language else 'mixed'}
-        
-        Generate a response:
-        """
-        
-        # Placeholder response
-        return "This is a placeholder response. Implement actual LLM integration." 
\ No newline at end of file
+        conversation_history: List[Dict],
+        language: Optional[Language] = None,
+        doc_type: Optional[DocumentType] = None,
+        chunks: Optional[List[DocumentChunk]] = None,
+        summary: str = ""
+    ) -> AsyncIterator[str]:
+        """Like generate_response, but yield the answer as tokens arrive."""
+        try:
+            prompt = await self._build_prompt(
+                query, conversation_history, language, doc_type, chunks, summary
+            )
+            async for token in self.llm.stream(prompt):
+                yield token
+            
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            raise
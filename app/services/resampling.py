@@ -0,0 +1,114 @@
+from functools import lru_cache
+from math import gcd
+from typing import Tuple
+
+import numpy as np
+from scipy.signal import firwin, upfirdn
+
+TARGET_RATE = 16000
+
+@lru_cache(maxsize=32)
+def polyphase_filter(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """
+    Anti-aliasing FIR filter for resampling by up/down, designed once per ratio.
+
+    Same design as scipy.signal.resample_poly (Kaiser window, beta 5, ten
+    zero crossings per side), pre-padded so the filter delay lands on a
+    whole output sample. Returns the float32 taps and the number of leading
+    output samples to drop.
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    taps = taps / taps.sum() * up
+
+    pre_pad = down - half_len % down
+    # A little zero tail so the output always covers the last input sample
+    taps = np.concatenate([np.zeros(pre_pad), taps, np.zeros(down)]).astype(np.float32)
+    taps.setflags(write=False)
+    return taps, (half_len + pre_pad) // down
+
+def resample(audio: np.ndarray, source_rate: int, target_rate: int = TARGET_RATE) -> np.ndarray:
+    """
+    Resample mono audio to target_rate as float32.
+
+    Audio already at the target rate is returned without copying when it is
+    float32; other rates go through a single polyphase filtering pass.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim > 1:
+        audio = audio.reshape(-1)
+    if source_rate == target_rate or not len(audio):
+        return audio
+
+    divisor = gcd(source_rate, target_rate)
+    up, down = target_rate // divisor, source_rate // divisor
+    taps, skip = polyphase_filter(up, down)
+
+    n_out = -(-len(audio) * up // down)
+    resampled = upfirdn(taps, audio, up, down)[skip:skip + n_out]
+    if len(resampled) < n_out:
+        resampled = np.pad(resampled, (0, n_out - len(resampled)))
+    return resampled
+
+class StreamResampler:
+    """
+    Resample a stream chunk by chunk with the same filter as resample().
+
+    The input samples the filter still needs are carried over from one
+    chunk to the next, so the concatenated output matches resampling the
+    whole stream at once instead of ringing at every chunk boundary.
+    Output is emitted as soon as all of its input has arrived; flush()
+    returns the rest at the end of the stream.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int = TARGET_RATE):
+        divisor = gcd(source_rate, target_rate)
+        self.up = target_rate // divisor
+        self.down = source_rate // divisor
+        self.passthrough = source_rate == target_rate
+        if not self.passthrough:
+            self.taps, self.skip = polyphase_filter(self.up, self.down)
+        self._history = np.zeros(0, dtype=np.float32)
+        self._start = 0  # input index of _history[0], a multiple of down
+        self._received = 0
+        self._emitted = 0
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """Resample the next chunk, returning the output completed so far."""
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.ndim > 1:
+            audio = audio.reshape(-1)
+        if self.passthrough:
+            return audio
+        self._history = np.concatenate([self._history, audio])
+        self._received += len(audio)
+        # Output n needs input up to (n + skip) * down / up
+        ready = (self._received * self.up - 1) // self.down - self.skip + 1
+        return self._emit(min(ready, self._total()))
+
+    def flush(self) -> np.ndarray:
+        """Return the remaining output, treating the stream as ended."""
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float32)
+        return self._emit(self._total())
+
+    def _total(self) -> int:
+        return -(-self._received * self.up // self.down)
+
+    def _emit(self, end: int) -> np.ndarray:
+        if end <= self._emitted:
+            return np.zeros(0, dtype=np.float32)
+        filtered = upfirdn(self.taps, self._history, self.up, self.down)
+        first = self._emitted + self.skip - self._start * self.up // self.down
+        output = filtered[first:first + end - self._emitted]
+        if len(output) < end - self._emitted:
+            output = np.pad(output, (0, end - self._emitted - len(output)))
+        self._emitted = end
+
+        # Keep the input from the first sample the next output still needs
+        needed = -(-((end + self.skip) * self.down - len(self.taps) + 1) // self.up)
+        start = min(max(needed, 0), self._received) // self.down * self.down
+        self._history = self._history[start - self._start:]
+        self._start = start
+        return output.astype(np.float32, copy=False)
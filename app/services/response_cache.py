@@ -0,0 +1,193 @@
+import faiss
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+from app.models.database import DocumentChunk, Language
+
+logger = logging.getLogger(__name__)
+
+DocumentKey = Tuple[Tuple[int, str], ...]
+
+def document_key(chunks: Iterable[DocumentChunk]) -> DocumentKey:
+    """(document ID, version) pairs of the documents behind retrieved chunks."""
+    versions = {}
+    for chunk in chunks:
+        updated_at = chunk.document.updated_at
+        versions[chunk.document_id] = updated_at.isoformat() if updated_at else ""
+    return tuple(sorted(versions.items()))
+
+@dataclass
+class CachedResponse:
+    text: str
+    audio_url: Optional[str]
+    documents: DocumentKey
+    expires_at: float
+    hits: int = 0
+
+@dataclass
+class _Partition:
+    index: faiss.Index
+    ids: Set[int] = field(default_factory=set)
+
+class SemanticResponseCache:
+    """
+    Cache of chat answers (text and audio URL) looked up by query similarity.
+
+    An entry is reused when a new query's embedding has cosine similarity of
+    at least `threshold` with the cached query, the language matches and the
+    retrieval step produced the same documents at the same versions. Entries
+    that used a document are dropped when that document changes, and
+    entries rejected by is_valid (e.g. whose audio has since been evicted)
+    are dropped when a lookup finds them.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        is_valid: Optional[Callable[[CachedResponse], bool]] = None
+    ):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.is_valid = is_valid
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, CachedResponse]" = OrderedDict()
+        self._entry_language: Dict[int, str] = {}
+        self._partitions: Dict[str, _Partition] = {}
+        self._by_document: Dict[int, Set[int]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _language_key(language: Optional[Language]) -> str:
+        return language.value if language else "auto"
+
+    def _normalize(self, embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1).copy()
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _partition(self, language: str, dimension: int) -> _Partition:
+        if language not in self._partitions:
+            self._partitions[language] = _Partition(
+                faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+            )
+        return self._partitions[language]
+
+    def lookup(
+        self,
+        query_embedding: np.ndarray,
+        language: Optional[Language],
+        documents: DocumentKey
+    ) -> Optional[CachedResponse]:
+        """Return a cached response for a similar query over the same documents."""
+        with self._lock:
+            partition = self._partitions.get(self._language_key(language))
+            if partition is None or not partition.ids:
+                self.misses += 1
+                return None
+
+            k = min(len(partition.ids), 4)
+            scores, ids = partition.index.search(self._normalize(query_embedding), k)
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id == -1 or score < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None or entry.documents != documents:
+                    continue
+                if entry.expires_at <= self.clock() or (
+                    self.is_valid is not None and not self.is_valid(entry)
+                ):
+                    self._remove(int(entry_id))
+                    continue
+
+                self._entries.move_to_end(int(entry_id))
+                entry.hits += 1
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        query_embedding: np.ndarray,
+        language: Optional[Language],
+        documents: DocumentKey,
+        text: str,
+        audio_url: Optional[str] = None
+    ) -> None:
+        """Cache a generated response."""
+        with self._lock:
+            entry_id = next(self._ids)
+            language_key = self._language_key(language)
+            vector = self._normalize(query_embedding)
+            partition = self._partition(language_key, vector.shape[1])
+            partition.index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            partition.ids.add(entry_id)
+
+            self._entries[entry_id] = CachedResponse(
+                text=text,
+                audio_url=audio_url,
+                documents=documents,
+                expires_at=self.clock() + self.ttl
+            )
+            self._entry_language[entry_id] = language_key
+            for doc_id, _ in documents:
+                self._by_document.setdefault(doc_id, set()).add(entry_id)
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_documents(self, document_ids: Iterable[int]) -> int:
+        """Drop every entry whose answer used one of the documents."""
+        with self._lock:
+            entry_ids: Set[int] = set()
+            for doc_id in document_ids:
+                entry_ids |= self._by_document.pop(doc_id, set())
+            for entry_id in entry_ids:
+                self._remove(entry_id)
+            if entry_ids:
+                logger.info(f"Invalidated {len(entry_ids)} cached responses")
+            return len(entry_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry_id in list(self._entries):
+                self._remove(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        partition = self._partitions[self._entry_language.pop(entry_id)]
+        partition.index.remove_ids(np.array([entry_id], dtype=np.int64))
+        partition.ids.discard(entry_id)
+        for doc_id, _ in entry.documents:
+            users = self._by_document.get(doc_id)
+            if users is not None:
+                users.discard(entry_id)
+                if not users:
+                    del self._by_document[doc_id]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -1,27 +1,307 @@
 import torch
 import whisper
 import numpy as np
-from typing import Tuple, Optional
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple, Optional
 import logging
 from app.core.config import settings
 from app.models.database import Language
+from app.services.batching import MicroBatcher
+from app.services.resampling import resample
+from app.services.streaming import StreamingTranscriber
+from app.services.vad import create_vad, trim_silence
 
 logger = logging.getLogger(__name__)
 
+# Each pool worker (thread or process) holds its own model instance
+_worker_state = threading.local()
+
+def _init_worker(model_name: str, torch_threads: int) -> None:
+    """Load a private Whisper model in a pool worker."""
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    _worker_state.model = whisper.load_model(model_name).to(device)
+    _worker_state.device = device
+
+def _transcribe_in_worker(
+    audio_data: np.ndarray,
+    language: Optional[str],
+    prompt: Optional[str] = None
+) -> Dict:
+    """Run Whisper inside a pool worker and report when work started."""
+    started_at = time.time()
+    result = _worker_state.model.transcribe(
+        audio_data,
+        language=language,
+        task="transcribe",
+        initial_prompt=prompt,
+        fp16=_worker_state.device == "cuda"
+    )
+    return {
+        "text": result["text"],
+        "segments": [
+            {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+            for segment in result.get("segments", [])
+        ],
+        "started_at": started_at,
+        "finished_at": time.time()
+    }
+
+# Seconds per timestamp token: one encoder frame, i.e. two mel hops
+TIME_PRECISION = 2 * whisper.audio.HOP_LENGTH / whisper.audio.SAMPLE_RATE
+
+# Quality thresholds of whisper's own transcribe()
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+def segments_from_tokens(
+    tokens: List[int],
+    timestamp_begin: int,
+    decode: Callable[[List[int]], str],
+    duration: float
+) -> List[Dict]:
+    """
+    Split decoded tokens into timestamped segments.
+    
+    Whisper brackets each segment with timestamp tokens, e.g.
+    <|0.00|> text <|2.40|><|2.40|> text <|5.00|>; text after the last
+    timestamp runs to the end of the clip.
+    """
+    segments = []
+    start = None
+    text_tokens: List[int] = []
+    for token in tokens:
+        if token < timestamp_begin:
+            text_tokens.append(token)
+            continue
+        time_offset = (token - timestamp_begin) * TIME_PRECISION
+        if start is not None and text_tokens:
+            segments.append({"start": start, "end": time_offset, "text": decode(text_tokens)})
+            text_tokens = []
+            start = None
+        else:
+            start = time_offset
+    if text_tokens:
+        segments.append({
+            "start": start or 0.0,
+            "end": max(duration, start or 0.0),
+            "text": decode(text_tokens)
+        })
+    return [segment for segment in segments if segment["text"].strip()]
+
+def _transcribe_batch_in_worker(audios: List[np.ndarray], language: Optional[str]) -> List[Dict]:
+    """
+    Decode several clips of at most 30 s in one batched Whisper pass.
+    
+    Clips are padded to Whisper's 30 s window, turned into log-mel
+    spectrograms and stacked into a single (batch, n_mels, frames) tensor.
+    Segments are read from the predicted timestamp tokens. Clips that fail
+    transcribe()'s quality checks are decoded again on their own through
+    transcribe(), with its temperature fallback; likely silence is
+    returned empty, as transcribe() would.
+    """
+    started_at = time.time()
+    model = _worker_state.model
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(torch.from_numpy(np.asarray(audio, dtype=np.float32))),
+            n_mels=model.dims.n_mels
+        )
+        for audio in audios
+    ]).to(_worker_state.device)
+    
+    results = whisper.decode(
+        model,
+        mel,
+        whisper.DecodingOptions(
+            language=language,
+            task="transcribe",
+            fp16=_worker_state.device == "cuda"
+        )
+    )
+    
+    outputs = []
+    for audio, result in zip(audios, results):
+        silent = (
+            result.no_speech_prob > NO_SPEECH_THRESHOLD
+            and result.avg_logprob < LOGPROB_THRESHOLD
+        )
+        if silent:
+            outputs.append({"text": "", "segments": []})
+            continue
+        if (
+            result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+            or result.avg_logprob < LOGPROB_THRESHOLD
+        ):
+            outputs.append(_transcribe_in_worker(audio, language))
+            continue
+        
+        tokenizer = whisper.tokenizer.get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=result.language,
+            task="transcribe"
+        )
+        outputs.append({
+            "text": result.text,
+            "segments": segments_from_tokens(
+                result.tokens,
+                tokenizer.timestamp_begin,
+                tokenizer.decode,
+                len(audio) / whisper.audio.SAMPLE_RATE
+            )
+        })
+    
+    finished_at = time.time()
+    return [
+        {**output, "started_at": started_at, "finished_at": finished_at}
+        for output in outputs
+    ]
+
+class ASRQueueFullError(Exception):
+    """Raised when the transcription queue is saturated."""
+
 class SpeechRecognitionService:
     def __init__(self):
-        self.model = whisper.load_model(settings.ASR_MODEL)
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model.to(self.device)
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._batcher = MicroBatcher(
+            self._transcribe_batch,
+            max_batch_size=settings.ASR_BATCH_MAX_SIZE,
+            max_wait=settings.ASR_BATCH_MAX_WAIT_MS / 1000
+        )
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "total_run_seconds": 0.0
+        }
+        self.vad = create_vad(settings.ASR_VAD, threshold_db=settings.ASR_VAD_THRESHOLD_DB)
+        self._vad_stats = {"requests": 0, "original_seconds": 0.0, "saved_seconds": 0.0}
+    
+    @property
+    def executor(self) -> Executor:
+        """Worker pool, started on first use so importing the app stays cheap."""
+        if self._executor is None:
+            initargs = (settings.ASR_MODEL, settings.ASR_TORCH_THREADS)
+            if settings.ASR_EXECUTOR == "process":
+                # spawn keeps CUDA and torch thread pools out of forked children
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.ASR_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=initargs
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.ASR_WORKERS,
+                    thread_name_prefix="asr",
+                    initializer=_init_worker,
+                    initargs=initargs
+                )
+        return self._executor
+    
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def _run_in_pool(
+        self,
+        audio_data: np.ndarray,
+        language: Optional[Language],
+        prompt: Optional[str] = None,
+        batchable: bool = True
+    ) -> Dict:
+        """Submit one transcription, rejecting it if the queue is full."""
+        if self._pending >= settings.ASR_MAX_QUEUE:
+            self._stats["rejected"] += 1
+            raise ASRQueueFullError(
+                f"Transcription queue is full ({self._pending} requests pending)"
+            )
         
-    async def transcribe_audio(
+        self._pending += 1
+        submitted_at = time.time()
+        language_code = language.value if language else None
+        audio_data = np.ascontiguousarray(audio_data, dtype=np.float32).reshape(-1)
+        try:
+            # Short clips fit one Whisper window and can share a batched decode
+            if (
+                batchable
+                and settings.ASR_BATCHING_ENABLED
+                and len(audio_data) <= whisper.audio.N_SAMPLES
+            ):
+                result = await self._batcher.submit(audio_data, key=language_code)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor,
+                    _transcribe_in_worker,
+                    audio_data,
+                    language_code,
+                    prompt
+                )
+        finally:
+            self._pending -= 1
+        
+        wait = max(result["started_at"] - submitted_at, 0.0)
+        self._stats["completed"] += 1
+        self._stats["total_wait_seconds"] += wait
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+        self._stats["total_run_seconds"] += result["finished_at"] - result["started_at"]
+        return result
+    
+    async def _transcribe_batch(
+        self,
+        language_code: Optional[str],
+        audios: List[np.ndarray]
+    ) -> List[Dict]:
+        """Run one batched decode on the worker pool."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, _transcribe_batch_in_worker, audios, language_code
+        )
+    
+    def pool_stats(self) -> Dict:
+        """Queue depth and wait-time metrics for the transcription pool."""
+        completed = self._stats["completed"]
+        return {
+            "workers": settings.ASR_WORKERS,
+            "executor": settings.ASR_EXECUTOR,
+            "queue_depth": self._pending,
+            "max_queue": settings.ASR_MAX_QUEUE,
+            "completed": completed,
+            "rejected": self._stats["rejected"],
+            "avg_wait_seconds": round(self._stats["total_wait_seconds"] / completed, 4) if completed else 0.0,
+            "max_wait_seconds": round(self._stats["max_wait_seconds"], 4),
+            "avg_run_seconds": round(self._stats["total_run_seconds"] / completed, 4) if completed else 0.0,
+            "batching": self._batcher.stats() if settings.ASR_BATCHING_ENABLED else None,
+            "vad": {
+                "detector": settings.ASR_VAD,
+                "requests": self._vad_stats["requests"],
+                "original_seconds": round(self._vad_stats["original_seconds"], 3),
+                "saved_seconds": round(self._vad_stats["saved_seconds"], 3)
+            }
+        }
+    
+    async def transcribe(
         self,
         audio_data: np.ndarray,
         sample_rate: int = 16000,
         language: Optional[Language] = None
-    ) -> Tuple[str, Language]:
+    ) -> Dict:
         """
-        Transcribe audio to text and detect language.
+        Transcribe audio, skipping silence, and detect language.
+        
+        Leading/trailing silence and long pauses are cut out before decoding
+        and segment timestamps are mapped back onto the original audio.
         
         Args:
             audio_data: numpy array of audio data
@@ -29,44 +309,118 @@ class SpeechRecognitionService:
             language: optional language hint
             
         Returns:
-            Tuple of (transcribed_text, detected_language)
+            Dict with text, language, segments and the VAD report (or None)
         """
         try:
             # Prepare audio for model
             if sample_rate != 16000:
                 audio_data = self._resample_audio(audio_data, sample_rate)
+            audio_data = np.asarray(audio_data, dtype=np.float32)
             
-            # Transcribe with language detection
-            result = self.model.transcribe(
-                audio_data,
-                language=language.value if language else None,
-                task="transcribe",
-                fp16=self.device == "cuda"
-            )
+            trim = None
+            if self.vad is not None:
+                trim = trim_silence(
+                    audio_data,
+                    self.vad,
+                    padding=settings.ASR_VAD_PADDING,
+                    max_pause=settings.ASR_VAD_MAX_PAUSE
+                )
+                report = trim.report()
+                self._vad_stats["requests"] += 1
+                self._vad_stats["original_seconds"] += report["original_seconds"]
+                self._vad_stats["saved_seconds"] += report["saved_seconds"]
+                if not trim.has_speech:
+                    return {
+                        "text": "",
+                        "language": self._detect_language(""),
+                        "segments": [],
+                        "vad": report
+                    }
+                audio_data = trim.audio
+            
+            # Transcribe on the worker pool so the event loop stays free
+            result = await self._run_in_pool(audio_data, language)
             
-            # Detect language if not provided
-            detected_language = self._detect_language(result["text"])
+            segments = result["segments"]
+            if trim is not None:
+                segments = [
+                    {
+                        "start": trim.to_original(segment["start"]),
+                        "end": trim.to_original(segment["end"]),
+                        "text": segment["text"]
+                    }
+                    for segment in segments
+                ]
             
-            return result["text"], detected_language
+            return {
+                "text": result["text"],
+                "language": self._detect_language(result["text"]),
+                "segments": segments,
+                "vad": trim.report() if trim is not None else None
+            }
             
+        except ASRQueueFullError:
+            raise
         except Exception as e:
             logger.error(f"Error in speech recognition: {str(e)}")
             raise
     
-    def _resample_audio(self, audio_data: np.ndarray, target_rate: int) -> np.ndarray:
-        """Resample audio to target sample rate."""
-        if len(audio_data.shape) == 1:
-            audio_data = audio_data.reshape(1, -1)
+    async def transcribe_audio(
+        self,
+        audio_data: np.ndarray,
+        sample_rate: int = 16000,
+        language: Optional[Language] = None
+    ) -> Tuple[str, Language]:
+        """
+        Transcribe audio to text and detect language.
+        
+        Args:
+            audio_data: numpy array of audio data
+            sample_rate: sample rate of audio
+            language: optional language hint
+            
+        Returns:
+            Tuple of (transcribed_text, detected_language)
+        """
+        result = await self.transcribe(audio_data, sample_rate, language)
+        return result["text"], result["language"]
+    
+    async def transcribe_segments(
+        self,
+        audio_data: np.ndarray,
+        language: Optional[Language] = None,
+        prompt: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Transcribe 16 kHz audio and return timestamped segments.
         
-        # Simple linear interpolation for resampling
-        if target_rate != 16000:
-            ratio = 16000 / target_rate
-            new_length = int(len(audio_data[0]) * ratio)
-            indices = np.linspace(0, len(audio_data[0]) - 1, new_length)
-            audio_data = np.interp(indices, np.arange(len(audio_data[0])), audio_data[0])
-            audio_data = audio_data.reshape(1, -1)
+        Args:
+            audio_data: numpy array of 16 kHz audio data
+            language: optional language hint
+            prompt: optional text preceding the audio, used as decoder context
+            
+        Returns:
+            List of {"start", "end", "text"} segments
+        """
+        result = await self._run_in_pool(audio_data, language, prompt=prompt, batchable=False)
+        return result["segments"]
+    
+    def create_stream(self, language: Optional[Language] = None) -> StreamingTranscriber:
+        """Start an incremental transcription stream over 16 kHz audio."""
+        async def decode(audio: np.ndarray, prompt: Optional[str]) -> List[Dict]:
+            return await self.transcribe_segments(audio, language, prompt)
         
-        return audio_data
+        return StreamingTranscriber(
+            decode,
+            vad=self.vad,
+            partial_interval=settings.ASR_STREAM_PARTIAL_INTERVAL,
+            min_silence=settings.ASR_STREAM_MIN_SILENCE,
+            max_segment=settings.ASR_STREAM_MAX_SEGMENT
+        )
+    
+    def _resample_audio(self, audio_data: np.ndarray, source_rate: int) -> np.ndarray:
+        """Resample mono audio from source_rate to Whisper's 16 kHz as float32."""
+        return resample(audio_data, source_rate, whisper.audio.SAMPLE_RATE)
     
     def _detect_language(self, text: str) -> Language:
         """Detect language from text using simple heuristics."""
@@ -87,7 +441,10 @@ class SpeechRecognitionService:
         sample_rate: int = 16000
     ) -> Tuple[str, Language]:
         """
-        Process streaming audio chunks for real-time transcription.
+        Transcribe a list of buffered audio chunks in one pass.
+        
+        For incremental results while audio is still arriving use
+        create_stream instead.
         
         Args:
             audio_chunks: list of audio chunks
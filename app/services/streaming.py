@@ -0,0 +1,156 @@
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.vad import EnergyVAD
+
+logger = logging.getLogger(__name__)
+
+# decode(audio, prompt) -> [{"start": s, "end": s, "text": str}, ...]
+SegmentDecoder = Callable[[np.ndarray, Optional[str]], Awaitable[List[Dict]]]
+
+def pcm16_to_float32(frame: bytes) -> np.ndarray:
+    """Convert little-endian 16-bit PCM bytes to float32 samples in [-1, 1)."""
+    return np.frombuffer(frame, dtype="<i2").astype(np.float32) / 32768.0
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of one audio stream.
+
+    Incoming audio accumulates in a rolling buffer holding only the not yet
+    committed part of the current utterance. Every partial_interval seconds
+    of new speech the buffer is decoded; leading segments that came out the
+    same in two consecutive decodes are committed and their audio dropped
+    from the buffer, so later decodes only cover the unstable tail. A pause
+    of min_silence seconds (or max_segment seconds of audio) closes the
+    utterance with a final transcript.
+    """
+
+    def __init__(
+        self,
+        decode: SegmentDecoder,
+        sample_rate: int = 16000,
+        vad: Optional[EnergyVAD] = None,
+        partial_interval: float = 1.0,
+        min_silence: float = 0.5,
+        max_segment: float = 15.0,
+        pre_roll: float = 0.2
+    ):
+        self.decode = decode
+        self.sample_rate = sample_rate
+        self.vad = vad or EnergyVAD(sample_rate)
+        self.partial_interval = int(partial_interval * sample_rate)
+        self.min_silence = int(min_silence * sample_rate)
+        self.max_segment = int(max_segment * sample_rate)
+        self.pre_roll = int(pre_roll * sample_rate)
+        self._reset(0)
+
+    def _reset(self, offset: int) -> None:
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.offset = offset  # absolute sample index of buffer[0]
+        self.utterance_start = offset
+        self.committed: List[str] = []
+        self.previous: List[str] = []
+        self.in_speech = False
+        self.silence = 0
+        self.since_partial = 0
+        self._vad_remainder = np.zeros(0, dtype=np.float32)
+
+    def _seconds(self, samples: int) -> float:
+        return round(samples / self.sample_rate, 3)
+
+    def _update_vad(self, audio: np.ndarray) -> None:
+        """Track speech onset and trailing silence over whole VAD frames."""
+        audio = np.concatenate([self._vad_remainder, audio])
+        frame_length = self.vad.frame_length
+        usable = len(audio) - len(audio) % frame_length
+        self._vad_remainder = audio[usable:]
+        if not usable:
+            return
+
+        speech = self.vad.speech_frames(audio[:usable])
+        if speech.any():
+            self.in_speech = True
+            last_speech = int(np.flatnonzero(speech)[-1])
+            self.silence = (len(speech) - last_speech - 1) * frame_length
+        else:
+            self.silence += usable
+
+    async def feed(self, audio: np.ndarray) -> List[Dict]:
+        """Add audio and return any partial/final transcript events."""
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        self.buffer = np.concatenate([self.buffer, audio])
+        self._update_vad(audio)
+
+        if not self.in_speech:
+            # Keep only a short pre-roll of leading silence
+            excess = len(self.buffer) - self.pre_roll
+            if excess > 0:
+                self.buffer = self.buffer[excess:]
+                self.offset += excess
+                self.utterance_start = self.offset
+            return []
+
+        self.since_partial += len(audio)
+        if self.silence >= self.min_silence:
+            return await self._finalize()
+        if self.offset + len(self.buffer) - self.utterance_start >= self.max_segment:
+            return await self._finalize()
+        if self.since_partial >= self.partial_interval:
+            return await self._partial()
+        return []
+
+    async def finish(self) -> List[Dict]:
+        """Flush the stream at end of input."""
+        if self.in_speech and len(self.buffer):
+            return await self._finalize()
+        return []
+
+    async def _decode_tail(self) -> List[Dict]:
+        prompt = " ".join(self.committed) or None
+        return await self.decode(self.buffer, prompt)
+
+    async def _partial(self) -> List[Dict]:
+        self.since_partial = 0
+        segments = await self._decode_tail()
+        texts = [segment["text"].strip() for segment in segments]
+
+        # Complete segments agreed on by two consecutive decodes are stable;
+        # the last segment may still be cut mid-word and is never committed
+        stable = 0
+        while (
+            stable < len(texts) - 1
+            and stable < len(self.previous)
+            and texts[stable] == self.previous[stable]
+        ):
+            stable += 1
+
+        if stable:
+            self.committed.extend(texts[:stable])
+            cut = min(int(segments[stable - 1]["end"] * self.sample_rate), len(self.buffer))
+            self.buffer = self.buffer[cut:]
+            self.offset += cut
+            texts = texts[stable:]
+        self.previous = texts
+
+        return [{
+            "type": "partial",
+            "text": " ".join(self.committed + texts).strip(),
+            "stable_text": " ".join(self.committed).strip(),
+            "start": self._seconds(self.utterance_start),
+            "end": self._seconds(self.offset + len(self.buffer))
+        }]
+
+    async def _finalize(self) -> List[Dict]:
+        segments = await self._decode_tail()
+        texts = self.committed + [segment["text"].strip() for segment in segments]
+        end = self.offset + len(self.buffer)
+        event = {
+            "type": "final",
+            "text": " ".join(texts).strip(),
+            "start": self._seconds(self.utterance_start),
+            "end": self._seconds(end)
+        }
+        self._reset(end)
+        return [event] if event["text"] else []
@@ -1,21 +1,201 @@
 import os
+import asyncio
 import logging
-from typing import Optional
-import requests
+import random
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Optional, Tuple, Union
+import httpx
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
 from app.models.database import Language
+from app.services.audio_cache import AudioCache
+from app.services.chunking import SENTENCE_BOUNDARY
 
 logger = logging.getLogger(__name__)
 
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+async def stream_sentences(tokens: AsyncIterable[str], min_chars: int = 0) -> AsyncIterator[str]:
+    """
+    Group streamed text into sentences as soon as each one is complete.
+    
+    Uses the same sentence ends that get SSML breaks (plus the Devanagari
+    danda), so synthesis can start on the first sentence while the rest is
+    generated. Sentences shorter than min_chars are merged into the next
+    one so interjections like "Yes." do not cost a request of their own.
+    """
+    buffer = ""
+    pending = ""
+    async for token in tokens:
+        buffer += token
+        *complete, buffer = SENTENCE_BOUNDARY.split(buffer)
+        for sentence in complete:
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            pending = f"{pending} {sentence}" if pending else sentence
+            if len(pending) >= min_chars:
+                yield pending
+                pending = ""
+    rest = " ".join(part for part in (pending, buffer.strip()) if part)
+    if rest:
+        yield rest
+
+async def _iterate(items: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
 class TextToSpeechService:
-    def __init__(self):
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        audio_cache: Optional[AudioCache] = None,
+        max_retry_delay: Optional[float] = None
+    ):
         self.api_key = settings.RESEMBLE_AI_API_KEY
-        self.base_url = "https://api.resemble.ai/v1"
+        self.base_url = settings.TTS_BASE_URL
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.max_concurrency = max_concurrency or settings.TTS_MAX_CONCURRENCY
+        self.max_retries = settings.TTS_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = settings.TTS_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.max_retry_delay = (
+            settings.TTS_RETRY_MAX_DELAY if max_retry_delay is None else max_retry_delay
+        )
+        self.audio_cache = audio_cache
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use inside the event loop."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=httpx.Timeout(
+                    settings.TTS_TIMEOUT, connect=settings.TTS_CONNECT_TIMEOUT
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.TTS_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.TTS_MAX_CONNECTIONS
+                ),
+                transport=self._transport
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """
+        Honour Retry-After, otherwise exponential backoff with full jitter.
+        
+        Either way the delay is capped at max_retry_delay, so an upstream
+        asking for a long wait cannot stall the request.
+        """
+        delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+        if response is not None and "Retry-After" in response.headers:
+            try:
+                delay = max(0.0, float(response.headers["Retry-After"]))
+            except ValueError:
+                pass
+        return min(delay, self.max_retry_delay)
+    
+    async def _post(self, path: str, payload: Dict, retry: bool = True) -> httpx.Response:
+        """
+        POST to the TTS API with bounded concurrency and retries.
+        
+        429 and 5xx responses and transport errors are retried up to
+        max_retries times; the last response or error is surfaced. Pass
+        retry=False for requests that are not idempotent, such as
+        creating a voice, which a retry could create twice.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        max_retries = self.max_retries if retry else 0
+        for attempt in range(max_retries + 1):
+            response = None
+            async with self._semaphore:
+                try:
+                    response = await self.client.post(path, json=payload)
+                except httpx.TransportError as e:
+                    if attempt == max_retries:
+                        raise
+                    logger.warning(f"TTS request to {path} failed: {str(e)}")
+            
+            if response is not None and (
+                response.status_code not in RETRYABLE_STATUS_CODES
+                or attempt == max_retries
+            ):
+                return response
+            
+            delay = self._retry_delay(attempt, response)
+            logger.warning(
+                f"Retrying TTS request to {path} in {delay:.2f}s "
+                f"(attempt {attempt + 1}/{max_retries})"
+            )
+            await asyncio.sleep(delay)
+        
+    def _speech_request(
+        self,
+        text: str,
+        language: Optional[Language],
+        voice_id: Optional[str],
+        speed: float,
+        pitch: float
+    ) -> Tuple[Dict, Optional[str]]:
+        """Build the synthesis payload and its audio cache key, if caching."""
+        # Add SSML tags for better prosody
+        ssml_text = self._add_ssml_tags(text, language)
+        
+        payload = {
+            "text": ssml_text,
+            "voice_id": voice_id or self._get_default_voice(language),
+            "speed": speed,
+            "pitch": pitch
+        }
         
+        cache_key = None
+        if self.audio_cache is not None:
+            cache_key = AudioCache.key(
+                ssml_text,
+                payload["voice_id"],
+                speed,
+                pitch,
+                language.value if language else None
+            )
+        return payload, cache_key
+    
+    async def _synthesise(self, payload: Dict, cache_key: Optional[str]) -> bytes:
+        """Call the API and store the audio under cache_key."""
+        response = await self._post("/speech", payload)
+        
+        if response.status_code != 200:
+            raise Exception(f"TTS API error: {response.text}")
+        
+        if cache_key is not None:
+            try:
+                await run_in_threadpool(self.audio_cache.put, cache_key, response.content)
+            except OSError as e:
+                logger.warning(f"Could not cache synthesised audio: {str(e)}")
+        
+        return response.content
+    
     async def generate_speech(
         self,
         text: str,
@@ -38,33 +218,143 @@ class TextToSpeechService:
             Audio data as bytes
         """
         try:
-            # Add SSML tags for better prosody
-            ssml_text = self._add_ssml_tags(text, language)
+            payload, cache_key = self._speech_request(text, language, voice_id, speed, pitch)
             
-            # Prepare request payload
-            payload = {
-                "text": ssml_text,
-                "voice_id": voice_id or self._get_default_voice(language),
-                "speed": speed,
-                "pitch": pitch
-            }
+            # Repeated phrases are served from disk without an API call
+            if cache_key is not None:
+                cached = await run_in_threadpool(self.audio_cache.get, cache_key)
+                if cached is not None:
+                    return cached
             
-            # Make API request
-            response = requests.post(
-                f"{self.base_url}/speech",
-                headers=self.headers,
-                json=payload
-            )
+            return await self._synthesise(payload, cache_key)
             
-            if response.status_code != 200:
-                raise Exception(f"TTS API error: {response.text}")
+        except Exception as e:
+            logger.error(f"Error generating speech: {str(e)}")
+            raise
+    
+    async def speech_file(
+        self,
+        text: str,
+        language: Optional[Language] = None,
+        voice_id: Optional[str] = None,
+        speed: float = 1.0,
+        pitch: float = 1.0
+    ) -> Union[Path, bytes]:
+        """
+        Like generate_speech, but a cache hit is returned as the file's path.
+        
+        Lets an endpoint send cached audio straight from disk instead of
+        reading it into memory first.
+        
+        Returns:
+            Path of the cached audio, or the synthesised bytes on a miss
+        """
+        try:
+            payload, cache_key = self._speech_request(text, language, voice_id, speed, pitch)
+            
+            if cache_key is not None:
+                path = await run_in_threadpool(self.audio_cache.lookup, cache_key)
+                if path is not None:
+                    return path
             
-            return response.content
+            return await self._synthesise(payload, cache_key)
             
         except Exception as e:
             logger.error(f"Error generating speech: {str(e)}")
             raise
     
+    async def prewarm(
+        self,
+        phrases: Iterable[str],
+        language: Optional[Language] = None,
+        voice_id: Optional[str] = None
+    ) -> int:
+        """
+        Synthesise common phrases ahead of time so they hit the audio cache.
+        
+        Args:
+            phrases: Phrases to synthesise
+            language: Language of the phrases
+            voice_id: Optional voice ID to use
+            
+        Returns:
+            Number of phrases that were synthesised or already cached
+        """
+        results = await asyncio.gather(
+            *[
+                self.generate_speech(phrase, language=language, voice_id=voice_id)
+                for phrase in phrases
+            ],
+            return_exceptions=True
+        )
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            logger.warning(f"Failed to pre-warm {len(failed)} of {len(results)} phrases")
+        return len(results) - len(failed)
+    
+    async def stream_speech(
+        self,
+        sentences: Union[Iterable[str], AsyncIterable[str]],
+        language: Optional[Language] = None,
+        voice_id: Optional[str] = None,
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        parallelism: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, bytes]]:
+        """
+        Synthesise sentences concurrently and yield their audio in order.
+        
+        Up to `parallelism` sentences are synthesised ahead of the one being
+        yielded, so the first audio is ready after one sentence rather than
+        the whole text. Sentences may come from an async iterator that is
+        still producing them.
+        
+        Args:
+            sentences: Sentences to speak, in order
+            language: Language of the text
+            voice_id: Optional voice ID to use
+            speed: Speech speed multiplier
+            pitch: Speech pitch multiplier
+            parallelism: Sentences in flight, defaults to TTS_STREAM_PARALLELISM
+            
+        Yields:
+            Tuples of (sentence, audio bytes)
+        """
+        slots = asyncio.Semaphore(parallelism or settings.TTS_STREAM_PARALLELISM)
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def synthesise(sentence: str) -> Tuple[str, bytes]:
+            audio = await self.generate_speech(
+                sentence, language=language, voice_id=voice_id, speed=speed, pitch=pitch
+            )
+            return sentence, audio
+        
+        async def produce() -> None:
+            try:
+                async for sentence in _iterate(sentences):
+                    await slots.acquire()
+                    queue.put_nowait(asyncio.create_task(synthesise(sentence)))
+            finally:
+                queue.put_nowait(None)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                task = await queue.get()
+                if task is None:
+                    break
+                result = await task
+                slots.release()
+                yield result
+            # Surface errors raised while producing sentences
+            await producer
+        finally:
+            producer.cancel()
+            while not queue.empty():
+                task = queue.get_nowait()
+                if task is not None:
+                    task.cancel()
+    
     def _add_ssml_tags(self, text: str, language: Optional[Language] = None) -> str:
         """Add SSML tags for better prosody."""
         # Add pauses between sentences
@@ -126,12 +416,8 @@ class TextToSpeechService:
                 ]
             }
             
-            # Make API request
-            response = requests.post(
-                f"{self.base_url}/voices",
-                headers=self.headers,
-                json=payload
-            )
+            # Make API request; a retried POST could create the voice twice
+            response = await self._post("/voices", payload, retry=False)
             
             if response.status_code != 200:
                 raise Exception(f"Voice cloning API error: {response.text}")
@@ -0,0 +1,169 @@
+import importlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Protocol, Tuple
+
+import numpy as np
+
+class VoiceActivityDetector(Protocol):
+    """Anything that labels fixed-length frames as speech or not."""
+
+    sample_rate: int
+    frame_length: int
+
+    def speech_frames(self, audio: np.ndarray) -> np.ndarray:
+        ...
+
+class EnergyVAD:
+    """
+    Frame-level voice activity detection from short-time energy and
+    zero-crossing rate.
+
+    Audio is cut into fixed-length frames. A frame counts as speech when its
+    RMS level is above threshold_db (dB relative to full scale), or when it
+    is within zcr_margin_db of the threshold and has a high zero-crossing
+    rate, which catches quiet unvoiced consonants such as "s" and "sh".
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        threshold_db: float = -40.0,
+        zcr_threshold: float = 0.25,
+        zcr_margin_db: float = 10.0
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.zcr_threshold = zcr_threshold
+        self.zcr_margin_db = zcr_margin_db
+
+    def frames(self, audio: np.ndarray) -> np.ndarray:
+        """View audio as (n_frames, frame_length), dropping the ragged tail."""
+        n_frames = len(audio) // self.frame_length
+        return audio[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+
+    def frame_levels_db(self, audio: np.ndarray) -> np.ndarray:
+        """RMS level of each frame in dBFS."""
+        frames = self.frames(np.asarray(audio, dtype=np.float32))
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        return 20 * np.log10(np.maximum(rms, 1e-10))
+
+    def zero_crossing_rates(self, audio: np.ndarray) -> np.ndarray:
+        """Fraction of adjacent sample pairs in each frame that change sign."""
+        signs = np.signbit(self.frames(np.asarray(audio, dtype=np.float32)))
+        return np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    def speech_frames(self, audio: np.ndarray) -> np.ndarray:
+        """Boolean speech/non-speech decision per frame."""
+        levels = self.frame_levels_db(audio)
+        voiced = levels > self.threshold_db
+        unvoiced = (
+            (levels > self.threshold_db - self.zcr_margin_db)
+            & (self.zero_crossing_rates(audio) > self.zcr_threshold)
+        )
+        return voiced | unvoiced
+
+def create_vad(
+    name: str,
+    sample_rate: int = 16000,
+    threshold_db: float = -40.0
+) -> Optional[VoiceActivityDetector]:
+    """
+    Build a VAD by name.
+
+    "energy" is the built-in detector and "none" disables VAD. Any other
+    value is a "module:Class" path to a model-based detector implementing
+    VoiceActivityDetector, constructed with sample_rate.
+    """
+    if name == "none":
+        return None
+    if name == "energy":
+        return EnergyVAD(sample_rate, threshold_db=threshold_db)
+
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown VAD {name!r}, expected 'energy', 'none' or 'module:Class'")
+    return getattr(importlib.import_module(module_name), class_name)(sample_rate=sample_rate)
+
+@dataclass
+class TrimResult:
+    """Audio with silence removed and the map back to original time."""
+
+    audio: np.ndarray
+    sample_rate: int
+    original_samples: int
+    # (original_start, original_end, trimmed_start) in samples per kept region
+    regions: List[Tuple[int, int, int]] = field(default_factory=list)
+
+    @property
+    def has_speech(self) -> bool:
+        return bool(self.regions)
+
+    def to_original(self, seconds: float) -> float:
+        """Map a time in the trimmed audio back to the original audio."""
+        if not self.regions:
+            return seconds
+        sample = seconds * self.sample_rate
+        starts = [trimmed_start for _, _, trimmed_start in self.regions]
+        i = max(int(np.searchsorted(starts, sample, side="right")) - 1, 0)
+        original_start, original_end, trimmed_start = self.regions[i]
+        original = original_start + (sample - trimmed_start)
+        return round(min(original, original_end) / self.sample_rate, 3)
+
+    def report(self) -> Dict[str, float]:
+        """Audio seconds before and after trimming."""
+        original = self.original_samples / self.sample_rate
+        trimmed = len(self.audio) / self.sample_rate
+        return {
+            "original_seconds": round(original, 3),
+            "trimmed_seconds": round(trimmed, 3),
+            "saved_seconds": round(original - trimmed, 3)
+        }
+
+def trim_silence(
+    audio: np.ndarray,
+    vad: VoiceActivityDetector,
+    padding: float = 0.2,
+    max_pause: float = 0.5
+) -> TrimResult:
+    """
+    Cut leading/trailing silence and internal pauses longer than max_pause.
+
+    Speech regions are widened by padding seconds on each side so word
+    edges are not clipped; regions separated by at most max_pause seconds
+    are merged, longer pauses are dropped.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    speech = vad.speech_frames(audio)
+    result = TrimResult(audio[:0], vad.sample_rate, len(audio))
+    if not speech.any():
+        return result
+
+    frame_length = vad.frame_length
+    pad = int(round(padding * vad.sample_rate / frame_length))
+    if pad:
+        speech = np.convolve(speech, np.ones(2 * pad + 1), mode="same") > 0
+
+    edges = np.diff(np.concatenate([[0], speech.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1) * frame_length
+    ends = np.flatnonzero(edges == -1) * frame_length
+    if ends[-1] == len(speech) * frame_length:
+        ends[-1] = len(audio)  # keep the ragged tail after the last frame
+
+    max_gap = int(max_pause * vad.sample_rate)
+    merged = [[starts[0], ends[0]]]
+    for start, end in zip(starts[1:], ends[1:]):
+        if start - merged[-1][1] <= max_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    pieces = []
+    trimmed_start = 0
+    for start, end in merged:
+        result.regions.append((int(start), int(end), trimmed_start))
+        pieces.append(audio[start:end])
+        trimmed_start += end - start
+    result.audio = pieces[0] if len(pieces) == 1 else np.concatenate(pieces)
+    return result
@@ -0,0 +1,376 @@
+import faiss
+import numpy as np
+import os
+import logging
+import tempfile
+from typing import Dict, Optional, Sequence, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+FLAT = "flat"
+IVF_FLAT = "ivf_flat"
+IVF_PQ = "ivf_pq"
+HNSW = "hnsw"
+
+INDEX_TYPES = (FLAT, IVF_FLAT, IVF_PQ, HNSW)
+
+def create_faiss_index(dimension: int, index_type: str) -> faiss.Index:
+    """Build an empty faiss index of the given type, wrapped for external IDs."""
+    if index_type == FLAT:
+        index = faiss.IndexFlatL2(dimension)
+    elif index_type == IVF_FLAT:
+        index = faiss.IndexIVFFlat(
+            faiss.IndexFlatL2(dimension), dimension, settings.VECTOR_IVF_NLIST
+        )
+    elif index_type == IVF_PQ:
+        index = faiss.IndexIVFPQ(
+            faiss.IndexFlatL2(dimension),
+            dimension,
+            settings.VECTOR_IVF_NLIST,
+            settings.VECTOR_PQ_M,
+            settings.VECTOR_PQ_NBITS
+        )
+    elif index_type == HNSW:
+        index = faiss.IndexHNSWFlat(dimension, settings.VECTOR_HNSW_M)
+        index.hnsw.efConstruction = settings.VECTOR_HNSW_EF_CONSTRUCTION
+    else:
+        raise ValueError(
+            f"Unknown vector index type {index_type!r}, expected one of {INDEX_TYPES}"
+        )
+    return faiss.IndexIDMap2(index)
+
+def index_type_of(index: faiss.Index) -> str:
+    """Infer the index type of an ID-mapped faiss index."""
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return IVF_PQ
+    if isinstance(inner, faiss.IndexIVFFlat):
+        return IVF_FLAT
+    if isinstance(inner, faiss.IndexHNSWFlat):
+        return HNSW
+    return FLAT
+
+def min_training_size(index_type: str) -> int:
+    """Number of vectors needed before an index of this type can be trained."""
+    if index_type == IVF_FLAT:
+        return settings.VECTOR_IVF_NLIST
+    if index_type == IVF_PQ:
+        return max(settings.VECTOR_IVF_NLIST, 2 ** settings.VECTOR_PQ_NBITS)
+    return 0
+
+class VectorIndex:
+    """
+    faiss index keyed by external IDs with a uniform add/remove/search API.
+
+    IVF indexes must be trained before vectors are added. HNSW graphs do
+    not support removal, so deleted IDs are kept as tombstones, excluded
+    from search results and dropped on the next rebuild or when one of
+    them is added again.
+    """
+
+    def __init__(self, index: faiss.Index, deleted: Optional[np.ndarray] = None):
+        self.index = index
+        self.index_type = index_type_of(index)
+        self.deleted = set() if deleted is None else set(deleted.tolist())
+        self.nprobe = settings.VECTOR_IVF_NPROBE
+        self.ef_search = settings.VECTOR_HNSW_EF_SEARCH
+
+    @classmethod
+    def create(cls, dimension: int, index_type: Optional[str] = None) -> "VectorIndex":
+        """Create an empty index, by default of the configured type."""
+        return cls(create_faiss_index(dimension, index_type or settings.VECTOR_INDEX_TYPE))
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """Load an index and its tombstones from disk."""
+        index = faiss.read_index(path)
+        if not isinstance(index, faiss.IndexIDMap2):
+            raise ValueError("Index has no ID mapping")
+
+        deleted = None
+        if os.path.exists(cls._tombstone_path(path)):
+            deleted = np.load(cls._tombstone_path(path))
+        return cls(index, deleted)
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Copy the serialised index and its tombstones for write()."""
+        return (
+            faiss.serialize_index(self.index),
+            np.array(sorted(self.deleted), dtype=np.int64)
+        )
+
+    @classmethod
+    def write(cls, path: str, snapshot: Tuple[np.ndarray, np.ndarray]) -> None:
+        """Atomically write a snapshot and its tombstones."""
+        data, deleted = snapshot
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".faiss")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data.tobytes())
+        os.replace(tmp_path, path)
+        if len(deleted):
+            np.save(cls._tombstone_path(path), deleted)
+        elif os.path.exists(cls._tombstone_path(path)):
+            os.remove(cls._tombstone_path(path))
+
+    def save(self, path: str) -> None:
+        """Persist the index and its tombstones."""
+        self.write(path, self.snapshot())
+
+    @staticmethod
+    def _tombstone_path(path: str) -> str:
+        return f"{path}.deleted.npy"
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal - len(self.deleted)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.index.is_trained
+
+    def train(self, embeddings: np.ndarray) -> None:
+        """Train the coarse quantizer / codebooks from corpus embeddings."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if len(embeddings) < min_training_size(self.index_type):
+            raise ValueError(
+                f"{self.index_type} needs at least {min_training_size(self.index_type)} "
+                f"training vectors, got {len(embeddings)}"
+            )
+        self.index.train(embeddings)
+
+    def add(self, ids: np.ndarray, embeddings: np.ndarray) -> None:
+        """Add vectors under the given IDs."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.deleted and not self.deleted.isdisjoint(ids.tolist()):
+            # Tombstones are per ID, so lifting one would revive the old vector
+            self.compact()
+        self.index.add_with_ids(np.ascontiguousarray(embeddings, dtype=np.float32), ids)
+
+    def compact(self) -> None:
+        """
+        Rebuild an HNSW graph without its tombstoned vectors.
+
+        Costs a full re-insert, so it only runs when a deleted ID is reused;
+        chunk IDs normally only grow.
+        """
+        if not self.deleted:
+            return
+        ids = faiss.vector_to_array(self.index.id_map).astype(np.int64)
+        keep = ~np.isin(ids, np.fromiter(self.deleted, dtype=np.int64))
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)[keep]
+        index = create_faiss_index(self.index.d, self.index_type)
+        index.add_with_ids(vectors, ids[keep])
+        self.index = index
+        self.deleted.clear()
+
+    def remove(self, ids: np.ndarray) -> int:
+        """Remove vectors by ID, tombstoning them where the index cannot."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.index_type != HNSW:
+            return self.index.remove_ids(ids)
+
+        live = np.intersect1d(ids, self.ids())
+        self.deleted.update(live.tolist())
+        return len(live)
+
+    def ids(self) -> np.ndarray:
+        """Return the live IDs held by the index."""
+        ids = faiss.vector_to_array(self.index.id_map).astype(np.int64)
+        if self.deleted:
+            ids = ids[~np.isin(ids, np.fromiter(self.deleted, dtype=np.int64))]
+        return ids
+
+    def search_params(self, selector: Optional[faiss.IDSelector] = None):
+        """Build per-type search parameters (nprobe / efSearch / filtering)."""
+        if self.deleted:
+            tombstones = faiss.IDSelectorBatch(np.fromiter(self.deleted, dtype=np.int64))
+            not_deleted = faiss.IDSelectorNot(tombstones)
+            # Keep the wrapped selectors alive for the duration of the search
+            not_deleted.referenced_objects = [tombstones]
+            if selector is not None:
+                combined = faiss.IDSelectorAnd(selector, not_deleted)
+                combined.referenced_objects = [selector, not_deleted]
+                selector = combined
+            else:
+                selector = not_deleted
+
+        if self.index_type in (IVF_FLAT, IVF_PQ):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        if self.index_type == HNSW:
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        if selector is not None:
+            return faiss.SearchParameters(sel=selector)
+        return None
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        selector: Optional[faiss.IDSelector] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search for the top_k nearest IDs of each query row."""
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        params = self.search_params(selector)
+        if params is None:
+            return self.index.search(queries, top_k)
+        return self.index.search(queries, top_k, params=params)
+
+class IdFilter:
+    """
+    Per-attribute membership masks over vector IDs for filtered search.
+
+    Each (field, value) pair, e.g. ("language", "hi"), owns a boolean mask
+    indexed by vector ID. A query's filters are AND-ed into a bitmap that
+    faiss checks during the search itself, so every returned ID matches.
+    mask() exposes the same combination for the lexical index.
+    """
+
+    def __init__(self):
+        self._masks: Dict[Tuple[str, str], np.ndarray] = {}
+        self._selectors: Dict[Tuple, faiss.IDSelector] = {}
+        self._combined: Dict[Tuple, np.ndarray] = {}
+
+    def add(self, ids: np.ndarray, **attributes: Sequence) -> None:
+        """Record attribute values for IDs, one value per ID per field."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        for field, values in attributes.items():
+            values = np.array([self._key(v) for v in values], dtype=object)
+            for value in set(values.tolist()):
+                mask = self._mask(field, value, int(ids.max()) + 1)
+                mask[ids[values == value]] = True
+        self._selectors.clear()
+        self._combined.clear()
+
+    def remove(self, ids: np.ndarray) -> None:
+        """Forget every attribute of the given IDs."""
+        ids = np.asarray(ids, dtype=np.int64)
+        for mask in self._masks.values():
+            mask[ids[ids < len(mask)]] = False
+        self._selectors.clear()
+        self._combined.clear()
+
+    def update(self, ids: np.ndarray, **attributes: Sequence) -> None:
+        """Replace the attributes of existing IDs."""
+        self.remove(ids)
+        self.add(ids, **attributes)
+
+    def _active(self, filters: Dict) -> Tuple:
+        return tuple(sorted(
+            (field, self._key(value)) for field, value in filters.items()
+            if value is not None
+        ))
+
+    def selector(self, **filters) -> Optional[faiss.IDSelector]:
+        """Build (or reuse) a selector for the non-None filters."""
+        active = self._active(filters)
+        if not active:
+            return None
+        if active not in self._selectors:
+            self._selectors[active] = self._build_selector(active)
+        return self._selectors[active]
+
+    def mask(self, **filters) -> Optional[np.ndarray]:
+        """Boolean mask by ID of what matches every non-None filter."""
+        active = self._active(filters)
+        if not active:
+            return None
+        if active not in self._combined:
+            self._combined[active] = self._combine(active)
+        return self._combined[active]
+
+    def _combine(self, active: Tuple) -> np.ndarray:
+        masks = [self._masks.get(key, np.zeros(0, dtype=bool)) for key in active]
+        length = min(len(mask) for mask in masks)
+        combined = np.ones(length, dtype=bool)
+        for mask in masks:
+            combined &= mask[:length]
+        return combined
+
+    def _build_selector(self, active: Tuple) -> faiss.IDSelector:
+        bitmap = np.packbits(self._combine(active), bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        # The selector only borrows the bitmap buffer
+        selector.referenced_objects = [bitmap]
+        return selector
+
+    def _mask(self, field: str, value: str, size: int) -> np.ndarray:
+        mask = self._masks.get((field, value))
+        if mask is None:
+            mask = self._masks[(field, value)] = np.zeros(size, dtype=bool)
+        elif len(mask) < size:
+            grown = np.zeros(max(size, 2 * len(mask)), dtype=bool)
+            grown[:len(mask)] = mask
+            mask = self._masks[(field, value)] = grown
+        return mask
+
+    @staticmethod
+    def _key(value) -> str:
+        return str(getattr(value, "value", value))
+
+def encode_embedding(embedding: np.ndarray) -> bytes:
+    """Serialise a vector for DocumentChunk.embedding."""
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+def decode_embeddings(blobs: Sequence[bytes]) -> np.ndarray:
+    """Decode stored vectors into a float32 matrix with one frombuffer call."""
+    if not blobs:
+        return np.empty((0, 0), dtype=np.float32)
+    matrix = np.frombuffer(b"".join(blobs), dtype=np.float32)
+    return matrix.reshape(len(blobs), -1)
+
+def load_corpus_embeddings(
+    db: Session,
+    batch_size: int = 10000
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load every stored chunk ID and embedding as (ids, float32 matrix).
+
+    Rows are streamed in batches and each batch is decoded in one call
+    straight into a preallocated matrix.
+    """
+    stored = DocumentChunk.embedding.isnot(None)
+    total = db.scalar(select(func.count()).select_from(DocumentChunk).where(stored))
+    if not total:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+
+    ids = np.empty(total, dtype=np.int64)
+    embeddings = None
+    filled = 0
+    rows = db.execute(
+        select(DocumentChunk.id, DocumentChunk.embedding)
+        .where(stored)
+        .order_by(DocumentChunk.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for batch in rows.partitions():
+        # Rows added since the count are picked up by the next reconcile
+        batch = batch[:total - filled]
+        decoded = decode_embeddings([row[1] for row in batch])
+        if embeddings is None:
+            embeddings = np.empty((total, decoded.shape[1]), dtype=np.float32)
+        ids[filled:filled + len(batch)] = [row[0] for row in batch]
+        embeddings[filled:filled + len(batch)] = decoded
+        filled += len(batch)
+        if filled == total:
+            break
+    rows.close()
+    if embeddings is None:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+    return ids[:filled], embeddings[:filled]
+
+def recall_at_k(ground_truth: np.ndarray, results: np.ndarray) -> float:
+    """Fraction of true top-k neighbours found in approximate results."""
+    hits = sum(
+        len(np.intersect1d(truth[truth != -1], found[found != -1]))
+        for truth, found in zip(ground_truth, results)
+    )
+    total = sum(int((truth != -1).sum()) for truth in ground_truth)
+    return hits / total if total else 1.0
@@ -0,0 +1,67 @@
+import argparse
+import glob
+import time
+import numpy as np
+import soundfile as sf
+
+from app.services.speech_recognition import (
+    _init_worker, _transcribe_batch_in_worker, _transcribe_in_worker
+)
+
+def load_clips(args) -> list:
+    """Load 16 kHz mono clips from a directory, or synthesise short utterances."""
+    if args.audio_dir:
+        clips = []
+        for path in sorted(glob.glob(f"{args.audio_dir}/*.wav"))[:args.clips]:
+            audio, sample_rate = sf.read(path, dtype="float32")
+            if audio.ndim > 1:
+                audio = audio.mean(axis=1)
+            if sample_rate != 16000:
+                raise ValueError(f"{path} is {sample_rate} Hz, expected 16000")
+            clips.append(audio)
+        return clips
+
+    rng = np.random.default_rng(0)
+    clips = []
+    for _ in range(args.clips):
+        duration = rng.uniform(1.0, 5.0)
+        t = np.arange(int(16000 * duration)) / 16000
+        tone = 0.3 * np.sin(2 * np.pi * rng.uniform(150, 400) * t)
+        clips.append((tone + 0.01 * rng.standard_normal(len(t))).astype(np.float32))
+    return clips
+
+def main():
+    """Compare one-at-a-time transcription with batched decoding on CPU."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--clips", type=int, default=16)
+    parser.add_argument("--audio-dir", default=None)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--torch-threads", type=int, default=0)
+    args = parser.parse_args()
+
+    _init_worker(args.model, args.torch_threads)
+    clips = load_clips(args)
+    audio_seconds = sum(len(clip) for clip in clips) / 16000
+    print(f"{len(clips)} clips, {audio_seconds:.1f}s of audio, model={args.model}")
+
+    # Warm up so model initialisation is not timed
+    _transcribe_batch_in_worker(clips[:1], args.language)
+
+    started = time.perf_counter()
+    for clip in clips:
+        _transcribe_in_worker(clip, args.language)
+    elapsed = time.perf_counter() - started
+    print(f"{'sequential':<12} {len(clips) / elapsed:>8.2f} clips/s  {elapsed:>7.2f}s")
+
+    for batch_size in args.batch_sizes:
+        started = time.perf_counter()
+        for start in range(0, len(clips), batch_size):
+            _transcribe_batch_in_worker(clips[start:start + batch_size], args.language)
+        elapsed = time.perf_counter() - started
+        label = f"batch={batch_size}"
+        print(f"{label:<12} {len(clips) / elapsed:>8.2f} clips/s  {elapsed:>7.2f}s")
+
+if __name__ == "__main__":
+    main()
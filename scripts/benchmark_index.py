@@ -0,0 +1,84 @@
+import argparse
+import time
+import numpy as np
+
+from app.services.vector_index import (
+    FLAT, HNSW, IVF_FLAT, IVF_PQ, VectorIndex, recall_at_k
+)
+
+# Search-time knobs swept for each index type
+SWEEPS = {
+    IVF_FLAT: ("nprobe", [1, 4, 16, 64]),
+    IVF_PQ: ("nprobe", [1, 4, 16, 64]),
+    HNSW: ("ef_search", [16, 32, 64, 128]),
+}
+
+def load_embeddings(args) -> np.ndarray:
+    """Load corpus embeddings from the database or generate synthetic ones."""
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        return rng.standard_normal((args.synthetic, args.dimension)).astype(np.float32)
+
+    from app.core.database import SessionLocal
+    from app.services.vector_index import load_corpus_embeddings
+
+    db = SessionLocal()
+    try:
+        _, embeddings = load_corpus_embeddings(db)
+    finally:
+        db.close()
+    return embeddings
+
+def time_search(index: VectorIndex, queries: np.ndarray, k: int):
+    """Search one query at a time, as the chat path does, and time it."""
+    results = np.empty((len(queries), k), dtype=np.int64)
+    started = time.perf_counter()
+    for i, query in enumerate(queries):
+        _, ids = index.search(query[None, :], k)
+        results[i] = ids[0]
+    elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    return results, elapsed_ms
+
+def main():
+    """Report recall@k and per-query latency of ANN indexes against flat search."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="use N random vectors instead of the stored corpus")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=[IVF_FLAT, IVF_PQ, HNSW])
+    args = parser.parse_args()
+
+    embeddings = load_embeddings(args)
+    ids = np.arange(len(embeddings), dtype=np.int64)
+    rng = np.random.default_rng(1)
+    queries = embeddings[rng.choice(len(embeddings), args.queries, replace=False)]
+    queries = queries + 0.01 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    flat = VectorIndex.create(embeddings.shape[1], FLAT)
+    flat.add(ids, embeddings)
+    ground_truth, flat_ms = time_search(flat, queries, args.k)
+
+    print(f"{len(embeddings)} vectors, {args.queries} queries, k={args.k}")
+    print(f"{'index':<10} {'param':<14} {'recall@k':>9} {'ms/query':>9}")
+    print(f"{FLAT:<10} {'-':<14} {1.0:>9.3f} {flat_ms:>9.3f}")
+
+    for index_type in args.types:
+        started = time.perf_counter()
+        index = VectorIndex.create(embeddings.shape[1], index_type)
+        if not index.is_trained:
+            index.train(embeddings)
+        index.add(ids, embeddings)
+        build_s = time.perf_counter() - started
+
+        param, values = SWEEPS[index_type]
+        for value in values:
+            setattr(index, param, value)
+            results, ms = time_search(index, queries, args.k)
+            recall = recall_at_k(ground_truth, results)
+            print(f"{index_type:<10} {f'{param}={value}':<14} {recall:>9.3f} {ms:>9.3f}")
+        print(f"{index_type:<10} built in {build_s:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import time
+import numpy as np
+
+from app.services.lexical_index import LexicalIndex
+
+def synthetic_corpus(documents: int, vocabulary: int, length: int, seed: int = 0):
+    """Documents of Zipf-distributed words, like natural text."""
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}x" for i in range(vocabulary)]
+    for _ in range(documents):
+        ranks = np.minimum(rng.zipf(1.2, length), vocabulary) - 1
+        yield " ".join(words[rank] for rank in ranks)
+
+def main():
+    """Time BM25 indexing and queries on a synthetic corpus."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--length", type=int, default=60, help="words per document")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    index = LexicalIndex()
+    started = time.perf_counter()
+    batch = 10_000
+    texts = []
+    for i, text in enumerate(synthetic_corpus(args.documents, args.vocabulary, args.length)):
+        texts.append(text)
+        if len(texts) == batch:
+            index.add(np.arange(i + 1 - batch, i + 1), texts)
+            texts = []
+    if texts:
+        index.add(np.arange(args.documents - len(texts), args.documents), texts)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Indexed {index.documents} documents in {elapsed:.1f} s "
+        f"({index.terms} terms, {index.postings} postings, "
+        f"{index.postings * 10 / 2 ** 20:.0f} MiB of postings)"
+    )
+
+    # Queries mix mid-frequency and rare terms, as real questions do
+    rng = np.random.default_rng(1)
+    queries = [
+        " ".join(f"w{rank}x" for rank in rng.integers(100, args.vocabulary, 4))
+        for _ in range(args.queries)
+    ]
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, args.top_k)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings = np.array(timings)
+    print(
+        f"Query latency: p50 {np.percentile(timings, 50):.3f} ms, "
+        f"p95 {np.percentile(timings, 95):.3f} ms, max {timings.max():.3f} ms"
+    )
+
+if __name__ == "__main__":
+    main()
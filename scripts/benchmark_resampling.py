@@ -0,0 +1,46 @@
+import argparse
+import time
+import numpy as np
+from scipy.signal import resample_poly
+
+from app.services.resampling import resample
+
+def linear_resample(audio: np.ndarray, source_rate: int) -> np.ndarray:
+    """The previous np.interp resampler, for comparison."""
+    new_length = int(len(audio) * 16000 / source_rate)
+    indices = np.linspace(0, len(audio) - 1, new_length)
+    return np.interp(indices, np.arange(len(audio)), audio)
+
+def time_per_call(fn, repeats: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1000
+
+def main():
+    """Time resampling a clip to 16 kHz and measure its error against scipy."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rates", type=int, nargs="+", default=[8000, 16000, 22050, 44100, 48000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rate':>6} {'method':<10} {'ms/call':>9} {'max error':>10}")
+    for rate in args.rates:
+        audio = (0.1 * rng.standard_normal(int(rate * args.seconds))).astype(np.float32)
+        reference = resample_poly(audio.astype(np.float64), 16000, rate)
+
+        for name, fn in [
+            ("polyphase", lambda: resample(audio, rate)),
+            ("linear", lambda: linear_resample(audio, rate))
+        ]:
+            ms = time_per_call(fn, args.repeats)
+            output = fn()
+            n = min(len(output), len(reference))
+            error = np.abs(output[:n] - reference[:n]).max()
+            print(f"{rate:>6} {name:<10} {ms:>9.2f} {error:>10.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import argparse
+import os
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.rag import RetrievalEngine
+from app.services.vector_index import INDEX_TYPES
+
+def main():
+    """Train and rebuild the vector index from stored chunk embeddings."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--type",
+        choices=INDEX_TYPES,
+        default=None,
+        help="index type (defaults to VECTOR_INDEX_TYPE)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="stored embeddings decoded per batch"
+    )
+    args = parser.parse_args()
+
+    os.makedirs(settings.VECTOR_DB_PATH, exist_ok=True)
+    db = SessionLocal()
+    try:
+        engine = RetrievalEngine()
+        engine.rebuild(db, args.type, args.batch_size)
+        print(f"Built {engine.index.index_type} index with {engine.index.ntotal} vectors")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
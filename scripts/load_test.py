@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import time
+import httpx
+import numpy as np
+
+async def run_level(
+    client: httpx.AsyncClient,
+    path: str,
+    concurrency: int,
+    requests: int
+) -> dict:
+    """Issue requests from concurrency workers and collect latencies."""
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    latencies = np.array(latencies)
+    return {
+        "concurrency": concurrency,
+        "rps": requests / elapsed,
+        "p50": np.percentile(latencies, 50),
+        "p95": np.percentile(latencies, 95),
+        "errors": errors
+    }
+
+async def load_test(args) -> None:
+    connections = max(args.concurrency)
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=args.timeout
+    ) as client:
+        # Warm up connections and server-side pools
+        await run_level(client, args.path, min(args.concurrency), min(args.concurrency))
+
+        print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6}")
+        baseline = None
+        for concurrency in args.concurrency:
+            result = await run_level(client, args.path, concurrency, args.requests)
+            baseline = baseline or result["rps"]
+            print(
+                f"{result['concurrency']:>7} {result['rps']:>9.1f} {result['p50']:>8.1f} "
+                f"{result['p95']:>8.1f} {result['errors']:>6}   x{result['rps'] / baseline:.1f}"
+            )
+
+def main():
+    """Measure throughput and latency of an endpoint at increasing concurrency."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/v1/documents?limit=20")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=500, help="requests per level")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(load_test(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import json
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict
+
+import numpy as np
+from sqlalchemy import LargeBinary, bindparam, inspect, text
+from sqlalchemy.engine import Connection
+
+from app.core.database import engine
+
+TABLE = "document_chunks"
+NEW_COLUMN = "embedding_f32"
+# Whole-document vectors from before chunking; chunks are embedded by reconcile
+DOCUMENT_TABLE = "documents"
+
+# Backends whose ALTER TABLE can be rolled back with the rest of a transaction
+TRANSACTIONAL_DDL = {"postgresql"}
+
+def column_types(connection: Connection, table: str = TABLE) -> Dict[str, Any]:
+    """Column types of a table, empty if the table does not exist yet."""
+    inspector = inspect(connection)
+    if not inspector.has_table(table):
+        return {}
+    return {column["name"]: column["type"] for column in inspector.get_columns(table)}
+
+def chunks_need_migration(columns: Dict[str, Any]) -> bool:
+    """Whether document_chunks still holds JSON embeddings or a half-done swap."""
+    if NEW_COLUMN in columns:
+        return True
+    return "embedding" in columns and not isinstance(columns["embedding"], LargeBinary)
+
+def is_migrated() -> bool:
+    """Whether no JSON embedding column is left in documents or document_chunks."""
+    with engine.connect() as connection:
+        chunk_columns = column_types(connection)
+        document_columns = column_types(connection, DOCUMENT_TABLE)
+    return not chunks_need_migration(chunk_columns) and "embedding" not in document_columns
+
+def binary_type() -> str:
+    return "BYTEA" if engine.dialect.name == "postgresql" else "BLOB"
+
+def migrate(batch_size: int) -> int:
+    """
+    Drop documents.embedding and move chunk embeddings to float32 bytes.
+
+    Databases from before chunking only have the JSON documents.embedding
+    column: one vector per whole document, which no chunk can reuse, so it
+    is dropped and the next startup reconcile chunks and embeds those
+    documents. Chunk embeddings still stored as JSON are copied into a
+    float32 binary column that is then swapped in.
+
+    On PostgreSQL every step runs in one transaction, so the table is
+    either fully migrated or untouched. Elsewhere each step commits on its
+    own; a run interrupted part way is picked up where it stopped by
+    running the script again.
+    """
+    if engine.dialect.name in TRANSACTIONAL_DDL:
+        with engine.begin() as connection:
+            return run_steps(lambda: nullcontext(connection), batch_size)
+    return run_steps(engine.begin, batch_size)
+
+def run_steps(begin: Callable[[], ContextManager[Connection]], batch_size: int) -> int:
+    """Run every step an earlier run did not finish; returns chunks converted."""
+    with begin() as connection:
+        columns = column_types(connection)
+        document_columns = column_types(connection, DOCUMENT_TABLE)
+
+    converted = 0
+    if chunks_need_migration(columns):
+        converted = convert_chunks(begin, columns, batch_size)
+
+    if "embedding" in document_columns:
+        with begin() as connection:
+            connection.execute(text(f"ALTER TABLE {DOCUMENT_TABLE} DROP COLUMN embedding"))
+        print(f"Dropped {DOCUMENT_TABLE}.embedding; documents are re-embedded as chunks on startup")
+    return converted
+
+def convert_chunks(
+    begin: Callable[[], ContextManager[Connection]],
+    columns: Dict[str, Any],
+    batch_size: int
+) -> int:
+    """Add, fill, drop and rename, skipping the steps an earlier run finished."""
+    if NEW_COLUMN not in columns:
+        with begin() as connection:
+            connection.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN {NEW_COLUMN} {binary_type()}"))
+    else:
+        print("Resuming an interrupted migration")
+
+    converted = 0
+    if "embedding" in columns:
+        update = text(f"UPDATE {TABLE} SET {NEW_COLUMN} = :blob WHERE id = :id").bindparams(
+            bindparam("blob", type_=LargeBinary)
+        )
+        last_id = 0
+        while True:
+            with begin() as connection:
+                # Rows converted by an earlier run already have the new column set
+                rows = connection.execute(
+                    text(
+                        f"SELECT id, embedding FROM {TABLE} "
+                        f"WHERE id > :last_id AND embedding IS NOT NULL AND {NEW_COLUMN} IS NULL "
+                        "ORDER BY id LIMIT :limit"
+                    ),
+                    {"last_id": last_id, "limit": batch_size}
+                ).all()
+                if not rows:
+                    break
+                connection.execute(update, [
+                    {
+                        "id": row[0],
+                        # psycopg2 parses json columns; SQLite returns the text
+                        "blob": np.asarray(
+                            row[1] if isinstance(row[1], list) else json.loads(row[1]),
+                            dtype=np.float32
+                        ).tobytes()
+                    }
+                    for row in rows
+                ])
+            converted += len(rows)
+            last_id = rows[-1][0]
+            print(f"Converted {converted} embeddings")
+
+        with begin() as connection:
+            connection.execute(text(f"ALTER TABLE {TABLE} DROP COLUMN embedding"))
+
+    with begin() as connection:
+        connection.execute(text(f"ALTER TABLE {TABLE} RENAME COLUMN {NEW_COLUMN} TO embedding"))
+    return converted
+
+def main():
+    """Remove JSON embedding columns, converting chunk embeddings to float32 bytes."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    if is_migrated():
+        print("Embeddings are already stored as binary")
+        return
+    converted = migrate(args.batch_size)
+    print(f"Migration complete; {converted} chunk embeddings converted")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import asyncio
+import os
+from app.core.config import settings
+from app.models.database import Language
+from app.services.audio_cache import AudioCache
+from app.services.tts import TextToSpeechService
+
+async def prewarm(args) -> None:
+    with open(args.phrases, encoding="utf-8") as f:
+        phrases = [line.strip() for line in f if line.strip()]
+
+    cache = AudioCache(
+        os.path.join(settings.UPLOAD_DIR, "tts_cache"), settings.TTS_CACHE_MAX_BYTES
+    )
+    service = TextToSpeechService(audio_cache=cache)
+    try:
+        language = Language(args.language) if args.language else None
+        done = await service.prewarm(phrases, language=language, voice_id=args.voice_id)
+    finally:
+        await service.aclose()
+
+    stats = cache.stats()
+    print(
+        f"Pre-warmed {done}/{len(phrases)} phrases "
+        f"({stats['hits']} already cached, {stats['files']} files, {stats['bytes']} bytes)"
+    )
+
+def main():
+    """Synthesise a list of phrases (one per line) into the TTS audio cache."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("phrases", help="text file with one phrase per line")
+    parser.add_argument("--language", choices=[language.value for language in Language])
+    parser.add_argument("--voice-id", default=None)
+    asyncio.run(prewarm(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
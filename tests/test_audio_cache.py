@@ -0,0 +1,45 @@
+from app.services.audio_cache import AudioCache
+
+def test_key_covers_every_parameter():
+    """Test that any synthesis parameter change gives a new key."""
+    base = AudioCache.key("<speak>Hi</speak>", "voice", 1.0, 1.0, "en")
+    assert base == AudioCache.key("<speak>Hi</speak>", "voice", 1, 1, "en")
+    assert base != AudioCache.key("<speak>Hi</speak>", "voice", 1.1, 1.0, "en")
+    assert base != AudioCache.key("<speak>Hi</speak>", "other", 1.0, 1.0, "en")
+    assert base != AudioCache.key("<speak>Hi</speak>", "voice", 1.0, 1.0, "hi")
+
+def test_put_get_and_lookup(tmp_path):
+    """Test round-tripping audio through the disk cache."""
+    cache = AudioCache(str(tmp_path), max_bytes=1024)
+    assert cache.get("a" * 64) is None
+    assert cache.lookup("a" * 64) is None
+
+    cache.put("a" * 64, b"RIFF-audio")
+    assert cache.get("a" * 64) == b"RIFF-audio"
+    assert cache.lookup("a" * 64) == cache.path("a" * 64)
+    assert cache.stats()["hits"] == 2
+
+def test_lru_eviction_by_size(tmp_path):
+    """Test that the least recently used files go once over max_bytes."""
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    keys = [str(i) * 64 for i in range(3)]
+    cache.put(keys[0], b"x" * 100)
+    cache.put(keys[1], b"x" * 100)
+    cache.get(keys[0])
+    cache.put(keys[2], b"x" * 100)
+
+    assert cache.get(keys[1]) is None
+    assert not cache.path(keys[1]).exists()
+    assert cache.get(keys[0]) is not None
+    assert cache.stats()["bytes"] == 200
+
+def test_survives_restart_and_sees_other_workers(tmp_path):
+    """Test that files written earlier or by another instance are reused."""
+    first = AudioCache(str(tmp_path), max_bytes=1024)
+    first.put("b" * 64, b"audio")
+
+    second = AudioCache(str(tmp_path), max_bytes=1024)
+    assert second.stats()["files"] == 1
+    first.put("c" * 64, b"more")
+    assert second.get("c" * 64) == b"more"
+    assert second.stats()["bytes"] == 9
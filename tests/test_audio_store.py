@@ -0,0 +1,135 @@
+import hashlib
+import os
+import time
+import httpx
+import numpy as np
+import pytest
+from app import main
+from app.services.audio_store import AudioStore
+
+def test_put_is_content_addressed_and_idempotent(tmp_path):
+    """Test that identical audio is stored once under its hash."""
+    store = AudioStore(str(tmp_path))
+    audio_id = store.put(b"RIFF-answer")
+
+    assert audio_id == hashlib.sha256(b"RIFF-answer").hexdigest()
+    assert store.put(b"RIFF-answer") == audio_id
+    assert store.find(audio_id).read_bytes() == b"RIFF-answer"
+    assert store.url(audio_id) == f"/api/v1/audio/{audio_id}"
+    assert len(list(tmp_path.glob("*/*.wav"))) == 1
+
+def test_find_rejects_unknown_and_malformed_ids(tmp_path):
+    """Test that lookups cannot escape the store directory."""
+    store = AudioStore(str(tmp_path))
+    assert store.find("0" * 64) is None
+    assert store.find("../../etc/passwd") is None
+    assert store.find("ABC") is None
+
+def test_find_url_resolves_only_store_urls(tmp_path):
+    """Test that URLs from url() resolve and foreign URLs do not."""
+    store = AudioStore(str(tmp_path))
+    audio_id = store.put(b"RIFF-answer")
+
+    assert store.find_url(store.url(audio_id)) == store.path(audio_id)
+    assert store.find_url(f"/elsewhere/{audio_id}") is None
+    assert store.find_url(store.url("0" * 64)) is None
+
+def test_oldest_objects_evicted_past_max_bytes(tmp_path):
+    """Test size-bounded retention, where re-storing renews an object."""
+    store = AudioStore(str(tmp_path), max_bytes=250)
+    first = store.put(b"a" * 100)
+    second = store.put(b"b" * 100)
+    store.put(b"a" * 100)
+    third = store.put(b"c" * 100)
+
+    assert store.find(second) is None
+    assert not store.path(second).exists()
+    assert store.find(first) is not None and store.find(third) is not None
+    assert store.stats()["bytes"] == 200
+    assert store.stats()["evictions"] == 1
+
+def test_response_cache_skips_answers_with_evicted_audio(tmp_path, monkeypatch):
+    """Test that a cached answer is not served once its audio was evicted."""
+    store = AudioStore(str(tmp_path), max_bytes=150)
+    monkeypatch.setattr(main, "audio_store", store)
+    cache = main.response_cache
+    cache.clear()
+    embedding = np.array([1.0, 0.0, 0.0])
+
+    audio_url = store.url(store.put(b"a" * 100))
+    cache.store(embedding, None, (), "answer", audio_url)
+    assert cache.lookup(embedding, None, ()).audio_url == audio_url
+
+    store.put(b"b" * 100)
+    assert store.find_url(audio_url) is None
+    assert cache.lookup(embedding, None, ()) is None
+    cache.clear()
+
+def test_expired_objects_are_not_served_and_are_deleted(tmp_path):
+    """Test TTL retention, including objects left over from a restart."""
+    old_id = AudioStore(str(tmp_path)).put(b"old-answer")
+    past = time.time() - 120
+    os.utime(AudioStore(str(tmp_path)).path(old_id), (past, past))
+
+    store = AudioStore(str(tmp_path), ttl=60)
+    assert store.find(old_id) is None
+
+    new_id = store.put(b"new-answer")
+    assert store.find(new_id) is not None
+    assert not store.path(old_id).exists()
+    assert store.stats()["objects"] == 1
+
+@pytest.fixture
+def audio_client(tmp_path, monkeypatch):
+    store = AudioStore(str(tmp_path))
+    monkeypatch.setattr(main, "audio_store", store)
+    audio_id = store.put(b"RIFF" + bytes(range(256)))
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main.app), base_url="http://test"
+    )
+    return client, audio_id
+
+@pytest.mark.asyncio
+async def test_audio_endpoint_etag_and_not_modified(audio_client):
+    """Test the strong ETag, immutable caching and 304 revalidation."""
+    client, audio_id = audio_client
+    async with client:
+        response = await client.get(f"/api/v1/audio/{audio_id}")
+        assert response.status_code == 200
+        assert response.content == b"RIFF" + bytes(range(256))
+        assert response.headers["etag"] == f'"{audio_id}"'
+        assert "immutable" in response.headers["cache-control"]
+
+        revalidated = await client.get(
+            f"/api/v1/audio/{audio_id}", headers={"If-None-Match": f'"{audio_id}"'}
+        )
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == f'"{audio_id}"'
+
+        changed = await client.get(
+            f"/api/v1/audio/{audio_id}", headers={"If-None-Match": '"other"'}
+        )
+        assert changed.status_code == 200
+
+        missing = await client.get(f"/api/v1/audio/{'0' * 64}")
+        assert missing.status_code == 404
+
+@pytest.mark.asyncio
+async def test_audio_endpoint_byte_ranges(audio_client):
+    """Test partial responses for progressive playback."""
+    client, audio_id = audio_client
+    async with client:
+        response = await client.get(
+            f"/api/v1/audio/{audio_id}", headers={"Range": "bytes=0-3"}
+        )
+        assert response.status_code == 206
+        assert response.content == b"RIFF"
+        assert response.headers["content-range"] == "bytes 0-3/260"
+        assert response.headers["etag"] == f'"{audio_id}"'
+
+        tail = await client.get(
+            f"/api/v1/audio/{audio_id}", headers={"Range": "bytes=-2"}
+        )
+        assert tail.status_code == 206
+        assert tail.content == bytes([254, 255])
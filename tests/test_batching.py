@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from app.services.batching import MicroBatcher
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_immediately():
+    """Test that reaching max_batch_size runs the batch without waiting."""
+    batches = []
+
+    async def process(key, items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=3, max_wait=10)
+    results = await asyncio.wait_for(
+        asyncio.gather(*[batcher.submit(i) for i in range(3)]), timeout=1
+    )
+
+    assert results == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+
+@pytest.mark.asyncio
+async def test_partial_batch_flushes_after_max_wait():
+    """Test that a partial batch is processed once max_wait elapses."""
+    async def process(key, items):
+        return [f"{key}:{item}" for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait=0.01)
+    results = await asyncio.gather(
+        batcher.submit("a", key="hi"),
+        batcher.submit("b", key="en"),
+        batcher.submit("c", key="hi")
+    )
+
+    assert results == ["hi:a", "en:b", "hi:c"]
+    assert batcher.stats()["batches"] == 2
+    assert batcher.stats()["avg_batch_size"] == 1.5
+
+@pytest.mark.asyncio
+async def test_batch_errors_reach_every_caller():
+    """Test that a failing batch fails each waiting request."""
+    async def process(key, items):
+        raise ValueError("decode failed")
+
+    batcher = MicroBatcher(process, max_batch_size=2, max_wait=0.01)
+    results = await asyncio.gather(
+        batcher.submit(1), batcher.submit(2), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
@@ -0,0 +1,84 @@
+import numpy as np
+from app.services.cache import EmbeddingCache, TTLCache, normalize_query
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeRedis:
+    """In-memory stand-in for the subset of redis-py the caches use."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    """Test that entries expire after the TTL."""
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_query_normalisation():
+    """Test that case, spacing and trailing punctuation are ignored."""
+    assert normalize_query("  Balance  KYA hai? ") == "balance kya hai"
+    assert normalize_query("पासवर्ड रीसेट करें।") == "पासवर्ड रीसेट करें"
+
+def test_embedding_cache_computes_once():
+    """Test that repeated queries reuse the cached embedding."""
+    calls = []
+
+    def compute(text):
+        calls.append(text)
+        return np.ones(4)
+
+    cache = EmbeddingCache(max_size=10, ttl=60)
+    first = cache.get_or_compute("Reset password", compute)
+    second = cache.get_or_compute("reset   password!", compute)
+
+    assert calls == ["reset password"]
+    assert first is second
+    assert first.dtype == np.float32
+    assert cache.stats()["hits"] == 1
+
+def test_embedding_cache_shares_through_redis():
+    """Test that a second process-local cache is served from Redis."""
+    redis = FakeRedis()
+    EmbeddingCache(10, 60, redis_client=redis).get_or_compute(
+        "balance", lambda text: np.arange(4)
+    )
+
+    other = EmbeddingCache(10, 60, redis_client=redis)
+    embedding = other.get_or_compute("balance", lambda text: 1 / 0)
+
+    assert embedding.tolist() == [0, 1, 2, 3]
+    assert other.stats()["redis_hits"] == 1
@@ -0,0 +1,43 @@
+import pytest
+from app.services.chunking import TextSplitter, split_sentences
+
+def test_sentence_splitting():
+    """Test English and Devanagari sentence boundaries."""
+    text = "Hello there. How are you?\nआपका खाता सक्रिय है।कृपया पासवर्ड बदलें॥ Thanks!"
+    assert split_sentences(text) == [
+        "Hello there.",
+        "How are you?",
+        "आपका खाता सक्रिय है।",
+        "कृपया पासवर्ड बदलें॥",
+        "Thanks!"
+    ]
+
+def test_chunks_respect_size_and_overlap():
+    """Test chunk packing with sentence overlap."""
+    splitter = TextSplitter(chunk_size=6, chunk_overlap=3)
+    text = "one two three. four five six. seven eight nine. ten eleven twelve."
+    chunks = splitter.split_text(text)
+
+    assert chunks == [
+        "one two three. four five six.",
+        "four five six. seven eight nine.",
+        "seven eight nine. ten eleven twelve."
+    ]
+    assert all(len(chunk.split()) <= 6 for chunk in chunks)
+
+def test_long_sentence_is_split_on_words():
+    """Test that a sentence longer than chunk_size is broken up."""
+    splitter = TextSplitter(chunk_size=4)
+    chunks = splitter.split_text(" ".join(str(i) for i in range(10)))
+
+    assert chunks == ["0 1 2 3", "4 5 6 7", "8 9"]
+
+def test_custom_length_function():
+    """Test token counting through a pluggable tokenizer."""
+    splitter = TextSplitter(chunk_size=10, length_function=len)
+    assert splitter.split_text("abcde. fghij. klmno.") == ["abcde.", "fghij.", "klmno."]
+
+def test_invalid_overlap():
+    """Test that overlap must be smaller than the chunk size."""
+    with pytest.raises(ValueError):
+        TextSplitter(chunk_size=4, chunk_overlap=4)
@@ -0,0 +1,171 @@
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import Base, Conversation, Language, Message
+from app.services.conversation import ConversationHistory
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+class ThreadRecordingRedis:
+    """List and string subset of redis-py that records the calling threads."""
+
+    def __init__(self):
+        self.data = {}
+        self.threads = set()
+
+    def _call(self):
+        self.threads.add(threading.get_ident())
+
+    def exists(self, key):
+        self._call()
+        return key in self.data
+
+    def llen(self, key):
+        self._call()
+        return len(self.data.get(key, []))
+
+    def lrange(self, key, start, end):
+        self._call()
+        items = self.data.get(key, [])
+        return items[start:len(items) if end == -1 else end + 1]
+
+    def get(self, key):
+        self._call()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self._call()
+        self.data[key] = value
+
+    def pipeline(self):
+        return Pipeline(self)
+
+class Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def delete(self, key):
+        self.commands.append(lambda: self.redis.data.pop(key, None))
+
+    def rpush(self, key, *values):
+        self.commands.append(lambda: self.redis.data.setdefault(key, []).extend(values))
+
+    def ltrim(self, key, start, end):
+        self.commands.append(lambda: self.redis.data.update({key: self.redis.data[key][start:]}))
+
+    def expire(self, key, ttl):
+        pass
+
+    def execute(self):
+        self.redis._call()
+        for command in self.commands:
+            command()
+
+def make_history(session_factory, tmp_path, **kwargs):
+    options = dict(max_turns=2, flush_interval=60, batch_size=100)
+    options.update(kwargs)
+    return ConversationHistory(session_factory, str(tmp_path / "journal.jsonl"), **options)
+
+@pytest.mark.asyncio
+async def test_recent_turns_served_from_buffer(session_factory, tmp_path):
+    """Test that recent turns are kept in a bounded ring buffer."""
+    history = make_history(session_factory, tmp_path)
+    await history.start()
+    for i in range(3):
+        await history.record_turn("s1", Language.ENGLISH, f"question {i}", f"answer {i}")
+
+    recent = await history.recent("s1")
+    assert [m["content"] for m in recent] == [
+        "question 1", "answer 1", "question 2", "answer 2"
+    ]
+    # Nothing written yet: the hot path does not touch the database
+    assert session_factory().query(Message).count() == 0
+    await history.stop()
+
+@pytest.mark.asyncio
+async def test_redis_history_stays_off_the_event_loop(session_factory, tmp_path):
+    """Test that Redis reads and writes run in the threadpool, not on the loop."""
+    redis = ThreadRecordingRedis()
+    history = make_history(session_factory, tmp_path, redis_client=redis)
+    for i in range(3):
+        await history.record_turn("s1", Language.ENGLISH, f"question {i}", f"answer {i}")
+
+    recent = await history.recent("s1")
+    assert [m["content"] for m in recent] == [
+        "question 1", "answer 1", "question 2", "answer 2"
+    ]
+    assert "question 0" in await history.summary("s1")
+    assert redis.threads
+    assert threading.get_ident() not in redis.threads
+
+@pytest.mark.asyncio
+async def test_batched_flush_to_database(session_factory, tmp_path):
+    """Test that pending messages are written in one batch per flush."""
+    history = make_history(session_factory, tmp_path)
+    await history.start()
+    await history.record_turn("s1", Language.HINDI, "नमस्ते", "नमस्ते, बताइए", audio_url="/api/v1/audio/x")
+    await history.record_turn("s2", None, "hi", "hello")
+
+    assert await history.flush() == 4
+    db = session_factory()
+    assert db.query(Conversation).count() == 2
+    assert db.query(Message).filter(Message.audio_url == "/api/v1/audio/x").one().role == "assistant"
+    assert open(history.worker_journal_path).read() == ""
+    await history.stop()
+
+@pytest.mark.asyncio
+async def test_journal_replayed_after_restart(session_factory, tmp_path):
+    """Test that unflushed messages survive a restart and reload from the DB."""
+    crashed = make_history(session_factory, tmp_path)
+    await crashed.record_turn("s1", Language.ENGLISH, "question", "answer")
+    # Process dies before the write-behind flush
+
+    restarted = make_history(session_factory, tmp_path)
+    await restarted.start()
+    await restarted.stop()
+    assert session_factory().query(Message).count() == 2
+
+    fresh = make_history(session_factory, tmp_path)
+    recent = await fresh.recent("s1")
+    assert [(m["role"], m["content"]) for m in recent] == [
+        ("user", "question"), ("assistant", "answer")
+    ]
+
+@pytest.mark.asyncio
+async def test_workers_keep_separate_journals(session_factory, tmp_path):
+    """Test that one worker's flush never drops another's journaled messages."""
+    first = make_history(session_factory, tmp_path)
+    second = make_history(session_factory, tmp_path)
+    await first.start()
+    await second.start()
+
+    await first.record_turn("s1", Language.ENGLISH, "question 1", "answer 1")
+    await second.record_turn("s2", Language.ENGLISH, "question 2", "answer 2")
+    assert await first.flush() == 2
+    assert len(open(second.worker_journal_path).read().splitlines()) == 2
+
+    # A running worker's journal is not adopted by one starting up
+    third = make_history(session_factory, tmp_path)
+    await third.start()
+    assert third.stats()["pending"] == 0
+    await third.stop()
+
+    # Once it exits with messages unflushed, the next start picks them up
+    second._task.cancel()
+    second._release_journal()
+    fourth = make_history(session_factory, tmp_path)
+    await fourth.start()
+    assert fourth.stats()["pending"] == 2
+    await fourth.stop()
+    await first.stop()
+    assert session_factory().query(Message).count() == 4
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core import database
+from app.core.config import settings
+from app.core.database import async_database_url, engine_options
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://user:secret@db:5432/app", "postgresql+asyncpg://user:secret@db:5432/app"),
+    ("postgresql+psycopg2://user@db/app", "postgresql+asyncpg://user@db/app"),
+    ("sqlite:///./local.db", "sqlite+aiosqlite:///./local.db"),
+    ("postgresql+asyncpg://user@db/app", "postgresql+asyncpg://user@db/app"),
+])
+def test_async_database_url_picks_async_driver(url, expected):
+    """Test that sync URLs map to asyncpg or aiosqlite, keeping the password."""
+    assert async_database_url(url) == expected
+
+def test_async_database_url_override():
+    """Test that ASYNC_DATABASE_URL is used as given."""
+    override = "postgresql+asyncpg://reader@replica/app"
+    assert async_database_url("postgresql://user@db/app", override) == override
+    assert async_database_url("postgresql://user@db/app", None) == "postgresql+asyncpg://user@db/app"
+
+def test_pool_settings_reach_both_engines(monkeypatch):
+    """Test that DB_POOL_* configure the sync and the async engine's pools."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 3)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 12.5)
+    monkeypatch.setattr(settings, "DB_POOL_RECYCLE", 600)
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", False)
+
+    url = "postgresql://user@db/app"
+    sync_engine = create_engine(url, **engine_options(url))
+    async_url = async_database_url(url)
+    async_engine = create_async_engine(async_url, **engine_options(async_url))
+
+    for pool in (sync_engine.pool, async_engine.sync_engine.pool):
+        assert pool.size() == 7
+        assert pool._max_overflow == 3
+        assert pool._timeout == 12.5
+        assert pool._recycle == 600
+        assert pool._pre_ping is False
+
+    assert engine_options("sqlite:///./local.db") == {}
+    assert engine_options("sqlite+aiosqlite:///./local.db") == {}
+
+def test_module_engines_share_pool_size():
+    """Test that the application's own engines were built with DB_POOL_SIZE."""
+    assert database.engine.pool.size() == settings.DB_POOL_SIZE
+    assert database.async_engine.sync_engine.pool.size() == settings.DB_POOL_SIZE
@@ -0,0 +1,89 @@
+import numpy as np
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+def build_index():
+    index = LexicalIndex()
+    index.add([10, 11, 12, 13], [
+        "किराया हर महीने की पाँच तारीख तक जमा करें।",
+        "Refund policy: refunds are processed within 7 days.",
+        "Kamra khali karne se pehle notice dena zaroori hai.",
+        "Office timings are 9 am to 5 pm.",
+    ])
+    return index
+
+def test_tokenize_matches_devanagari_and_romanised_spellings():
+    """Test that both scripts and common spelling variants share terms."""
+    assert tokenize("कमरा") == tokenize("kamra")
+    assert tokenize("अच्छा") == tokenize("accha") == tokenize("achha")
+    assert tokenize("ज़िंदगी") == tokenize("zindagi")
+    assert tokenize("२०२४ ka kiraya") == ["2024", "k", "kiry"]
+
+def test_bm25_ranks_code_mixed_queries():
+    """Test retrieval across scripts, with filters and removals."""
+    index = build_index()
+
+    _, ids = index.search("kiraya kab tak dena hai", 2)
+    assert ids[0] == 10
+    _, ids = index.search("कमरा खाली", 3)
+    assert ids.tolist() == [12]
+    _, ids = index.search("refund", 3)
+    assert ids.tolist() == [11]
+
+    allowed = np.zeros(14, dtype=bool)
+    allowed[13] = True
+    _, ids = index.search("refund office", 3, allowed)
+    assert ids.tolist() == [13]
+
+    assert index.remove([11]) == 1
+    assert index.search("refund", 3)[1].tolist() == []
+    assert index.ids().tolist() == [10, 12, 13]
+
+def test_compaction_and_reused_ids():
+    """Test that re-indexed IDs do not keep their old postings."""
+    index = build_index()
+    index.add([11], ["Cancellation needs 30 days notice."])
+
+    assert index.search("refund", 3)[1].tolist() == []
+    assert index.search("cancellation", 3)[1].tolist() == [11]
+    assert index.documents == 4
+
+    index.remove([10, 12])
+    assert "kiry" not in index._postings
+
+def test_save_and_load_round_trip(tmp_path):
+    """Test that a saved index answers queries identically."""
+    index = build_index()
+    path = str(tmp_path / "lexical.npz")
+    index.save(path)
+    loaded = LexicalIndex.load(path)
+
+    for query in ["kiraya", "office timings", "notice kamra"]:
+        expected_scores, expected_ids = index.search(query, 3)
+        scores, ids = loaded.search(query, 3)
+        assert ids.tolist() == expected_ids.tolist()
+        assert np.allclose(scores, expected_scores)
+    assert loaded.documents == index.documents
+
+def test_save_keeps_removed_postings_until_compaction(tmp_path):
+    """Test that saving does not compact and reloaded IDs can be reused."""
+    index = build_index()
+    index.add(range(20, 28), [f"Filler note number {i}." for i in range(8)])
+    index.remove([11])
+    assert index.removed == 1
+
+    path = str(tmp_path / "lexical.npz")
+    index.save(path)
+    assert index.removed == 1
+    loaded = LexicalIndex.load(path)
+    assert loaded.removed == 1
+    assert loaded.postings == index.postings
+
+    loaded.add([11], ["Cancellation needs 30 days notice."])
+    assert loaded.search("refund", 3)[1].tolist() == []
+    assert loaded.search("cancellation", 3)[1].tolist() == [11]
+
+def test_reciprocal_rank_fusion():
+    """Test that IDs ranked by both retrievers come first."""
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4, 1]], k=60)
+    assert fused[:2] == [1, 3]
+    assert set(fused) == {1, 2, 3, 4}
@@ -0,0 +1,209 @@
+import asyncio
+import io
+import json
+import httpx
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import FastAPI, Request, Response
+from app import main
+from app.core.config import settings
+from app.services.audio_store import AudioStore
+from app.services.llm import LLMBackend, OpenAICompatibleBackend, StubBackend
+from app.services.response_cache import SemanticResponseCache
+from app.services.tts import TextToSpeechService, stream_sentences
+
+def create_stub_server(tokens, status_code: int = 200):
+    """Minimal OpenAI-compatible server streaming fixed tokens as SSE."""
+    app = FastAPI()
+    app.state.payloads = []
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        app.state.payloads.append(await request.json())
+        if status_code != 200:
+            return Response(status_code=status_code, content="overloaded")
+        lines = [
+            "data: " + json.dumps({"choices": [{"delta": {"content": token}}]})
+            for token in tokens
+        ]
+        lines.append("data: [DONE]")
+        return Response(content="\n\n".join(lines) + "\n\n", media_type="text/event-stream")
+
+    return app
+
+async def collect(iterable):
+    return [item async for item in iterable]
+
+async def tokens_of(*tokens):
+    for token in tokens:
+        yield token
+
+@pytest.mark.asyncio
+async def test_stub_backend_answers_from_context():
+    """Test that the stub streams the opening context sentences."""
+    backend = StubBackend(sentences=1)
+    prompt = "Context:\nThe office opens at 9 am. It closes at 5 pm.\n\nQuery: When?"
+
+    tokens = await collect(backend.stream(prompt))
+    assert len(tokens) > 1
+    assert "".join(tokens) == "The office opens at 9 am."
+    assert await backend.complete("Query: hi") == "I could not find anything relevant to your question."
+    with pytest.raises(TypeError):
+        LLMBackend()
+
+@pytest.mark.asyncio
+async def test_openai_compatible_backend_streams_tokens():
+    """Test SSE parsing against an in-process OpenAI-compatible server."""
+    app = create_stub_server(["Namaste", ", how", " can I help?"])
+    backend = OpenAICompatibleBackend(
+        "http://llm/v1", "local-model", transport=httpx.ASGITransport(app=app)
+    )
+
+    tokens = await collect(backend.stream("Query: hi", max_tokens=16))
+    assert tokens == ["Namaste", ", how", " can I help?"]
+    assert app.state.payloads[0]["stream"] is True
+    assert app.state.payloads[0]["max_tokens"] == 16
+    await backend.aclose()
+
+@pytest.mark.asyncio
+async def test_openai_compatible_backend_raises_on_error():
+    """Test that a non-200 response is surfaced."""
+    app = create_stub_server([], status_code=503)
+    backend = OpenAICompatibleBackend(
+        "http://llm/v1", "local-model", transport=httpx.ASGITransport(app=app)
+    )
+
+    with pytest.raises(Exception, match="LLM API error"):
+        await backend.complete("Query: hi")
+    await backend.aclose()
+
+@pytest.mark.asyncio
+async def test_stream_sentences_emits_complete_sentences():
+    """Test that sentences are released as soon as they end."""
+    tokens = tokens_of("Hello", " there. How", " are you", "? मैं ठीक", " हूँ। Ok", " bye")
+
+    sentences = await collect(stream_sentences(tokens))
+    assert sentences == ["Hello there.", "How are you?", "मैं ठीक हूँ।", "Ok bye"]
+
+    merged = await collect(stream_sentences(tokens_of("Hi. Ok. A longer sentence."), min_chars=10))
+    assert merged == ["Hi. Ok. A longer sentence."]
+
+def wav_for(text: str) -> bytes:
+    """Stand-in synthesis: 10 ms of silence per character as 16 kHz WAV."""
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros(160 * len(text), dtype=np.float32), 16000, format="WAV")
+    return buffer.getvalue()
+
+def create_tts_server(status_code: int = 200):
+    app = FastAPI()
+
+    @app.post("/v1/speech")
+    async def speech(request: Request):
+        if status_code != 200:
+            return Response(status_code=status_code, content="bad voice")
+        payload = await request.json()
+        return Response(content=wav_for(payload["text"]), media_type="audio/wav")
+
+    return app
+
+class FakeRAGService:
+    def __init__(self, stream):
+        self.stream = stream
+
+    async def retrieve_relevant_chunks(self, text, language, doc_type=None):
+        return []
+
+    def stream_response(self, **kwargs):
+        return self.stream()
+
+class FakeHistory:
+    def __init__(self):
+        self.turns = []
+
+    async def recent(self, session_id):
+        return []
+
+    async def summary(self, session_id):
+        return ""
+
+    async def record_turn(self, session_id, language, user_text, assistant_text, audio_url=None):
+        self.turns.append((user_text, assistant_text, audio_url))
+
+@pytest.fixture
+def chat_app(tmp_path, monkeypatch):
+    """main.app with in-process TTS, storage, history and response cache."""
+    def install(stream, tts_status=200):
+        history = FakeHistory()
+        monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+        monkeypatch.setattr(main, "tts_service", TextToSpeechService(
+            transport=httpx.ASGITransport(app=create_tts_server(tts_status)), max_retries=0
+        ))
+        monkeypatch.setattr(main, "audio_store", AudioStore(str(tmp_path)))
+        monkeypatch.setattr(main, "conversation_history", history)
+        monkeypatch.setattr(main, "response_cache", SemanticResponseCache(0.95, 10, 60))
+        monkeypatch.setattr(main.retrieval_engine, "encode_query", lambda text: np.ones(4))
+        main.app.dependency_overrides[main.get_rag_service] = lambda: FakeRAGService(stream)
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://test"
+        )
+        return client, history
+
+    yield install
+    main.app.dependency_overrides.clear()
+
+async def post_chat_stream(client):
+    response = await client.post("/api/v1/chat/stream", params={"text": "Hi?"})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+@pytest.mark.asyncio
+async def test_chat_stream_stores_audio_and_caches_answer(chat_app):
+    """Test that a streamed answer gets an audio_url, is cached and recorded."""
+    async def stream():
+        for token in ["Hello there, friend.", " How can I help", " you today?"]:
+            yield token
+
+    client, history = chat_app(stream)
+    async with client:
+        events = await post_chat_stream(client)
+        final = next(e for e in events if e["type"] == "text")
+        sentences = [e["text"] for e in events if e["type"] == "audio"]
+        assert final["text"] == "Hello there, friend. How can I help you today?"
+        assert len(sentences) == 2
+
+        # The stored object is the sentences' audio back to back
+        stored = await client.get(final["audio_url"])
+        audio, sample_rate = sf.read(io.BytesIO(stored.content))
+        expected = sum(len(sf.read(io.BytesIO(wav_for(
+            main.tts_service._add_ssml_tags(sentence)
+        )))[0]) for sentence in sentences)
+        assert (sample_rate, len(audio)) == (16000, expected)
+        assert history.turns == [("Hi?", final["text"], final["audio_url"])]
+
+        # The same question is now answered from the response cache
+        repeat = await post_chat_stream(client)
+        assert repeat[0]["cached"] is True
+        assert repeat[-2]["audio_url"] == final["audio_url"]
+        assert len(history.turns) == 2
+
+@pytest.mark.asyncio
+async def test_chat_stream_failure_cancels_generation(chat_app):
+    """Test that a TTS failure stops the LLM stream instead of leaving it running."""
+    cancelled = asyncio.Event()
+
+    async def stream():
+        try:
+            yield "This sentence fails to synthesise. "
+            await asyncio.sleep(30)
+            yield "Never sent."
+        finally:
+            cancelled.set()
+
+    client, history = chat_app(stream, tts_status=400)
+    async with client:
+        events = await post_chat_stream(client)
+
+    assert events[-1]["type"] == "error"
+    await asyncio.wait_for(cancelled.wait(), timeout=2)
+    assert history.turns == []
@@ -0,0 +1,50 @@
+import threading
+from fastapi.testclient import TestClient
+import app.main as main
+
+class FakeEngine:
+    """Retrieval engine whose start() blocks until the test releases it."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.loaded = threading.Event()
+        self.starts = 0
+
+    @property
+    def ready(self):
+        return self.loaded.is_set()
+
+    def start(self, session_factory=None):
+        self.starts += 1
+        self.release.wait(timeout=5)
+        self.loaded.set()
+
+    def flush(self):
+        pass
+
+class FakeHistory:
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+def test_health_waits_for_engine_loaded_once_in_lifespan(monkeypatch):
+    """Test that /health is 503 while the engine loads and 200 after one load."""
+    engine = FakeEngine()
+    monkeypatch.setattr(main, "retrieval_engine", engine)
+    monkeypatch.setattr(main, "conversation_history", FakeHistory())
+
+    with TestClient(main.app) as client:
+        response = client.get("/health")
+        assert response.status_code == 503
+        assert response.json() == {"status": "starting"}
+
+        engine.release.set()
+        assert engine.loaded.wait(timeout=5)
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"status": "healthy"}
+        client.get("/health")
+
+    assert engine.starts == 1
@@ -0,0 +1,78 @@
+import re
+import pytest
+from app.models.database import Language
+from app.services.prompt import PromptBuilder, truncate_to_tokens, update_summary
+
+def words(n, word="word"):
+    return " ".join(f"{word}{i}" for i in range(n))
+
+def message(role, content):
+    return {"role": role, "content": content}
+
+def test_truncate_to_tokens():
+    """Test truncation on word boundaries."""
+    assert truncate_to_tokens(words(10), 4, lambda t: len(t.split())) == words(4)
+    assert truncate_to_tokens("short", 4, lambda t: len(t.split())) == "short"
+    assert truncate_to_tokens("short", 0, lambda t: len(t.split())) == ""
+
+def test_prompt_stays_within_budget():
+    """Test that chunks are taken in rank order and cut to fit."""
+    # 6 tokens of instructions, 1 of context header and 5 of query leave 78
+    builder = PromptBuilder(max_tokens=90, history_share=0.0, min_chunk_tokens=10)
+    chunks = [words(40, "first"), words(40, "second"), words(40, "third")]
+
+    prompt = builder.build("what is the refund policy", chunks, [], language=Language.ENGLISH)
+
+    assert prompt.total_tokens == len(prompt.text.split()) == 90
+    assert "first39" in prompt.text
+    assert "second37" in prompt.text and "second38" not in prompt.text
+    assert "third0" not in prompt.text
+    assert (prompt.truncated_chunks, prompt.dropped_chunks) == (1, 1)
+
+def test_old_turns_replaced_by_summary():
+    """Test that history beyond its share is folded into the summary."""
+    builder = PromptBuilder(max_tokens=200, history_share=0.5, summary_max_tokens=30)
+    history = []
+    for i in range(6):
+        history.append(message("user", f"Question {i} about orders. " + words(10, "detail")))
+        history.append(message("assistant", f"Answer {i}. " + words(10, "reply")))
+
+    prompt = builder.build("and returns?", [words(20)], history)
+
+    assert "assistant: Answer 5." in prompt.text  # newest turn verbatim
+    assert "Summary of earlier conversation" in prompt.text
+    assert "user: Question 0 about orders." not in prompt.text.split("Conversation History")[1]
+    assert prompt.summarised_messages > 0
+    assert prompt.tokens["history"] + prompt.tokens["summary"] <= 0.5 * 200
+    assert builder.metrics.stats()["prompts"] == 1
+
+def test_rolling_summary_keeps_newest_lines():
+    """Test the incremental summary stays within its budget."""
+    summary = ""
+    for i in range(10):
+        summary = update_summary(summary, [message("user", f"Topic {i} first. Then more.")], 12)
+    assert summary.splitlines()[-1] == "user: Topic 9 first."
+    assert len(summary.split()) <= 12
+
+def newline_token_count(text):
+    """Counter where every line break is a token, so joins cost tokens."""
+    return len(re.findall(r"\S+|\n", text))
+
+@pytest.mark.parametrize("max_tokens", [40, 90, 150, 400])
+def test_rendered_prompt_within_max_tokens(max_tokens):
+    """Test the final text, headers and separators included, fits the budget."""
+    builder = PromptBuilder(
+        max_tokens=max_tokens, count_tokens=newline_token_count,
+        history_share=0.4, summary_max_tokens=30, min_chunk_tokens=5
+    )
+    history = []
+    for i in range(8):
+        history.append(message("user", f"Question {i}.\n" + words(8, "detail")))
+        history.append(message("assistant", f"Answer {i}.\n" + words(8, "reply")))
+    chunks = [words(30, f"chunk{i}-") for i in range(6)]
+
+    prompt = builder.build("what about refunds\nand exchanges", chunks, history)
+
+    assert newline_token_count(prompt.text) <= max_tokens
+    assert prompt.total_tokens == newline_token_count(prompt.text)
+    assert "Generate a response:" in prompt.text
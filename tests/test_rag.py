@@ -0,0 +1,342 @@
+import asyncio
+import json
+import os
+import threading
+import zlib
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from app.models.database import Base, Document, DocumentChunk, DocumentType, Language
+from app.services.cache import EmbeddingCache
+from app.services.chunking import TextSplitter
+from app.services.lexical_index import LexicalIndex
+from app.services.llm import StubBackend
+from app.services.rag import RAGService, RetrievalEngine
+from app.services.vector_index import FLAT, VectorIndex
+
+DIMENSION = 64
+
+class HashingEmbedder:
+    """Bag-of-words embedder standing in for the sentence-transformer."""
+
+    class tokenizer:
+        @staticmethod
+        def tokenize(text):
+            return text.split()
+
+    def get_sentence_embedding_dimension(self):
+        return DIMENSION
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        single = isinstance(texts, str)
+        vectors = np.zeros((1 if single else len(texts), DIMENSION), dtype=np.float32)
+        for row, text in enumerate([texts] if single else texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.strip(".?").encode()) % DIMENSION] += 1.0
+        return vectors[0] if single else vectors
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = RetrievalEngine()
+    engine.embedding_model = HashingEmbedder()
+    engine.splitter = TextSplitter(chunk_size=8, length_function=engine.count_tokens)
+    engine.index = VectorIndex.create(DIMENSION, FLAT)
+    engine.lexical = LexicalIndex()
+    engine.index_path = str(tmp_path / "index.faiss")
+    engine.lexical_path = str(tmp_path / "lexical.npz")
+    yield engine
+    engine.flush()
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    db_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rag.db'}")
+    async with db_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(db_engine, expire_on_commit=False)
+    await db_engine.dispose()
+
+def lexical_ids(engine, query):
+    return engine.search_lexical(query, 10)[1].tolist()
+
+@pytest.mark.asyncio
+async def test_delete_and_update_drop_old_vectors_and_postings(engine, session_factory):
+    """Test that deleted or replaced chunks no longer come back from either index."""
+    async with session_factory() as db:
+        rag = RAGService(db, engine, llm=StubBackend())
+        refund = await rag.ingest_document(
+            "Refunds", "Refunds are paid within seven days.", DocumentType.POLICY, Language.ENGLISH
+        )
+        hours = await rag.ingest_document(
+            "Hours", "The office opens at nine.", DocumentType.FAQ, Language.ENGLISH
+        )
+        refund_ids = [chunk.id for chunk in refund.chunks]
+        hours_ids = [chunk.id for chunk in hours.chunks]
+        assert lexical_ids(engine, "refunds") == refund_ids
+
+        assert await rag.delete_document(refund.id)
+        assert not np.isin(refund_ids, engine.indexed_ids()).any()
+        assert lexical_ids(engine, "refunds") == []
+        chunks = await rag.retrieve_relevant_chunks("refunds paid", top_k=5)
+        assert all(chunk.document_id != refund.id for chunk in chunks)
+
+        await rag.update_document(hours.id, content="The office closes at six.")
+        new_ids = [chunk.id for chunk in hours.chunks]
+        assert not set(new_ids) & set(hours_ids)
+        assert sorted(engine.indexed_ids().tolist()) == sorted(new_ids)
+        assert lexical_ids(engine, "opens") == []
+        assert lexical_ids(engine, "closes") == new_ids
+        chunks = await rag.retrieve_relevant_chunks("office", top_k=5)
+        assert [chunk.id for chunk in chunks] == new_ids
+
+        assert not await rag.delete_document(refund.id)
+
+@pytest.mark.asyncio
+async def test_reconcile_adds_missing_and_drops_stale_ids(engine, session_factory, tmp_path):
+    """Test that reconcile restores both indexes from the chunk table alone."""
+    async with session_factory() as db:
+        rag = RAGService(db, engine, llm=StubBackend())
+        document = await rag.ingest_document(
+            "Refunds", "Refunds are paid within seven days.", DocumentType.POLICY, Language.ENGLISH
+        )
+    chunk_ids = [chunk.id for chunk in document.chunks]
+
+    # A restart with empty indexes, plus a vector whose row is gone
+    engine.index = VectorIndex.create(DIMENSION, FLAT)
+    engine.lexical = LexicalIndex()
+    engine.add(np.array([999]), np.ones((1, DIMENSION), dtype=np.float32), texts=["stale"])
+
+    with Session(create_engine(f"sqlite:///{tmp_path / 'rag.db'}")) as db:
+        engine.reconcile(db)
+
+    assert sorted(engine.indexed_ids().tolist()) == chunk_ids
+    assert lexical_ids(engine, "stale") == []
+    assert lexical_ids(engine, "refunds") == chunk_ids
+    assert engine.search_lexical("refunds", 10, language=Language.ENGLISH)[1].tolist() == chunk_ids
+
+def bulk_documents(count):
+    return [
+        {
+            "title": f"doc {i}",
+            "content": f"Document {i} mentions topic{i}.",
+            "doc_type": DocumentType.FAQ,
+            "language": Language.HINDI if i % 2 else Language.ENGLISH
+        }
+        for i in range(count)
+    ]
+
+@pytest.mark.asyncio
+async def test_bulk_ingest_batches_and_reports_partial_failure(engine, session_factory):
+    """Test batched ingest and the committed/failed counts of a failed batch."""
+    async with session_factory() as db:
+        rag = RAGService(db, engine, llm=StubBackend())
+        stats = await rag.ingest_documents(bulk_documents(5), batch_size=2)
+        assert (stats["ingested"], stats["failed"], stats["batches"]) == (5, 0, 3)
+        assert stats["error"] is None
+        assert stats["chunks"] == len(engine.indexed_ids()) == 5
+        assert len(lexical_ids(engine, "topic3")) == 1
+
+        encode = engine.encode_batch
+        calls = []
+
+        def failing_encode(texts, batch_size=None):
+            calls.append(len(texts))
+            if len(calls) == 2:
+                raise RuntimeError("encoder crashed")
+            return encode(texts, batch_size)
+
+        engine.encode_batch = failing_encode
+        stats = await rag.ingest_documents(bulk_documents(5), batch_size=2)
+        assert (stats["ingested"], stats["failed"], stats["batches"]) == (2, 3, 1)
+        assert stats["error"] == "encoder crashed"
+        assert len(engine.indexed_ids()) == 7
+
+@pytest.mark.asyncio
+async def test_bulk_ingest_endpoints(engine, session_factory):
+    """Test the JSON list and JSONL upload endpoints, including failures."""
+    from app.main import app, get_rag_service
+
+    async def rag_service():
+        async with session_factory() as db:
+            yield RAGService(db, engine, llm=StubBackend())
+
+    app.dependency_overrides[get_rag_service] = rag_service
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            documents = [{**doc, "language": doc["language"].value, "doc_type": "faq"}
+                         for doc in bulk_documents(3)]
+            response = await client.post(
+                "/api/v1/ingest-documents", json={"documents": documents, "batch_size": 2}
+            )
+            assert response.status_code == 200
+            assert response.json()["ingested"] == 3
+
+            jsonl = "\n".join(json.dumps(doc) for doc in documents) + "\n"
+            response = await client.post(
+                "/api/v1/ingest-documents/upload",
+                files={"file": ("docs.jsonl", jsonl.encode())}
+            )
+            assert response.status_code == 200
+            assert response.json()["batches"] == 1
+
+            response = await client.post(
+                "/api/v1/ingest-documents/upload",
+                files={"file": ("docs.jsonl", b'{"title": "no content"}\n')}
+            )
+            assert response.status_code == 400
+
+            def failing_encode(texts, batch_size=None):
+                raise RuntimeError("encoder crashed")
+
+            engine.encode_batch = failing_encode
+            response = await client.post(
+                "/api/v1/ingest-documents", json={"documents": documents}
+            )
+            assert response.status_code == 500
+            assert response.json()["detail"]["ingested"] == 0
+            assert response.json()["detail"]["failed"] == 3
+    finally:
+        app.dependency_overrides.clear()
+
+def test_index_changes_are_saved_together(engine):
+    """Test that mutations schedule one save instead of writing each time."""
+    engine.add(np.array([1, 2]), engine.encode_batch(["first text", "second text"]),
+               texts=["first text", "second text"])
+    engine.remove(np.array([1]))
+    assert not os.path.exists(engine.index_path)
+    assert engine._save_timer is not None
+
+    engine.flush()
+    assert engine._save_timer is None
+    assert VectorIndex.load(engine.index_path).ids().tolist() == [2]
+    assert LexicalIndex.load(engine.lexical_path).ids().tolist() == [2]
+
+    modified = os.path.getmtime(engine.index_path)
+    engine.flush()
+    assert os.path.getmtime(engine.index_path) == modified
+
+def test_only_the_lock_holder_saves_the_index(engine, tmp_path):
+    """Test that a second worker on the same VECTOR_DB_PATH does not write."""
+    engine._writer = engine._claim_writer()
+    assert engine._writer
+    other = RetrievalEngine()
+    other.index = VectorIndex.create(DIMENSION, FLAT)
+    other.lexical = LexicalIndex()
+    other.index_path = engine.index_path
+    other.lexical_path = engine.lexical_path
+    other._writer = other._claim_writer()
+    assert not other._writer
+
+    other.add(np.array([1]), np.ones((1, DIMENSION), dtype=np.float32), texts=["text"])
+    other.flush()
+    assert not os.path.exists(engine.index_path)
+
+    engine.add(np.array([2]), np.ones((1, DIMENSION), dtype=np.float32), texts=["text"])
+    engine.flush()
+    assert VectorIndex.load(engine.index_path).ids().tolist() == [2]
+
+class ThreadRecordingRedis:
+    """get/set subset of redis-py that records the calling threads."""
+
+    def __init__(self):
+        self.data = {}
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.threads.add(threading.get_ident())
+        self.data[key] = value
+
+@pytest.mark.asyncio
+async def test_query_embedding_cache_stays_off_the_event_loop(engine, session_factory):
+    """Test that Redis embedding cache calls run in the threadpool."""
+    redis = ThreadRecordingRedis()
+    engine.query_cache = EmbeddingCache(10, 60, redis_client=redis)
+    async with session_factory() as db:
+        service = RAGService(db, engine, llm=StubBackend())
+        await service.ingest_document("Refunds", "Refunds are paid within seven days.",
+                                      DocumentType.POLICY, Language.ENGLISH)
+        chunks = await service.retrieve_relevant_chunks("refunds paid", top_k=1)
+
+    assert [chunk.document.title for chunk in chunks] == ["Refunds"]
+    assert redis.threads
+    assert threading.get_ident() not in redis.threads
+
+@pytest.mark.asyncio
+async def test_health_is_served_during_bulk_ingest(engine, session_factory):
+    """Test that encoding a bulk ingest does not block the event loop."""
+    from app.main import app, get_rag_service
+
+    started = threading.Event()
+    release = threading.Event()
+    encode_batch = engine.encode_batch
+
+    def slow_encode(texts, batch_size=None):
+        started.set()
+        if not release.wait(timeout=5):
+            raise RuntimeError("health check was not served during encoding")
+        return encode_batch(texts, batch_size)
+
+    engine.encode_batch = slow_encode
+
+    async def rag_service():
+        async with session_factory() as db:
+            yield RAGService(db, engine, llm=StubBackend())
+
+    app.dependency_overrides[get_rag_service] = rag_service
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            documents = [{**doc, "language": doc["language"].value, "doc_type": "faq"}
+                         for doc in bulk_documents(3)]
+            ingest = asyncio.create_task(
+                client.post("/api/v1/ingest-documents", json={"documents": documents})
+            )
+            assert await asyncio.to_thread(started.wait, 5)
+
+            response = await asyncio.wait_for(client.get("/health"), timeout=5)
+            assert response.status_code in (200, 503)
+            assert not ingest.done()
+
+            release.set()
+            response = await ingest
+            assert response.status_code == 200
+            assert response.json()["ingested"] == 3
+    finally:
+        release.set()
+        app.dependency_overrides.clear()
+
+def test_reconcile_chunks_documents_ingested_before_chunking(engine, tmp_path):
+    """Test that documents without chunk rows are chunked, embedded and indexed."""
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(db_engine)
+    with Session(db_engine) as db:
+        db.add_all([
+            Document(title="Refunds", content="Refunds are paid within seven days. "
+                     "Ask the front desk for the refund form.",
+                     doc_type=DocumentType.POLICY, language=Language.ENGLISH),
+            Document(title="Hours", content="The office opens at nine.",
+                     doc_type=DocumentType.FAQ, language=Language.HINDI),
+        ])
+        db.commit()
+
+        engine.reconcile(db)
+
+        chunks = db.query(DocumentChunk).order_by(DocumentChunk.id).all()
+        assert [chunk.document_id for chunk in chunks] == [1, 1, 2]
+        assert all(chunk.embedding is not None for chunk in chunks)
+        assert sorted(engine.indexed_ids().tolist()) == [chunk.id for chunk in chunks]
+        assert lexical_ids(engine, "opens") == [3]
+        assert engine.search_lexical("opens", 10, language=Language.ENGLISH)[1].tolist() == []
+
+        engine.reconcile(db)
+        assert db.query(DocumentChunk).count() == 3
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from scipy.signal import resample_poly
+from app.services.resampling import StreamResampler, polyphase_filter, resample
+
+@pytest.mark.parametrize("source_rate", [8000, 22050, 44100, 48000])
+def test_matches_reference_resampler(source_rate):
+    """Test output against scipy's resample_poly in float64."""
+    rng = np.random.default_rng(0)
+    audio = (0.5 * rng.standard_normal(source_rate + 123)).astype(np.float32)
+
+    resampled = resample(audio, source_rate)
+    reference = resample_poly(audio.astype(np.float64), 16000, source_rate)
+
+    assert resampled.dtype == np.float32
+    assert resampled.shape == reference.shape
+    np.testing.assert_allclose(resampled, reference, atol=1e-5)
+
+def test_high_frequencies_are_filtered_not_aliased():
+    """Test that content above 8 kHz is removed rather than folded down."""
+    t = np.arange(48000) / 48000
+    audio = np.sin(2 * np.pi * 12000 * t).astype(np.float32)
+
+    resampled = resample(audio, 48000)
+
+    # Linear interpolation folds a 12 kHz tone to a loud 4 kHz alias
+    interior = resampled[1000:-1000]
+    assert np.sqrt(np.mean(interior ** 2)) < 1e-3
+
+def test_target_rate_is_zero_copy_and_filters_are_cached():
+    """Test the 16 kHz fast path and per-ratio filter reuse."""
+    audio = np.zeros(16000, dtype=np.float32)
+    assert resample(audio, 16000) is audio
+
+    polyphase_filter.cache_clear()
+    resample(np.zeros(8000, dtype=np.float32), 8000)
+    resample(np.zeros(4000, dtype=np.float32), 8000)
+    info = polyphase_filter.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+
+@pytest.mark.parametrize("source_rate", [8000, 44100, 48000])
+def test_stream_resampler_matches_whole_signal(source_rate):
+    """Test that chunked resampling has no seams at chunk boundaries."""
+    rng = np.random.default_rng(1)
+    audio = (0.5 * rng.standard_normal(source_rate)).astype(np.float32)
+    sizes = rng.integers(1, 2000, 200)
+    chunks = np.split(audio, np.cumsum(sizes)[np.cumsum(sizes) < len(audio)])
+
+    resampler = StreamResampler(source_rate)
+    streamed = np.concatenate([resampler.process(chunk) for chunk in chunks] + [resampler.flush()])
+
+    expected = resample(audio, source_rate)
+    assert streamed.shape == expected.shape
+    np.testing.assert_allclose(streamed, expected, atol=1e-5)
+
+    assert StreamResampler(16000).process(audio) is audio
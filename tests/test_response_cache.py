@@ -0,0 +1,63 @@
+import numpy as np
+from app.models.database import Language
+from app.services.response_cache import SemanticResponseCache
+
+DOCS = ((1, "2024-01-01T00:00:00"), (2, "2024-01-02T00:00:00"))
+
+def make_cache(**kwargs):
+    options = dict(threshold=0.95, max_size=10, ttl=60)
+    options.update(kwargs)
+    return SemanticResponseCache(**options)
+
+def test_similar_query_hits():
+    """Test that a near-identical query over the same documents is served from cache."""
+    cache = make_cache()
+    cache.store(np.array([1.0, 0.0, 0.0]), Language.HINDI, DOCS, "answer", "/api/v1/audio/abc")
+
+    entry = cache.lookup(np.array([0.99, 0.05, 0.0]), Language.HINDI, DOCS)
+    assert entry is not None
+    assert (entry.text, entry.audio_url) == ("answer", "/api/v1/audio/abc")
+
+def test_miss_on_dissimilar_query_language_or_documents():
+    """Test that similarity, language and document versions all gate a hit."""
+    cache = make_cache()
+    cache.store(np.array([1.0, 0.0, 0.0]), Language.HINDI, DOCS, "answer")
+
+    assert cache.lookup(np.array([0.0, 1.0, 0.0]), Language.HINDI, DOCS) is None
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), Language.ENGLISH, DOCS) is None
+    changed = ((1, "2024-01-01T00:00:00"), (2, "2024-02-01T00:00:00"))
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), Language.HINDI, changed) is None
+    assert cache.stats()["misses"] == 3
+
+def test_invalidate_by_document():
+    """Test that updating a contributing document drops its cached answers."""
+    cache = make_cache()
+    cache.store(np.array([1.0, 0.0]), None, DOCS, "a")
+    cache.store(np.array([0.0, 1.0]), None, ((3, ""),), "b")
+
+    assert cache.invalidate_documents([2]) == 1
+    assert cache.lookup(np.array([1.0, 0.0]), None, DOCS) is None
+    assert cache.lookup(np.array([0.0, 1.0]), None, ((3, ""),)).text == "b"
+
+def test_size_bound_and_ttl():
+    """Test LRU eviction and expiry."""
+    now = [0.0]
+    cache = make_cache(max_size=1, ttl=5, clock=lambda: now[0])
+    cache.store(np.array([1.0, 0.0]), None, DOCS, "a")
+    cache.store(np.array([0.0, 1.0]), None, DOCS, "b")
+    assert cache.lookup(np.array([1.0, 0.0]), None, DOCS) is None
+
+    now[0] = 10.0
+    assert cache.lookup(np.array([0.0, 1.0]), None, DOCS) is None
+    assert cache.stats()["size"] == 0
+
+def test_entries_failing_validation_are_dropped():
+    """Test that an entry whose audio is gone is removed instead of served."""
+    available = {"/api/v1/audio/abc"}
+    cache = make_cache(is_valid=lambda entry: entry.audio_url in available)
+    cache.store(np.array([1.0, 0.0]), None, DOCS, "answer", "/api/v1/audio/abc")
+
+    assert cache.lookup(np.array([1.0, 0.0]), None, DOCS).text == "answer"
+    available.clear()
+    assert cache.lookup(np.array([1.0, 0.0]), None, DOCS) is None
+    assert cache.stats()["size"] == 0
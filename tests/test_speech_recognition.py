@@ -0,0 +1,188 @@
+import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import numpy as np
+import pytest
+import soundfile as sf
+from app import main
+from app.core.config import settings
+from app.services import speech_recognition as asr
+from app.services.speech_recognition import ASRQueueFullError, SpeechRecognitionService
+from app.services.vad import EnergyVAD, trim_silence
+
+class BlockingWhisper:
+    """Stand-in model whose transcribe() waits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def transcribe(self, audio, **options):
+        self.release.wait(30)
+        return {"text": "namaste", "segments": [{"start": 0.0, "end": 1.0, "text": "namaste"}]}
+
+def install_model(model):
+    asr._worker_state.model = model
+    asr._worker_state.device = "cpu"
+
+def stub_service(model, workers=1):
+    service = SpeechRecognitionService()
+    service.vad = None
+    service._executor = ThreadPoolExecutor(
+        max_workers=workers, initializer=install_model, initargs=(model,)
+    )
+    return service
+
+async def wait_for_pending(service, count):
+    while service._pending < count:
+        await asyncio.sleep(0.001)
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_429(monkeypatch):
+    """Test back-pressure from the worker pool and the wait/run metrics."""
+    monkeypatch.setattr(settings, "ASR_MAX_QUEUE", 2)
+    monkeypatch.setattr(settings, "ASR_BATCHING_ENABLED", False)
+    model = BlockingWhisper()
+    service = stub_service(model)
+    audio = np.zeros(16000, dtype=np.float32)
+
+    running = [asyncio.create_task(service.transcribe(audio)) for _ in range(2)]
+    await wait_for_pending(service, 2)
+
+    with pytest.raises(ASRQueueFullError):
+        await service.transcribe(audio)
+
+    monkeypatch.setattr(main, "speech_recognition", service)
+    wav = io.BytesIO()
+    sf.write(wav, audio, 16000, format="WAV")
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main.app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/api/v1/speech-to-text", files={"audio": ("a.wav", wav.getvalue())}
+        )
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+
+    stats = service.pool_stats()
+    assert (stats["queue_depth"], stats["rejected"], stats["completed"]) == (2, 2, 0)
+
+    model.release.set()
+    results = await asyncio.gather(*running)
+    assert [result["text"] for result in results] == ["namaste", "namaste"]
+
+    stats = service.pool_stats()
+    assert (stats["queue_depth"], stats["completed"]) == (0, 2)
+    assert stats["max_wait_seconds"] > 0  # the second request queued behind the first
+    assert stats["avg_run_seconds"] > 0
+    service.shutdown()
+
+class BatchWhisper(BlockingWhisper):
+    """Stand-in multilingual model for the batched decode path."""
+
+    class dims:
+        n_mels = 80
+
+    is_multilingual = True
+    num_languages = 99
+
+    def __init__(self):
+        super().__init__()
+        self.release.set()
+        self.transcribed = 0
+
+    def transcribe(self, audio, **options):
+        self.transcribed += 1
+        return super().transcribe(audio, **options)
+
+@pytest.mark.asyncio
+async def test_batched_results_have_segments(monkeypatch):
+    """Test segments from batched timestamp tokens and the transcribe() fallback."""
+    monkeypatch.setattr(settings, "ASR_BATCHING_ENABLED", True)
+    tokenizer = asr.whisper.tokenizer.get_tokenizer(True, language="en", task="transcribe")
+    begin = tokenizer.timestamp_begin
+    tokens = (
+        [begin] + tokenizer.encode(" Hello there.") + [begin + 60, begin + 60]
+        + tokenizer.encode(" How are you?") + [begin + 110]
+    )
+
+    def decode(model, mel, options):
+        assert mel.shape[0] == 2
+        good = asr.whisper.decoding.DecodingResult(
+            audio_features=None, language="en", tokens=tokens,
+            text=tokenizer.decode(tokens).strip(), avg_logprob=-0.2,
+            no_speech_prob=0.01, compression_ratio=1.2
+        )
+        repetitive = asr.whisper.decoding.DecodingResult(
+            audio_features=None, language="en", tokens=[], text="la la la la",
+            avg_logprob=-0.2, no_speech_prob=0.01, compression_ratio=3.0
+        )
+        return [good, repetitive]
+
+    monkeypatch.setattr(asr.whisper, "decode", decode)
+    model = BatchWhisper()
+    service = stub_service(model)
+    audio = np.zeros(3 * 16000, dtype=np.float32)
+
+    first, second = await asyncio.gather(service.transcribe(audio), service.transcribe(audio))
+
+    assert first["text"] == "Hello there. How are you?"
+    assert first["segments"] == [
+        {"start": 0.0, "end": pytest.approx(1.2), "text": " Hello there."},
+        {"start": pytest.approx(1.2), "end": pytest.approx(2.2), "text": " How are you?"}
+    ]
+    assert second["segments"] == [{"start": 0.0, "end": 1.0, "text": "namaste"}]
+    assert model.transcribed == 1
+    assert service.pool_stats()["batching"]["batches"] == 1
+    service.shutdown()
+
+def test_segments_from_tokens_without_closing_timestamp():
+    """Test that trailing text runs to the end of the clip."""
+    decode = lambda tokens: "".join(chr(token) for token in tokens)
+    segments = asr.segments_from_tokens([1000, ord("h"), ord("i")], 1000, decode, 4.0)
+    assert segments == [{"start": 0.0, "end": 4.0, "text": "hi"}]
+    assert asr.segments_from_tokens([ord(" ")], 1000, decode, 4.0) == []
+
+@pytest.mark.asyncio
+async def test_batched_segments_map_back_to_untrimmed_audio(monkeypatch):
+    """Test that segment times from a VAD-trimmed batched decode are remapped."""
+    monkeypatch.setattr(settings, "ASR_BATCHING_ENABLED", True)
+    monkeypatch.setattr(settings, "ASR_VAD_PADDING", 0.2)
+    monkeypatch.setattr(settings, "ASR_VAD_MAX_PAUSE", 0.5)
+    tokenizer = asr.whisper.tokenizer.get_tokenizer(True, language="en", task="transcribe")
+    begin = tokenizer.timestamp_begin
+    # About 1.4 s is kept around each 1 s tone; the second starts at 1.5 s trimmed
+    tokens = (
+        [begin] + tokenizer.encode(" One.") + [begin + 60, begin + 75]
+        + tokenizer.encode(" Two.") + [begin + 140]
+    )
+
+    def decode(model, mel, options):
+        return [asr.whisper.decoding.DecodingResult(
+            audio_features=None, language="en", tokens=tokens,
+            text=tokenizer.decode(tokens).strip(), avg_logprob=-0.2,
+            no_speech_prob=0.01, compression_ratio=1.2
+        )]
+
+    monkeypatch.setattr(asr.whisper, "decode", decode)
+    service = stub_service(BatchWhisper())
+    service.vad = EnergyVAD()
+    t = np.arange(16000) / 16000
+    tone = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    silence = np.zeros(16000, dtype=np.float32)
+    audio = np.concatenate([silence, silence, tone, silence, silence, silence, tone, silence])
+
+    result = await service.transcribe(audio)
+
+    trim = trim_silence(audio, EnergyVAD(), padding=0.2, max_pause=0.5)
+    assert len(trim.regions) == 2
+    assert result["vad"] == trim.report()
+    assert result["segments"] == [
+        {"start": trim.to_original(0.0), "end": trim.to_original(1.2), "text": " One."},
+        {"start": trim.to_original(1.5), "end": trim.to_original(2.8), "text": " Two."}
+    ]
+    # The 3 s pause cut out before decoding is back between the segments
+    assert result["segments"][0]["start"] == pytest.approx(1.8, abs=0.05)
+    assert result["segments"][1]["start"] > 5.5
+    service.shutdown()
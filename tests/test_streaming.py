@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.services.speech_recognition import ASRQueueFullError
+from app.services.streaming import StreamingTranscriber, pcm16_to_float32
+
+SAMPLE_RATE = 16000
+WORD = SAMPLE_RATE // 2  # each "word" is half a second of constant level
+
+def speech(word_ids):
+    """Audio in which word n is half a second at level n / 100."""
+    return np.concatenate([np.full(WORD, n / 100, dtype=np.float32) for n in word_ids])
+
+class FakeDecoder:
+    """Decodes FakeDecoder-style audio back into words with timestamps."""
+
+    def __init__(self):
+        self.decoded_lengths = []
+
+    async def __call__(self, audio, prompt):
+        self.decoded_lengths.append(len(audio))
+        levels = np.round(np.abs(audio) * 100).astype(int)
+        bounds = [0, *(np.flatnonzero(np.diff(levels)) + 1), len(levels)]
+        segments = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if not levels[start]:
+                continue
+            # A word cut off by the end of the buffer decodes differently
+            text = f"w{levels[start]}" if end - start >= WORD else f"w{levels[start]}-"
+            segments.append({"start": start / SAMPLE_RATE, "end": end / SAMPLE_RATE, "text": text})
+        return segments
+
+async def run(stream, audio, chunk=SAMPLE_RATE // 4):
+    events = []
+    for start in range(0, len(audio), chunk):
+        events += await stream.feed(audio[start:start + chunk])
+    return events
+
+@pytest.mark.asyncio
+async def test_partials_then_final_on_pause():
+    """Test incremental partials and a final transcript after a pause."""
+    decoder = FakeDecoder()
+    stream = StreamingTranscriber(decoder, partial_interval=1.0, min_silence=0.5)
+    audio = np.concatenate([
+        np.zeros(SAMPLE_RATE, dtype=np.float32),
+        speech(range(11, 19)),
+        np.zeros(SAMPLE_RATE, dtype=np.float32)
+    ])
+
+    events = await run(stream, audio)
+    partials = [e for e in events if e["type"] == "partial"]
+    finals = [e for e in events if e["type"] == "final"]
+
+    assert partials, "expected partial results before the utterance ended"
+    assert partials[0]["end"] < 3.0
+    assert finals[0]["text"] == " ".join(f"w{i}" for i in range(11, 19))
+    assert finals[0]["start"] == pytest.approx(0.8, abs=0.05)
+
+@pytest.mark.asyncio
+async def test_only_unstable_tail_is_redecoded():
+    """Test that committed audio is dropped from later decodes."""
+    decoder = FakeDecoder()
+    stream = StreamingTranscriber(decoder, partial_interval=1.0, max_segment=60.0)
+    utterance = speech(list(range(11, 31)))
+
+    events = await run(stream, utterance)
+    events += await stream.finish()
+
+    assert max(decoder.decoded_lengths) < len(utterance) / 2
+    assert any(e["stable_text"] for e in events if e["type"] == "partial")
+    assert events[-1] == {
+        "type": "final",
+        "text": " ".join(f"w{i}" for i in range(11, 31)),
+        "start": 0.0,
+        "end": 10.0
+    }
+
+@pytest.mark.asyncio
+async def test_silence_produces_no_events():
+    """Test that pure silence is never decoded."""
+    decoder = FakeDecoder()
+    stream = StreamingTranscriber(decoder)
+
+    assert await run(stream, np.zeros(5 * SAMPLE_RATE, dtype=np.float32)) == []
+    assert await stream.finish() == []
+    assert decoder.decoded_lengths == []
+
+def test_pcm16_conversion():
+    """Test PCM16 byte decoding."""
+    frame = np.array([0, 16384, -32768], dtype="<i2").tobytes()
+    assert pcm16_to_float32(frame).tolist() == [0.0, 0.5, -1.0]
+
+class StubRecognizer:
+    """Stands in for SpeechRecognitionService with FakeDecoder streams."""
+
+    def __init__(self, decode=None):
+        self.decode = decode or FakeDecoder()
+
+    def create_stream(self, language=None):
+        return StreamingTranscriber(self.decode, partial_interval=1.0, min_silence=0.5)
+
+def pcm16(audio):
+    return np.round(audio * 32767).astype("<i2").tobytes()
+
+def receive_until_close(websocket):
+    events = []
+    with pytest.raises(WebSocketDisconnect) as closed:
+        while True:
+            events.append(websocket.receive_json())
+    return events, closed.value.code
+
+@pytest.fixture
+def ws_client(monkeypatch):
+    from app import main
+
+    def install(recognizer):
+        monkeypatch.setattr(main, "speech_recognition", recognizer)
+        return TestClient(main.app)
+    return install
+
+def test_websocket_streams_partials_and_final(ws_client):
+    """Test partial and final frames over the socket and a clean close on "end"."""
+    client = ws_client(StubRecognizer())
+    audio = np.concatenate([
+        np.zeros(SAMPLE_RATE, dtype=np.float32),
+        speech(range(11, 19)),
+        np.zeros(SAMPLE_RATE, dtype=np.float32),
+        speech(range(21, 23))
+    ])
+
+    with client.websocket_connect("/api/v1/speech-to-text/stream?sample_rate=16000") as websocket:
+        for start in range(0, len(audio), SAMPLE_RATE // 4):
+            websocket.send_bytes(pcm16(audio[start:start + SAMPLE_RATE // 4]))
+        websocket.send_text("end")
+        events, code = receive_until_close(websocket)
+
+    assert code == 1000
+    assert any(e["type"] == "partial" for e in events)
+    finals = [e["text"] for e in events if e["type"] == "final"]
+    assert finals == [" ".join(f"w{i}" for i in range(11, 19)), "w21 w22"]
+
+def test_websocket_reports_busy_recognizer(ws_client):
+    """Test that a full ASR queue is reported and the socket closed with 1013."""
+    async def busy(audio, prompt):
+        raise ASRQueueFullError("ASR queue is full")
+
+    client = ws_client(StubRecognizer(busy))
+    with client.websocket_connect("/api/v1/speech-to-text/stream") as websocket:
+        websocket.send_bytes(pcm16(speech(range(11, 15))))
+        events, code = receive_until_close(websocket)
+
+    assert events == [{"type": "error", "detail": "ASR queue is full"}]
+    assert code == 1013
@@ -0,0 +1,166 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+from app.models.database import Language
+from app.services.audio_cache import AudioCache
+from app.services.tts import TextToSpeechService
+
+def create_stub_server(
+    failures: int = 0,
+    status_code: int = 503,
+    delay: float = 0.0,
+    retry_after: str = None
+):
+    """Minimal stand-in for the Resemble API, served in-process over ASGI."""
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+
+    @app.post("/v1/speech")
+    async def speech(request: Request):
+        app.state.calls += 1
+        if app.state.calls <= failures:
+            headers = {"Retry-After": retry_after} if retry_after else None
+            return Response(status_code=status_code, content="busy", headers=headers)
+
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        await asyncio.sleep(delay)
+        app.state.in_flight -= 1
+
+        payload = await request.json()
+        return Response(content=payload["text"].encode("utf-8"), media_type="audio/wav")
+
+    @app.post("/v1/voices")
+    async def voices():
+        app.state.calls += 1
+        if app.state.calls <= failures:
+            return Response(status_code=status_code, content="busy")
+        return {"voice_id": "voice-123"}
+
+    return app
+
+def make_service(app, **kwargs):
+    options = dict(max_retries=3, retry_backoff=0.0)
+    options.update(kwargs)
+    return TextToSpeechService(
+        transport=httpx.ASGITransport(app=app), **options
+    )
+
+@pytest.mark.asyncio
+async def test_generate_speech_over_pooled_client():
+    """Test synthesis through the async client."""
+    app = create_stub_server()
+    service = make_service(app)
+
+    audio = await service.generate_speech("Hello.", language=Language.ENGLISH)
+    assert b"<speak>" in audio
+    assert await service.clone_voice([b"RIFF"], name="test") == "voice-123"
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    """Test that 429/5xx responses are retried."""
+    app = create_stub_server(failures=2, status_code=429)
+    service = make_service(app)
+
+    audio = await service.generate_speech("Hello.")
+    assert audio
+    assert app.state.calls == 3
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_retry_after_is_capped():
+    """Test that a huge Retry-After waits no longer than max_retry_delay."""
+    app = create_stub_server(failures=1, status_code=429, retry_after="3600")
+    service = make_service(app, max_retry_delay=0.05)
+
+    audio = await asyncio.wait_for(service.generate_speech("Hello."), timeout=2)
+    assert audio
+    assert app.state.calls == 2
+    assert service._retry_delay(0, httpx.Response(429, headers={"Retry-After": "3600"})) == 0.05
+    assert service._retry_delay(0, httpx.Response(429, headers={"Retry-After": "0.01"})) == 0.01
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_voice_cloning_is_not_retried():
+    """Test that the non-idempotent voice creation POST is sent only once."""
+    app = create_stub_server(failures=1, status_code=503)
+    service = make_service(app)
+
+    with pytest.raises(Exception, match="Voice cloning API error"):
+        await service.clone_voice([b"RIFF"], name="test")
+    assert app.state.calls == 1
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    """Test that the error is surfaced once retries are exhausted."""
+    app = create_stub_server(failures=10, status_code=503)
+    service = make_service(app, max_retries=2)
+
+    with pytest.raises(Exception, match="TTS API error"):
+        await service.generate_speech("Hello.")
+    assert app.state.calls == 3
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_bounded_concurrency():
+    """Test that in-flight requests never exceed max_concurrency."""
+    app = create_stub_server(delay=0.02)
+    service = make_service(app, max_concurrency=2)
+
+    await asyncio.gather(*[service.generate_speech(f"Line {i}.") for i in range(6)])
+    assert app.state.max_in_flight == 2
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_stream_speech_in_order_with_bounded_lookahead():
+    """Test that sentences are synthesised concurrently but yielded in order."""
+    app = create_stub_server(delay=0.02)
+    service = make_service(app, max_concurrency=8)
+
+    async def sentences():
+        for i in range(6):
+            yield f"Sentence {i}."
+
+    results = [item async for item in service.stream_speech(sentences(), parallelism=3)]
+
+    assert [sentence for sentence, _ in results] == [f"Sentence {i}." for i in range(6)]
+    assert all(f"Sentence {i}".encode() in audio for i, (_, audio) in enumerate(results))
+    assert app.state.max_in_flight == 3
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_repeated_phrases_served_from_audio_cache(tmp_path):
+    """Test that a cached phrase needs no API call and pre-warming fills the cache."""
+    app = create_stub_server()
+    service = make_service(app, audio_cache=AudioCache(str(tmp_path), max_bytes=10**6))
+
+    assert await service.prewarm(["Namaste.", "How can I help?"], language=Language.HINDI) == 2
+    assert app.state.calls == 2
+
+    audio = await service.generate_speech("Namaste.", language=Language.HINDI)
+    assert b"Namaste" in audio
+    assert app.state.calls == 2
+
+    await service.generate_speech("Namaste.", language=Language.HINDI, speed=1.2)
+    assert app.state.calls == 3
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_speech_file_returns_cached_path(tmp_path):
+    """Test that a cache hit comes back as a file path rather than bytes."""
+    app = create_stub_server()
+    service = make_service(app, audio_cache=AudioCache(str(tmp_path), max_bytes=10**6))
+
+    audio = await service.speech_file("Namaste.", language=Language.HINDI)
+    assert isinstance(audio, bytes)
+
+    path = await service.speech_file("Namaste.", language=Language.HINDI)
+    assert path.read_bytes() == audio
+    assert app.state.calls == 1
+    assert service.audio_cache.stats()["hits"] == 1
+    await service.aclose()
@@ -0,0 +1,123 @@
+import io
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.testclient import TestClient
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.services.audio_io import decode_audio
+
+def wav_bytes(audio, sample_rate=16000, subtype="PCM_16"):
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format="WAV", subtype=subtype)
+    buffer.seek(0)
+    return buffer
+
+def test_decode_stereo_to_float32_mono():
+    """Test block-wise decoding matches a whole-file read and downmix."""
+    rng = np.random.default_rng(0)
+    stereo = rng.uniform(-0.5, 0.5, (10007, 2))
+    expected, _ = sf.read(wav_bytes(stereo, 44100), dtype="float32")
+
+    audio, sample_rate = decode_audio(wav_bytes(stereo, 44100), block_frames=1024)
+
+    assert sample_rate == 44100
+    assert audio.dtype == np.float32
+    assert audio.shape == (10007,)
+    np.testing.assert_allclose(audio, expected.mean(axis=1), atol=1e-6)
+
+def test_decode_rejects_non_audio():
+    """Test that undecodable uploads raise ValueError."""
+    with pytest.raises(ValueError):
+        decode_audio(io.BytesIO(b"not audio at all"))
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/upload": 4096, "/form": 4096})
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/form")
+    async def form(request: Request):
+        return {"fields": len(await request.form())}
+
+    @app.post("/documents")
+    async def documents(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+def test_upload_within_limit(client):
+    """Test that small uploads pass through untouched."""
+    response = client.post("/upload", files={"file": ("a.wav", b"x" * 1000)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 1000}
+
+def test_upload_over_declared_limit(client):
+    """Test that a large Content-Length is refused up front."""
+    response = client.post("/upload", files={"file": ("a.wav", b"x" * 10000)})
+    assert response.status_code == 413
+
+def test_limit_applies_to_every_content_type(client):
+    """Test that form-encoded and raw bodies are limited like multipart ones."""
+    response = client.post("/form", data={"text": "x" * 100 * 1024})
+    assert response.status_code == 413
+
+    response = client.post("/form", data={"text": "x" * 100})
+    assert response.status_code == 200
+
+    def body():
+        yield b"text="
+        for _ in range(10):
+            yield b"x" * 1024
+
+    response = client.post(
+        "/form",
+        content=body(),
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert response.status_code == 413
+
+def test_limit_applies_only_to_listed_routes(client):
+    """Test that routes without a limit accept larger uploads."""
+    response = client.post("/documents", files={"file": ("docs.jsonl", b"x" * 10000)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 10000}
+
+@pytest.mark.parametrize("content_length", ["lots", "-5"])
+def test_malformed_content_length_is_rejected(client, content_length):
+    """Test that an unparseable Content-Length is a 400, not a 500."""
+    response = client.post(
+        "/upload",
+        content=b"x",
+        headers={
+            "Content-Type": "multipart/form-data; boundary=b",
+            "Content-Length": content_length
+        }
+    )
+    assert response.status_code == 400
+
+def test_upload_over_limit_while_streaming(client):
+    """Test that a chunked body without Content-Length is cut off at the limit."""
+    boundary = "testboundary"
+    head = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="a.wav"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+
+    def body():
+        yield head
+        for _ in range(10):
+            yield b"x" * 1024
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    response = client.post(
+        "/upload",
+        content=body(),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+    assert response.status_code == 413
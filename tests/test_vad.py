@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from app.services.vad import EnergyVAD, create_vad, trim_silence
+
+SAMPLE_RATE = 16000
+
+def tone(seconds, amplitude=0.3, frequency=220):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+def test_zero_crossing_rate_catches_quiet_fricatives():
+    """Test that quiet noise-like frames count as speech but quiet tones do not."""
+    vad = EnergyVAD(SAMPLE_RATE, threshold_db=-40.0)
+    rng = np.random.default_rng(0)
+    hiss = rng.uniform(-0.015, 0.015, SAMPLE_RATE).astype(np.float32)  # about -43 dBFS
+    hum = tone(1.0, amplitude=0.012, frequency=50)
+
+    assert vad.speech_frames(hiss).all()
+    assert not vad.speech_frames(hum).any()
+
+def test_trim_silence_and_remap_timestamps():
+    """Test leading/trailing silence and long pauses are cut and times map back."""
+    audio = np.concatenate([silence(2.0), tone(1.0), silence(3.0), tone(1.0), silence(2.0)])
+    vad = EnergyVAD(SAMPLE_RATE)
+    trim = trim_silence(audio, vad, padding=0.1, max_pause=0.5)
+
+    assert len(trim.regions) == 2
+    report = trim.report()
+    assert report["original_seconds"] == 9.0
+    assert report["trimmed_seconds"] == pytest.approx(2.4, abs=0.07)
+    assert report["saved_seconds"] == pytest.approx(6.6, abs=0.07)
+
+    # Start of the first tone and of the second tone in the trimmed audio
+    first = trim.regions[0][0] / SAMPLE_RATE
+    second_trimmed = trim.regions[1][2] / SAMPLE_RATE
+    assert trim.to_original(0.0) == pytest.approx(first)
+    assert first == pytest.approx(1.9, abs=0.04)
+    assert trim.to_original(second_trimmed + 0.1) == pytest.approx(6.0, abs=0.04)
+
+def test_short_pauses_are_kept():
+    """Test that pauses below max_pause stay in the audio."""
+    audio = np.concatenate([tone(1.0), silence(0.3), tone(1.0)])
+    trim = trim_silence(audio, EnergyVAD(SAMPLE_RATE), padding=0.0, max_pause=0.5)
+
+    assert len(trim.regions) == 1
+    assert len(trim.audio) == len(audio)
+    assert trim.to_original(1.5) == pytest.approx(1.5)
+
+def test_silence_only_and_disabled_vad():
+    """Test that pure silence yields no speech and 'none' disables VAD."""
+    trim = trim_silence(silence(1.0), EnergyVAD(SAMPLE_RATE))
+
+    assert not trim.has_speech
+    assert trim.report()["saved_seconds"] == 1.0
+    assert create_vad("none") is None
+    with pytest.raises(ValueError):
+        create_vad("silero")
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+from app.models.database import Base, Document, DocumentChunk, DocumentType, Language
+from app.services.vector_index import (
+    FLAT, HNSW, IVF_FLAT, IdFilter, VectorIndex, encode_embedding, load_corpus_embeddings,
+    recall_at_k
+)
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    return np.arange(100, 2100, dtype=np.int64), rng.random((2000, 16), dtype=np.float32)
+
+@pytest.mark.parametrize("index_type", [FLAT, IVF_FLAT, HNSW])
+def test_search_returns_external_ids(corpus, index_type):
+    """Test that every index type returns the IDs vectors were added under."""
+    ids, embeddings = corpus
+    index = VectorIndex.create(16, index_type)
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(ids, embeddings)
+
+    _, found = index.search(embeddings[:5], 1)
+    assert found[:, 0].tolist() == ids[:5].tolist()
+
+def test_ivf_requires_enough_training_vectors(corpus):
+    """Test that IVF training rejects corpora smaller than nlist."""
+    _, embeddings = corpus
+    index = VectorIndex.create(16, IVF_FLAT)
+    with pytest.raises(ValueError):
+        index.train(embeddings[:10])
+
+def test_hnsw_remove_uses_tombstones(corpus, tmp_path):
+    """Test that removed HNSW vectors disappear from results and survive a reload."""
+    ids, embeddings = corpus
+    index = VectorIndex.create(16, HNSW)
+    index.add(ids, embeddings)
+
+    assert index.remove(ids[:1]) == 1
+    _, found = index.search(embeddings[:1], 5)
+    assert ids[0] not in found[0]
+    assert index.ntotal == len(ids) - 1
+
+    path = str(tmp_path / "index.faiss")
+    index.save(path)
+    reloaded = VectorIndex.load(path)
+    assert ids[0] not in reloaded.ids()
+
+def test_hnsw_reinserted_ids_drop_their_old_vectors(corpus):
+    """Test that re-adding a tombstoned ID does not revive its old vector."""
+    _, embeddings = corpus
+    index = VectorIndex.create(16, HNSW)
+    index.add(np.array([1, 2]), embeddings[:2])
+    index.remove(np.array([1, 2]))
+    index.add(np.array([1, 2]), embeddings[2:4])
+
+    assert index.index.ntotal == 2
+    assert index.ids().tolist() == [1, 2]
+    distances, found = index.search(embeddings[:1], 2)
+    assert distances[0, 0] > 0
+    _, found = index.search(embeddings[2:3], 1)
+    assert found[0, 0] == 1
+
+@pytest.mark.parametrize("index_type", [FLAT, HNSW])
+def test_filtered_search_only_returns_matching_ids(corpus, index_type):
+    """Test that language/doc_type filters are applied inside the search."""
+    ids, embeddings = corpus
+    index = VectorIndex.create(16, index_type)
+    index.add(ids, embeddings)
+
+    filters = IdFilter()
+    languages = [Language.HINDI if i % 10 == 0 else Language.ENGLISH for i in ids]
+    doc_types = [DocumentType.FAQ if i % 4 == 0 else DocumentType.POLICY for i in ids]
+    filters.add(ids, language=languages, doc_type=doc_types)
+
+    selector = filters.selector(language=Language.HINDI, doc_type=DocumentType.FAQ)
+    _, found = index.search(embeddings[:3], 5, selector)
+    assert (found != -1).all()
+    assert all(i % 20 == 0 for i in found.ravel())
+
+    mask = filters.mask(language=Language.HINDI, doc_type=DocumentType.FAQ)
+    assert np.flatnonzero(mask).tolist() == [i for i in ids if i % 20 == 0]
+    assert filters.mask(language=None) is None
+
+    filters.remove(ids[ids % 20 == 0])
+    _, found = index.search(embeddings[:1], 5, filters.selector(language="hi", doc_type="faq"))
+    assert (found == -1).all()
+    assert not filters.mask(language="hi", doc_type="faq").any()
+
+def test_recall_at_k():
+    """Test recall computation against ground truth."""
+    truth = np.array([[1, 2], [3, 4]])
+    found = np.array([[2, 9], [3, 4]])
+    assert recall_at_k(truth, found) == 0.75
+
+def test_embeddings_stored_as_deferred_float32(corpus):
+    """Test binary storage, deferred loading and batched corpus decoding."""
+    _, embeddings = corpus
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Document(title="t", content="c", chunks=[
+            DocumentChunk(chunk_index=i, content=f"c{i}", embedding=encode_embedding(embeddings[i]))
+            for i in range(25)
+        ] + [DocumentChunk(chunk_index=25, content="no embedding")]))
+        db.commit()
+
+    with Session(engine) as db:
+        chunk = db.query(DocumentChunk).first()
+        assert "embedding" in inspect(chunk).unloaded
+        assert len(chunk.embedding) == 16 * 4
+
+        ids, loaded = load_corpus_embeddings(db, batch_size=10)
+        assert ids.tolist() == list(range(1, 26))
+        assert loaded.dtype == np.float32
+        assert np.array_equal(loaded, embeddings[:25])